@@ -0,0 +1,195 @@
+'''
+Measurement helpers shared by the benchmark scripts.
+
+A Recorder tags each payload with a sequence number, remembers when it was
+sent and computes the end-to-end latency when a host hands the payload back
+through its receive_callback. The networks run on threads, with a window of
+packets in flight, or on the discrete-event engine, with packets injected at
+a fixed virtual interval; latencies are wall clock times in both cases.
+measure() wraps a benchmark run and reports throughput, latency percentiles,
+CPU time and peak RSS as a dict that is printed as JSON.
+'''
+
+import argparse
+import json
+import resource
+import sys
+import threading
+import time
+from event_sim import Simulator
+
+## digits of the sequence number that prefixes each payload
+seq_digits = 8
+
+
+## Tracks the packets sent and delivered during a benchmark run
+class Recorder:
+
+    ##@param clock: time source for latencies, e.g. the virtual clock of an event driven simulation
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.sent = 0  # number of packets sent
+        self.sent_D = {}  # {sequence number: send time} of the packets in flight
+        self.latency_L = []  # end-to-end latency of each delivered packet
+        self.bytes_received = 0
+        self.cond = threading.Condition()  # signalled on every delivery, for windowed senders
+
+    ## called when printing the object
+    def __str__(self):
+        return 'Recorder'
+
+    ## number of packets delivered so far
+    @property
+    def received(self):
+        return len(self.latency_L)
+
+    ## build a payload of the given size carrying a sequence number, and record it as sent
+    # @param seq: sequence number of the packet
+    # @param size: payload length, at least seq_digits
+    def payload(self, seq, size):
+        data_S = str(seq).zfill(seq_digits) + 'x' * (size - seq_digits)
+        self.sent += 1
+        self.sent_D[seq] = self.clock()
+        return data_S
+
+    ## receive_callback of the destination hosts
+    # @param data_S: payload of a delivered packet
+    def deliver(self, data_S):
+        now = self.clock()
+        sent = self.sent_D.pop(int(data_S[:seq_digits]), None)
+        if sent is None:
+            return  # duplicate, or not sent by the benchmark
+        with self.cond:
+            self.latency_L.append(now - sent)
+            self.bytes_received += len(data_S)
+            self.cond.notify_all()
+
+    ## block until fewer than window packets are in flight
+    # @param window: maximum packets in flight
+    # @param timeout: seconds to wait for a delivery before giving up on lost packets
+    # @return False if the timeout expired
+    def wait_window(self, window, timeout):
+        with self.cond:
+            return self.cond.wait_for(lambda: self.sent - self.received < window, timeout)
+
+
+## start a thread for every network object
+# @return the started threads
+def start_threads(object_L):
+    thread_L = [threading.Thread(name=str(o), target=o.run) for o in object_L]
+    for t in thread_L:
+        t.start()
+    return thread_L
+
+
+## stop and join the threads of the network objects
+def stop_threads(object_L, thread_L):
+    for o in object_L:
+        o.stop = True
+    for t in thread_L:
+        t.join()
+
+
+## send packets into a threaded network, keeping at most window in flight, and wait for them
+# @param send: function sending the packet with the given sequence number
+# @param recorder: Recorder that the destination hosts deliver to
+# @param packets: number of packets to send
+# @param window: maximum packets in flight
+# @param timeout: seconds to wait for a delivery before giving up on lost packets
+def run_threads(send, recorder, packets, window, timeout):
+    for seq in range(packets):
+        if not recorder.wait_window(window, timeout):
+            break  # packets were lost, report what was delivered
+        send(seq)
+    with recorder.cond:
+        recorder.cond.wait_for(lambda: recorder.received >= recorder.sent, timeout)
+
+
+## create a simulator driving the network objects
+# @param object_L: hosts, routers and link layers
+def simulator(object_L):
+    sim = Simulator()
+    for o in object_L:
+        if hasattr(o, 'link_L'):
+            sim.add_link_layer(o)
+        else:
+            sim.add_node(o)
+    return sim
+
+
+## send packets into an event driven network, one every interval of virtual time
+# @param sim: Simulator driving the network
+# @param send: function sending the packet with the given sequence number
+# @param packets: number of packets to send
+# @param interval: virtual time between packets
+def run_des(sim, send, packets, interval=1.0):
+    start = sim.now
+    for seq in range(packets):
+        sim.schedule_at(start + seq * interval, send, seq)
+    sim.run()
+
+
+## the q-th percentile (0 to 100) of a list of values, by nearest rank
+def percentile(value_L, q):
+    if not value_L:
+        return None
+    value_L = sorted(value_L)
+    rank = max(0, min(len(value_L) - 1, int(round(q / 100 * len(value_L))) - 1))
+    return value_L[rank]
+
+
+## peak resident set size of this process in KiB
+def peak_rss_kib():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss  # macOS reports bytes
+
+
+## time a benchmark run and summarize it
+# @param name: name of the benchmarked variant
+# @param run: function without arguments that sends and delivers the packets
+# @param recorder: Recorder that the destination hosts deliver to
+# @param config_D: benchmark parameters copied into the report
+# @return dict of the measurements
+def measure(name, run, recorder, config_D):
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    run()
+    wall_time = time.perf_counter() - wall_start
+    cpu_time = time.process_time() - cpu_start
+    result_D = {'variant': name}
+    result_D.update(config_D)
+    result_D.update({
+        'packets_sent': recorder.sent,
+        'packets_delivered': recorder.received,
+        'wall_time': wall_time,
+        'packets_per_sec': recorder.received / wall_time if wall_time else None,
+        'bytes_per_sec': recorder.bytes_received / wall_time if wall_time else None,
+        'latency_p50': percentile(recorder.latency_L, 50),
+        'latency_p99': percentile(recorder.latency_L, 99),
+        'cpu_time': cpu_time,
+        'peak_rss_kib': peak_rss_kib(),
+    })
+    return result_D
+
+
+## command line options common to all benchmarks
+# @param description: help text of the benchmark
+# @param payload: default payload size
+def parse_args(description, payload=40):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('-n', '--packets', type=int, default=1000, help='number of packets to send')
+    parser.add_argument('--payload', type=int, default=payload, help='payload size in bytes')
+    parser.add_argument('--des', action='store_true', help='run on the discrete-event engine instead of threads')
+    parser.add_argument('--binary', action='store_true', help='use the binary wire format where supported')
+    parser.add_argument('--window', type=int, default=32, help='packets in flight when running on threads')
+    parser.add_argument('--timeout', type=float, default=10, help='seconds to wait for a lost packet on threads')
+    parser.add_argument('--log', action='store_true', help='keep the event log on')
+    args = parser.parse_args()
+    args.payload = max(args.payload, seq_digits)
+    return args
+
+
+## print a report as one line of JSON
+def report(result_D):
+    sys.stdout.flush()
+    print(json.dumps(result_D, sort_keys=True))
@@ -0,0 +1,50 @@
+import bench
+import eventlog
+import topology
+
+## drives packets through the part 3 network (4 hosts, routers A-D) and reports JSON
+# usage: python benchmark.py [-n packets] [--payload bytes] [--des] [--binary]
+
+##configuration parameters
+router_queue_size = 0  # 0 means unlimited
+router_batch_size = 8  # max packets a router drains from each interface per pass
+
+
+## build the network of simulation3.py from topology3.json
+# @param wire_format: encoding of packets on the links
+# @return (list of network objects, list of (source host, destination address), mtu of the first hop)
+def build(wire_format):
+    topo = topology.load('topology3.json', wire_format=wire_format, max_queue_size=router_queue_size,
+                         batch_size=router_batch_size)
+    # host 1292 has no link, so both sources send to host 1291, over B and over C
+    flow_L = [(topo.node(1271), 1291), (topo.node(1272), 1291)]
+    return topo.object_L, flow_L, topo.link_layer.link_L[0].in_intf.mtu
+
+
+if __name__ == '__main__':
+    args = bench.parse_args('Throughput and latency of the Data-plane part 3 network', payload=35)
+    eventlog.set_level(eventlog.INFO if args.log else eventlog.OFF)
+    wire_format = 'binary' if args.binary else 'string'
+    object_L, flow_L, mtu = build(wire_format)
+    # payloads larger than the mtu are fragmented by the hosts and reassembled at the destination
+    recorder = bench.Recorder()
+    for o in object_L:
+        if hasattr(o, 'receive_callback'):
+            o.receive_callback = recorder.deliver
+
+    ## send packet seq, alternating between the flows
+    def send(seq):
+        host, dst_addr = flow_L[seq % len(flow_L)]
+        host.udt_send(dst_addr, recorder.payload(seq, args.payload), mtu)
+
+    config_D = {'mode': 'des' if args.des else 'threads', 'wire_format': wire_format, 'payload': args.payload}
+    if args.des:
+        sim = bench.simulator(object_L)
+        result_D = bench.measure('Data-plane', lambda: bench.run_des(sim, send, args.packets), recorder, config_D)
+    else:
+        thread_L = bench.start_threads(object_L)
+        run = lambda: bench.run_threads(send, recorder, args.packets, args.window, args.timeout)
+        result_D = bench.measure('Data-plane', run, recorder, config_D)
+        bench.stop_threads(object_L, thread_L)
+    eventlog.flush()
+    bench.report(result_D)
@@ -0,0 +1,150 @@
+'''
+Asynchronous structured event log, a non-blocking replacement for rprint.
+
+Nodes record events as (sequence, format, args) tuples in a ring buffer
+owned by the calling thread, without taking a lock or formatting a string.
+A background writer thread periodically collects the events of all threads,
+formats them in sequence order and writes them to stdout in one batch.
+
+Each subsystem ('host', 'router', 'link', ...) has its own level. At OFF
+the logging methods are replaced by a no-op, so disabled logging costs one
+empty call.
+'''
+
+import atexit
+import itertools
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+## log levels
+OFF = 0
+ERROR = 1
+INFO = 2
+DEBUG = 3
+
+ring_size = 1 << 16  # events buffered per thread, the oldest are overwritten when full
+flush_interval = 0.05  # seconds between batches written by the background writer
+
+sequence = itertools.count()  # orders events across threads
+buffer_L = []  # the ring buffers of all threads that logged
+buffer_lock = threading.Lock()  # guards buffer_L and the output stream
+local = threading.local()
+writer = None
+log_D = {}  # {subsystem: EventLog}
+default_level = INFO
+
+
+## does nothing, stands in for the logging methods of disabled levels
+def discard(fmt, *args):
+    pass
+
+
+## the ring buffer of the calling thread
+def thread_buffer():
+    buf = getattr(local, 'buf', None)
+    if buf is None:
+        buf = local.buf = deque(maxlen=ring_size)
+        with buffer_lock:
+            buffer_L.append(buf)
+        start_writer()
+    return buf
+
+
+## format and write all buffered events in sequence order
+def flush():
+    with buffer_lock:
+        event_L = []
+        for buf in buffer_L:
+            while buf:
+                event_L.append(buf.popleft())
+        if not event_L:
+            return
+        event_L.sort(key=lambda e: e[0])
+        lines = []
+        for _, fmt, args in event_L:
+            lines.append(fmt % args if args else fmt)
+        sys.stdout.write('\n'.join(lines) + '\n')
+        sys.stdout.flush()
+
+
+## thread target of the background writer
+def write_loop():
+    while True:
+        time.sleep(flush_interval)
+        flush()
+
+
+## start the background writer if it is not running yet
+def start_writer():
+    global writer
+    if writer is None:
+        writer = threading.Thread(name='EventLog', target=write_loop, daemon=True)
+        writer.start()
+        atexit.register(flush)
+
+
+## Logger of one subsystem
+class EventLog:
+
+    ##@param subsystem: name of the subsystem, e.g. 'router'
+    # @param level: OFF, ERROR, INFO or DEBUG
+    def __init__(self, subsystem, level):
+        self.subsystem = subsystem
+        self.set_level(level)
+
+    ## called when printing the object
+    def __str__(self):
+        return 'EventLog_%s' % self.subsystem
+
+    ## enable the methods of the levels up to level and disable the rest
+    def set_level(self, level):
+        self.level = level
+        self.error = self.record if level >= ERROR else discard
+        self.info = self.record if level >= INFO else discard
+        self.debug = self.record if level >= DEBUG else discard
+
+    ## is the given level enabled, for guarding expensive argument computations
+    def enabled(self, level):
+        return self.level >= level
+
+    ## buffer an event, formatted later as fmt % args
+    def record(self, fmt, *args):
+        thread_buffer().append((next(sequence), fmt, args))
+
+
+## get the logger of a subsystem, creating it at the default level
+def get_log(subsystem):
+    log = log_D.get(subsystem)
+    if log is None:
+        log = log_D[subsystem] = EventLog(subsystem, default_level)
+    return log
+
+
+## set the level of one subsystem, or of all subsystems and the default
+# @param level: OFF, ERROR, INFO or DEBUG
+# @param subsystem: name of the subsystem, None for all
+def set_level(level, subsystem=None):
+    global default_level
+    if subsystem is not None:
+        get_log(subsystem).set_level(level)
+        return
+    default_level = level
+    for log in log_D.values():
+        log.set_level(level)
+
+
+## turn subsystems off for the duration of a with block, e.g. while building a large network
+# @param subsystem_L: names of the subsystems to silence
+@contextmanager
+def quiet(*subsystem_L):
+    level_D = {s: get_log(s).level for s in subsystem_L}
+    for s in subsystem_L:
+        get_log(s).set_level(OFF)
+    try:
+        yield
+    finally:
+        for s, level in level_D.items():
+            get_log(s).set_level(level)
@@ -0,0 +1,45 @@
+## Longest-prefix-match table over integer host addresses (e.g. 1271, 1291)
+# Prefixes are kept in one hash table per prefix length, and a lookup probes
+# the lengths present in the table from longest to shortest, so it costs at
+# most one dictionary lookup per address bit regardless of the table size.
+class PrefixTable:
+    ## number of bits in an address
+    addr_bits = 32
+
+    def __init__(self):
+        self.table_D = {}  # {prefix length: {masked address: value}}
+        self.lengths_L = []  # prefix lengths in use, longest first
+
+    ## number of prefixes in the table
+    def __len__(self):
+        return sum(len(t) for t in self.table_D.values())
+
+    ## mask an address down to its first prefix_len bits
+    @classmethod
+    def mask(cls, addr, prefix_len):
+        return int(addr) >> (cls.addr_bits - prefix_len)
+
+    ## add or replace a prefix
+    # @param addr: address whose first prefix_len bits form the prefix
+    # @param value: value returned by lookups matching this prefix
+    # @param prefix_len: number of significant bits, addr_bits for a host route
+    def insert(self, addr, value, prefix_len=None):
+        if prefix_len is None:
+            prefix_len = self.addr_bits
+        if not 0 <= prefix_len <= self.addr_bits:
+            raise ValueError('%s: invalid prefix length %d' % (self, prefix_len))
+        if prefix_len not in self.table_D:
+            self.table_D[prefix_len] = {}
+            self.lengths_L = sorted(self.table_D, reverse=True)
+        self.table_D[prefix_len][self.mask(addr, prefix_len)] = value
+
+    ## find the value of the longest prefix matching an address
+    # @param addr: address to look up
+    # @return the matching value, or None when no prefix matches
+    def lookup(self, addr):
+        addr = int(addr)
+        for prefix_len in self.lengths_L:
+            value = self.table_D[prefix_len].get(addr >> (self.addr_bits - prefix_len))
+            if value is not None:
+                return value
+        return None
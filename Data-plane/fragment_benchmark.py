@@ -0,0 +1,38 @@
+import sys
+import time
+from network3 import NetworkPacket
+
+## measures how fast NetworkPacket segments a packet for a small mtu
+# usage: python fragment_benchmark.py [mtu]
+
+##configuration parameters
+mtu = int(sys.argv[1]) if len(sys.argv) > 1 else 30  # the mtu of the Router_D to Host_1291 link
+payload_size_L = [1 << 10, 16 << 10, 256 << 10, 1 << 20, 4 << 20]  # payload sizes in bytes
+min_run_time = 0.5  # repeat each measurement for at least this many seconds
+
+
+## time fragmenting and serializing one packet, repeated for min_run_time
+# @param fragment: function returning the serialized segments of the packet
+# @return (segments per packet, segments per second)
+def measure(fragment):
+    runs = 0
+    segments = 0
+    start = time.perf_counter()
+    while True:
+        segments += len(fragment())
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_run_time:
+            return segments // runs, segments / elapsed
+
+
+if __name__ == '__main__':
+    print('mtu %d' % mtu)
+    print('%10s %10s %16s %16s' % ('payload', 'segments', 'string seg/s', 'binary seg/s'))
+    for size in payload_size_L:
+        data_S = 'x' * size
+        pkt_S = NetworkPacket(1271, 1291, data_S).to_byte_SSegment()
+        pkt_B = NetworkPacket(1271, 1291, data_S).to_bytes()
+        count, string_rate = measure(lambda: [p.to_byte_SSegment() for p in NetworkPacket.from_byte_S(pkt_S, mtu)])
+        _, binary_rate = measure(lambda: [p.to_bytes() for p in NetworkPacket.from_bytes(pkt_B, mtu)])
+        print('%10d %10d %16.0f %16.0f' % (size, count, string_rate, binary_rate))
@@ -1,5 +1,9 @@
 import queue
 import threading
+from event_sim import Readiness
+from eventlog import get_log
+
+link_log = get_log('link')
 
 
 ## An abstraction of a link between router interfaces
@@ -32,16 +36,26 @@ class Link:
         if pkt_S is None:
             return  # return if no packet to transfer
         if len(pkt_S) > self.out_intf.mtu:
-            print('%s: packet "%s" length greater then link mtu (%d)' % (self, pkt_S, self.out_intf.mtu))
+            link_log.error('%s: packet "%s" length greater then link mtu (%d)', self, pkt_S, self.out_intf.mtu)
             return  # return without transmitting if packet too big
         # otherwise transmit the packet
         try:
             self.out_intf.put(pkt_S)
-            print('%s: transmitting packet "%s"' % (self, pkt_S))
+            link_log.info('%s: transmitting packet "%s"', self, pkt_S)
         except queue.Full:
-            print('%s: packet lost' % (self))
+            link_log.error('%s: packet lost', self)
             pass
 
+    ## register a callback to be notified when a packet is queued for this link
+    # @param callback: function without arguments, e.g. an event scheduler wakeup
+    def attach_wakeup(self, callback):
+        self.in_intf.wakeup = callback
+
+    ## event handler: transmit everything queued on the link
+    def step(self):
+        while not self.in_intf.queue.empty():
+            self.tx_pkt()
+
 
 ## An abstraction of the link layer
 class LinkLayer:
@@ -62,11 +76,17 @@ class LinkLayer:
 
     ## thread target for the network to keep transmitting data across links
     def run(self):
-        print(threading.currentThread().getName() + ': Starting')
+        link_log.info('%s: Starting', threading.currentThread().getName())
+        ready = Readiness()
+        for link in self.link_L:
+            link.attach_wakeup(ready.notify)
         while True:
-            # transfer one packet on all the links
-            self.transfer()
+            # transfer all queued packets on all the links
+            for link in self.link_L:
+                link.step()
             # terminate
             if self.stop:
-                print(threading.currentThread().getName() + ': Ending')
+                link_log.info('%s: Ending', threading.currentThread().getName())
                 return
+            # sleep until a packet is queued on any link
+            ready.wait()
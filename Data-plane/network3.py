@@ -1,6 +1,15 @@
 
 import queue
+import struct
 import threading
+import time
+from event_sim import Readiness
+from fib import PrefixTable
+from reassembly import Reassembler
+from eventlog import get_log
+
+host_log = get_log('host')
+router_log = get_log('router')
 
 
 ## wrapper class for a queue of packets
@@ -9,6 +18,7 @@ class Interface:
     def __init__(self, maxsize=0):
         self.queue = queue.Queue(maxsize);
         self.mtu = None
+        self.wakeup = None  # callback notifying the consumer of a new packet
 
     ##get packet from the queue interface
     def get(self):
@@ -22,6 +32,37 @@ class Interface:
     # @param block - if True, block until room in queue, if False may throw queue.Full exception
     def put(self, pkt, block=False):
         self.queue.put(pkt, block)
+        if self.wakeup is not None:
+            self.wakeup()
+
+    ##get up to max_count packets from the queue at once
+    # Holds the queue.Queue lock once for the batch and pops from its deque, as queue.Queue.get() does per packet.
+    # @param max_count - the maximum number of packets to return
+    def get_batch(self, max_count):
+        q = self.queue
+        with q.mutex:
+            pkt_L = [q.queue.popleft() for _ in range(min(max_count, len(q.queue)))]
+            if pkt_L:
+                q.not_full.notify(len(pkt_L))
+        return pkt_L
+
+    ##put several packets into the interface queue, notifying the consumer once
+    # Without a bound, appends to the deque of the queue.Queue under its lock and keeps its task count and
+    # condition as queue.Queue.put() does.
+    # @param pkt_L - Packets to be inserted into the queue in order
+    # @param block - if True, block until room in queue, if False may throw queue.Full exception
+    def put_batch(self, pkt_L, block=False):
+        q = self.queue
+        if q.maxsize > 0:
+            for pkt in pkt_L:  # respect the queue bound packet by packet
+                q.put(pkt, block)
+        else:
+            with q.mutex:
+                q.queue.extend(pkt_L)
+                q.unfinished_tasks += len(pkt_L)
+                q.not_empty.notify(len(pkt_L))
+        if self.wakeup is not None:
+            self.wakeup()
 
 ## Implements a network layer packet (different from the RDT packet
 # from programming assignment 2).
@@ -33,26 +74,34 @@ class NetworkPacket:
     dst_addr_S_length = 5
 
     # --- new fields for segmentation "to allow the destination host to perform reassebmbly tasks" (pg 333 in book)
-    offset_S_length = 2
+    # wide enough for the ids hosts wrap at and for offsets into payloads of up to 10**7 characters
+    id_S_length = 5
+    offset_S_length = 7
     flag_S_length = 1
-    header_length = src_addr_S_length + dst_addr_S_length + flag_S_length + offset_S_length
+    header_length = src_addr_S_length + dst_addr_S_length + id_S_length + flag_S_length + offset_S_length
+    ## binary encoding: source, destination, id, flag and offset, followed by the payload bytes
+    header = struct.Struct('!IIHBI')
 
     ##@param dst_addr: address of the destination host
     # @param data_S: packet payload
+    # @param pkt_id: identifies the packet a segment belongs to, together with the addresses
     #DL: change so there's a src_addr
-    def __init__(self, src_addr, dst_addr, data_S , flag=0, offset=0):    #now takes in flag and offset "to allow the destination host to perform reassembly tasks" (pg 333)
+    def __init__(self, src_addr, dst_addr, data_S , flag=0, offset=0, pkt_id=0):    #now takes in flag and offset "to allow the destination host to perform reassembly tasks" (pg 333)
         self.src_addr = src_addr
         self.dst_addr = dst_addr
         self.data_S = data_S
 
         #new parameters
+        self.pkt_id = pkt_id
         self.offset = offset
         self.flag = flag    #flag bit,  the last segment should have a flag bit of zero
 
 
     ## called when printing the object
     def __str__(self):
-        return self.to_byte_S()
+        if isinstance(self.data_S, str):
+            return self.to_byte_SSegment()
+        return str(self.to_bytes())
 
     ## convert packet to a byte string for transmission over links
     def to_byte_S(self):
@@ -65,37 +114,107 @@ class NetworkPacket:
     # convert packet into a byte string segment for transmission over links /extract a packet object from a byte 'segment', adding the flag and offset for each segment
     #@param byte_S: byte string representation of the packet
     def to_byte_SSegment(self):
+        id_S = str(self.pkt_id)
+        offset_S = str(self.offset)
+        if len(id_S) > self.id_S_length or len(offset_S) > self.offset_S_length:
+            raise ValueError('packet id %s or offset %s does not fit the string header' % (id_S, offset_S))
         byte_S = str(self.src_addr).zfill(self.src_addr_S_length)#DL: source address
         byte_S += str(self.dst_addr).zfill(self.dst_addr_S_length)
+        byte_S += id_S.zfill(self.id_S_length) #add packet id
         byte_S += str(self.flag).zfill(self.flag_S_length) #add segment flag
-        byte_S += str(self.offset).zfill(self.offset_S_length) #add segment offset
+        byte_S += offset_S.zfill(self.offset_S_length) #add segment offset
         byte_S += self.data_S       #lastly the data
         return byte_S
+
+    ## convert packet (segment) to bytes using the binary encoding
+    def to_bytes(self):
+        data = self.data_S
+        if isinstance(data, str):
+            data = data.encode()
+        return self.header.pack(self.src_addr, self.dst_addr, self.pkt_id, self.flag, self.offset) + data
+
+    ## extract a packet (segment) object from a byte string segment
+    # @param byte_S: byte string representation of the segment
+    @classmethod
+    def segment_from_byte_S(self, byte_S):
+        src_addr, dst_addr = self.addresses(byte_S)
+        start = self.src_addr_S_length + self.dst_addr_S_length
+        pkt_id = int(byte_S[start : start + self.id_S_length])
+        start += self.id_S_length
+        flag = int(byte_S[start : start + self.flag_S_length])
+        start += self.flag_S_length
+        offset = int(byte_S[start : start + self.offset_S_length])
+        return self(src_addr, dst_addr, byte_S[self.header_length:], flag, offset, pkt_id)
+
+    ## extract a packet (segment) object from its binary encoding
+    # @param data: bytes representation of the packet
+    @classmethod
+    def segment_from_bytes(self, data):
+        src_addr, dst_addr, pkt_id, flag, offset = self.header.unpack_from(data)
+        return self(src_addr, dst_addr, memoryview(data)[self.header.size:], flag, offset, pkt_id)
+
+    ## extract a packet (segment) object from either encoding
+    # @param pkt: str (string encoding) or bytes (binary encoding)
     @classmethod
-    def is_segment(self,byte_S):
-        if (byte_S[self.dst_addr_S_length]==1):
-            return True
-        return False
+    def segment_from_wire(self, pkt):
+        if isinstance(pkt, str):
+            return self.segment_from_byte_S(pkt)
+        return self.segment_from_bytes(pkt)
+
+    ## split this packet (segment) into segments fitting an mtu
+    # Boundaries are computed from the lengths, and slicing a memoryview payload
+    # shares its buffer, so nothing is copied until each segment is serialized
+    # onto its outgoing link. Offsets stay relative to the original packet, and
+    # only the last new segment inherits the flag of the one being split.
+    # @param mtu: maximum length of each segment including the header
+    # @param header_length: length of the header in the encoding used
+    def fragment(self, mtu, header_length):
+        seg_length = mtu - header_length
+        if seg_length <= 0:
+            raise Exception('mtu %d is too small for the packet header' % mtu)
+        data_S = self.data_S
+        last_offset = max(len(data_S) - 1, 0) // seg_length * seg_length
+        return [NetworkPacket(self.src_addr, self.dst_addr, data_S[start:start + seg_length],
+                              1 if start < last_offset else self.flag, self.offset + start, self.pkt_id)
+                for start in range(0, last_offset + 1, seg_length)]
+
+    ## extract packet segments fitting an mtu from the binary encoding
+    # @param data: bytes representation of the packet
+    # @param mtu: maximum length of each segment including the header
+    @classmethod
+    def from_bytes(self, data, mtu):
+        return self.segment_from_bytes(data).fragment(mtu, self.header.size)
+
+    ## convert packet (segment) for transmission
+    # @param binary: use the binary encoding instead of the string one
+    def to_wire(self, binary):
+        return self.to_bytes() if binary else self.to_byte_SSegment()
+
+    ## extract packet segments fitting an mtu from either encoding
+    # @param pkt: str (string encoding) or bytes (binary encoding)
+    # @param mtu: maximum length of each segment including the header
+    @classmethod
+    def from_wire(self, pkt, mtu):
+        if isinstance(pkt, str):
+            return self.from_byte_S(pkt, mtu)
+        return self.from_bytes(pkt, mtu)
 
-    ## extract a packet object from a byte string
+    ## extract the source and destination addresses from a byte string
     # @param byte_S: byte string representation of the packet
     @classmethod
+    def addresses(self, byte_S):
+        if not isinstance(byte_S, str):
+            return self.header.unpack_from(byte_S)[:2]
+        src_addr = int(byte_S[0: self.src_addr_S_length])
+        dst_addr = int(byte_S[self.src_addr_S_length: self.src_addr_S_length + self.dst_addr_S_length])
+        return src_addr, dst_addr
+
+    ## extract packet segments fitting an mtu from a byte string segment
+    # @param byte_S: byte string representation of the packet
+    # @param mtu: maximum length of each segment including the header
+    @classmethod
     def from_byte_S(self, byte_S, mtu):
-        packets = [] #array for storing the "segments"
-        src_addr = int(byte_S[0: NetworkPacket.src_addr_S_length])#DL getting source address
-        dst_addr = int(byte_S[NetworkPacket.src_addr_S_length :NetworkPacket.src_addr_S_length + NetworkPacket.dst_addr_S_length])
-        data_S = byte_S[NetworkPacket.src_addr_S_length + NetworkPacket.dst_addr_S_length : ]
-
-        #segments
-        offset_size = 0
-        while True:
-            seg_flag = 1 if self.header_length + len(data_S[offset_size:]) > mtu else 0        # flag is set to 1 unless it is the last "Segment" see pg334
-            # self(dst_addr, data_S, 1)
-            packets.append(self(src_addr, dst_addr, data_S[offset_size:offset_size + mtu - self.header_length], seg_flag, offset_size))   #add to array of received segments
-            offset_size = offset_size + mtu - self.header_length    #new offset size...
-            if len(data_S[offset_size:]) == 0:          #no mas segments
-                break
-        return packets
+        return self.segment_from_byte_S(byte_S).fragment(mtu, self.header_length)
 
 
 
@@ -104,58 +223,84 @@ class NetworkPacket:
 class Host:
 
     ##@param addr: address of this node represented as an integer
-    def __init__(self, addr):
+    # @param wire_format: 'string' for the original encoding or 'binary' for the struct based one
+    # @param reassembly_timeout: seconds to wait for the missing segments of a packet
+    # @param reassembly_budget: maximum bytes of incomplete packets to buffer
+    def __init__(self, addr, wire_format='string', reassembly_timeout=30, reassembly_budget=1 << 20):
         self.addr = addr
         self.in_intf_L = [Interface()]
         self.out_intf_L = [Interface()]
         self.stop = False #for thread termination
+        self.binary = wire_format == 'binary'
+        self.next_pkt_id = 0
+        self.clock = time.monotonic #source of the current time, replaced by a virtual clock when event driven
+        self.reassembler = Reassembler(reassembly_timeout, reassembly_budget, lambda: self.clock())
+        self.receive_callback = None #called with the data of every received packet, e.g. by a benchmark
 
     ## called when printing the object
     def __str__(self):
         return 'Host_%s' % (self.addr)
 
+    ## encode a packet in the wire format of this host
+    def encode(self, p):
+        return p.to_wire(self.binary)
+
+    ## create a packet with a new id
+    def new_packet(self, dst_addr, data_S):
+        pkt_id = self.next_pkt_id
+        self.next_pkt_id = (pkt_id + 1) % (1 << 16 if self.binary else 10 ** NetworkPacket.id_S_length)
+        return NetworkPacket(self.addr, dst_addr, data_S, pkt_id=pkt_id)
+
     ## create a packet and enqueue for transmission
     # @param dst_addr: destination address for the packet
     # @param data_S: data being transmitted to the network layer
 
     def udt_send(self, dst_addr, data_S, mtuMAX):
-    #create more than one packet when length is too big (mtuMax)
-        if(len(data_S) > mtuMAX):
-            part1, part2 = data_S[0:int(len(data_S) / 2)], data_S[int(len(data_S) /2):]
-
-            packet1 = NetworkPacket(self.addr, dst_addr, part1)
-
-            self.out_intf_L[0].put(packet1.to_byte_S())#send packets always enqueued successfully
-            print('%s: sending packet "%s" out interface with mtu=%d' % (self, packet1, self.out_intf_L[0].mtu))
-
-            packet2 = NetworkPacket(self.addr, dst_addr, part2)
-            self.out_intf_L[0].put(packet2.to_byte_S()) #send packets always enqueued successfully
-            print('%s: sending packet "%s" out interface with mtu=%d' % (self, packet2, self.out_intf_L[0].mtu))
-        else: #orig method for messages that dont need to be split
-            p = NetworkPacket(self.addr, dst_addr, data_S)
-            self.out_intf_L[0].put(p.to_byte_S()) #send packets always enqueued successfully
-            print('%s: sending packet "%s" out interface with mtu=%d' % (self, p, self.out_intf_L[0].mtu))
+        #segment the packet when it is too big for the mtu (header included), the destination reassembles it
+        p = self.new_packet(dst_addr, data_S)
+        header_length = NetworkPacket.header.size if self.binary else NetworkPacket.header_length
+        for segment in p.fragment(mtuMAX, header_length):
+            self.out_intf_L[0].put(self.encode(segment)) #send packets always enqueued successfully
+            host_log.info('%s: sending packet "%s" out interface with mtu=%d', self, segment, self.out_intf_L[0].mtu)
 
     ## receive packet from the network layer
-    segment_buffer = []     # to hold the segments that we create
     def udt_receive(self):
         pkt_S = self.in_intf_L[0].get()
-        if pkt_S is not None:
-            self.segment_buffer.append(pkt_S[NetworkPacket.header_length:]) #add/ append to the buffer
-            if not NetworkPacket.is_segment(pkt_S):
-                print('%s: received packet "%s"' % (self, ''.join(self.segment_buffer)))
-                self.segment_buffer.clear()
+        if pkt_S is None:
+            return
+        #hand the segment to the reassembler, which returns the data once the packet is complete
+        data_S = self.reassembler.add(NetworkPacket.segment_from_wire(pkt_S))
+        if data_S is not None:
+            if not isinstance(data_S, str):
+                data_S = bytes(data_S).decode()
+            host_log.info('%s: received packet "%s"', self, data_S)
+            if self.receive_callback is not None:
+                self.receive_callback(data_S)
+
+    ## register a callback to be notified when a packet arrives
+    # @param callback: function without arguments, e.g. an event scheduler wakeup
+    def attach_wakeup(self, callback):
+        self.in_intf_L[0].wakeup = callback
+
+    ## event handler: receive everything that has arrived
+    def step(self):
+        while not self.in_intf_L[0].queue.empty():
+            self.udt_receive()
 
     ## thread target for the host to keep receiving data
     def run(self):
-        print (threading.currentThread().getName() + ': Starting')
+        host_log.info('%s: Starting', threading.currentThread().getName())
+        ready = Readiness()
+        self.attach_wakeup(ready.notify)
         while True:
             #receive data arriving to the in interface
-            self.udt_receive()
+            self.step()
             #terminate
             if(self.stop):
-                print (threading.currentThread().getName() + ': Ending')
+                host_log.info('%s: Ending', threading.currentThread().getName())
                 return
+            #sleep until a packet arrives
+            ready.wait()
 
 
 
@@ -165,10 +310,17 @@ class Router:
     ##@param name: friendly router name for debugging
     # @param intf_count: the number of input and output interfaces
     # @param max_queue_size: max queue length (passed to Interface)
-    def __init__(self, name, intf_count, max_queue_size):
+    # @param batch_size: max packets drained from each interface per pass
+    # @param fairness_cap: max packets forwarded per pass over all interfaces, None for no cap
+    def __init__(self, name, intf_count, max_queue_size, batch_size=1, fairness_cap=None):
         self.stop = False #for thread termination
         self.name = name
-        self.forwardingT = []
+        self.batch_size = batch_size
+        self.fairness_cap = fairness_cap
+        self.first_intf = 0 #interface served first in the next pass, rotated for fairness
+        #forwarding tables mapping address prefixes to outgoing interfaces
+        self.src_fib = PrefixTable() #source based (policy) routes, checked first
+        self.dst_fib = PrefixTable() #destination based routes
         self.intf_count = intf_count
         #create a list of interfaces
         self.in_intf_L = [Interface(max_queue_size) for _ in range(intf_count)]
@@ -178,76 +330,115 @@ class Router:
     def __str__(self):
         return 'Router_%s' % (self.name)
 
+    ## add a route to the forwarding table
+    # @param addr: source or destination address (prefix) to match
+    # @param out_intf: interface to forward matching packets on
+    # @param policy: 'src' for source based or 'dst' for destination based forwarding
+    # @param prefix_len: number of significant address bits, None for a host route
+    def add_route(self, addr, out_intf, policy='dst', prefix_len=None):
+        if not 0 <= out_intf < self.intf_count:
+            raise Exception('%s: interface %d does not exist' % (self, out_intf))
+        if policy == 'src':
+            self.src_fib.insert(addr, out_intf, prefix_len)
+        elif policy == 'dst':
+            self.dst_fib.insert(addr, out_intf, prefix_len)
+        else:
+            raise Exception('%s: unknown forwarding policy %s' % (self, policy))
+
+    ## add a forwarding table entry in the tuple format of the simulations
+    # @param forward: (src_addr, out_intf) for source based or (out_intf, dst_addr) for destination based forwarding
+    # @param policy: 'src' or 'dst', inferred from which field is an interface number when None
+    def addToTable(self, forward, policy=None):
+        if policy is None:
+            policy = 'src' if forward[0] >= self.intf_count else 'dst'
+        if policy == 'src':
+            self.add_route(forward[0], forward[1], 'src')
+            router_log.info('%d added to %s', forward[0], self.name)
+        else:
+            self.add_route(forward[1], forward[0], 'dst')
+            router_log.info('%d added to %s', forward[1], self.name)
+
+    ## find the outgoing interface for a packet
+    # @param src_addr: source address of the packet
+    # @param dst_addr: destination address of the packet
+    # @param in_intf: interface the packet arrived on
+    def lookup(self, src_addr, dst_addr, in_intf):
+        out_intf = self.src_fib.lookup(src_addr)
+        if out_intf is None:
+            out_intf = self.dst_fib.lookup(dst_addr)
+        if out_intf is None:
+            if self.intf_count > 1:
+                raise Exception('Forwarding addressed does not exist')
+            out_intf = in_intf #single interface routers pass packets straight through
+        return out_intf
 
-    def addToTable(self, forward):
-        self.forwardingT.append(forward)
-        print('%d added to %s' % (forward[0], self.name))
     ## look through the content of incoming interfaces and forward to
     # appropriate outgoing interfaces
+    # Up to batch_size packets are drained from each interface per pass; route
+    # lookups are cached for the batch and the segments for each outgoing
+    # interface are enqueued together.
     def forward(self):
-        mtuValue = self.out_intf_L[0].mtu #mtu for link from routera to server/end host this should = 30
-        for i in range(len(self.in_intf_L)):
-            pkt_S = None
-            try:
-                #get packet from interface i
-                pkt_S = self.in_intf_L[i].get()
-                #if there is a packet make a forwarding decision
-                if pkt_S is not None:
-                    #from one packet to many segmented packets
-                    packets = NetworkPacket.from_byte_S(pkt_S, mtuValue) #parse packets out
-
-                    #print(packets[0])
-                    #print(packets[0].src_addr)
-                    #print(packets[0].dst_addr)
-
-                    #DL: Use a function or have a variable inside this class to be edited for a formation of a routing table.
-                    if(self.intf_count>1):
-                    #DL: Check forwarding table based on source and or destination
-                        count = 0
-                        if((self.forwardingT[0][0])>1):#DL: this is checking to see if it's a source based forward
-                            for i in self.forwardingT:
-                                while(packets[0].src_addr!=self.forwardingT[count][0]):
-                                    #print(self.forwardingT[count][0])
-                                    count += 1
-                                    if(count>self.intf_count):
-                                        raise Exception('Forwarding addressed does not exist')
-
-                                for p in packets:   # for all of the segments
-                                    #print(count)
-                                    self.out_intf_L[self.forwardingT[count][1]].put(p.to_byte_SSegment(), True)      # process to byte segments not just as a whole anymore
-                                    print('%s: forwarding packet "%s" from interface %d to %d with mtu %d' % (self, p, self.forwardingT[count][0], self.forwardingT[count][1], self.out_intf_L[self.forwardingT[count][1]].mtu))
-
-
-                        else:#DL: this is for checking for dst based forwarding
-                            for i in self.forwardingT:
-                                while(packets[0].dst_addr!=self.forwardingT[count][1]):
-                                    #print(self.forwardingT[count][1])
-                                    count += 1
-                                    if(count>self.intf_count):
-                                        raise Exception('Forwarding addressed does not exist')
-
-                                for p in packets:   # for all of the segments
-                                    self.out_intf_L[self.forwardingT[count][0]].put(p.to_byte_SSegment(), True)      # process to byte segments not just as a whole anymore
-                                    print('%s: forwarding packet "%s" from interface %d to %d with mtu %d' % (self, p, self.forwardingT[count][1], self.forwardingT[count][0], self.out_intf_L[self.forwardingT[count][0]].mtu))
-
-
-                    else:
-                        #orig
-                        #self.out.intf_L[i].put(p.to_byte_S(), True)
-                        for p in packets:   # for all of the segments
-                            self.out_intf_L[i].put(p.to_byte_SSegment(), True)      # process to byte segments not just as a whole anymore
-                            print('%s: forwarding packet "%s" from interface %d to %d with mtu %d' % (self, p, i, i, self.out_intf_L[i].mtu))
-            except queue.Full:
-                print('%s: packet "%s" lost on interface %d' % (self, p, i))
-                pass
-            except Exception as error:
-                print(repr(error))
+        intf_count = len(self.in_intf_L)
+        budget = self.fairness_cap
+        first = self.first_intf
+        self.first_intf = (first + 1) % intf_count
+        for i in [(first + n) % intf_count for n in range(intf_count)]:
+            batch_size = self.batch_size if budget is None else min(self.batch_size, budget)
+            if batch_size <= 0:
+                break
+            #get packets from interface i
+            pkt_L = self.in_intf_L[i].get_batch(batch_size)
+            if budget is not None:
+                budget -= len(pkt_L)
+            route_D = {} #{(src_addr, dst_addr): out_intf} for this batch
+            out_D = {} #{out_intf: [segments]}
+            for pkt_S in pkt_L:
+                try:
+                    #make a forwarding decision
+                    addrs = NetworkPacket.addresses(pkt_S)
+                    out_intf = route_D.get(addrs)
+                    if out_intf is None:
+                        out_intf = route_D[addrs] = self.lookup(addrs[0], addrs[1], i)
+                    mtu = self.out_intf_L[out_intf].mtu
+                    if mtu is None: #the mtu is set when a link is added to the interface
+                        router_log.error('%s: no link on interface %d, dropping packet "%s"', self, out_intf, pkt_S)
+                        continue
+                    #from one packet to many segmented packets fitting the outgoing link
+                    packets = NetworkPacket.from_wire(pkt_S, mtu) #parse packets out
+                    binary = not isinstance(pkt_S, str) #forward in the encoding the packet arrived in
+                    seg_L = out_D.setdefault(out_intf, [])
+                    for p in packets:   # for all of the segments
+                        seg_L.append(p.to_wire(binary))      # process to byte segments not just as a whole anymore
+                        router_log.info('%s: forwarding packet "%s" from interface %d to %d with mtu %d', self, p, i, out_intf, mtu)
+                except Exception as error:
+                    router_log.error('%r', error)
+            for out_intf, seg_L in out_D.items():
+                try:
+                    self.out_intf_L[out_intf].put_batch(seg_L, True)
+                except queue.Full:
+                    router_log.error('%s: packets lost on interface %d', self, out_intf)
+                    pass
+
+    ## register a callback to be notified when a packet arrives on any interface
+    # @param callback: function without arguments, e.g. an event scheduler wakeup
+    def attach_wakeup(self, callback):
+        for intf in self.in_intf_L:
+            intf.wakeup = callback
+
+    ## event handler: forward everything that has arrived
+    def step(self):
+        while any(not intf.queue.empty() for intf in self.in_intf_L):
+            self.forward()
 
     ## thread target for the host to keep forwarding data
     def run(self):
-        print (threading.currentThread().getName() + ': Starting')
+        router_log.info('%s: Starting', threading.currentThread().getName())
+        ready = Readiness()
+        self.attach_wakeup(ready.notify)
         while True:
-            self.forward()
+            self.step()
             if self.stop:
-                print (threading.currentThread().getName() + ': Ending')
-                return
\ No newline at end of file
+                router_log.info('%s: Ending', threading.currentThread().getName())
+                return
+            #sleep until a packet arrives on any interface
+            ready.wait()
\ No newline at end of file
@@ -0,0 +1,97 @@
+import time
+from collections import OrderedDict
+
+
+## Segments received so far for one packet
+class PartialPacket:
+
+    ##@param first_time: time the first segment of the packet arrived
+    def __init__(self, first_time):
+        self.first_time = first_time
+        self.segment_D = {}  # {offset: segment data}
+        self.received = 0  # length of the data received so far
+        self.total = None  # length of the whole packet, known once the last segment arrives
+
+    ## join the segments in offset order
+    # @return the packet data, or None if the segments do not tile the packet
+    def join(self):
+        parts = []
+        offset = 0
+        while offset < self.total:
+            data_S = self.segment_D.get(offset)
+            if not data_S:
+                return None  # hole, or overlapping segments
+            parts.append(data_S)
+            offset += len(data_S)
+        if parts and isinstance(parts[0], str):
+            return ''.join(parts)
+        return b''.join(parts)
+
+
+## Reassembles packets from their segments, keyed by (src, dst, packet id)
+# Segments are indexed by offset, so a packet is joined in O(segments) once
+# its last segment (flag 0) has arrived and all holes are filled. Incomplete
+# packets are evicted after a timeout or when the buffered data exceeds a
+# memory budget, oldest first.
+class Reassembler:
+
+    ##@param timeout: seconds an incomplete packet is kept after its first segment arrived
+    # @param max_bytes: budget for the data of incomplete packets
+    # @param clock: time source, e.g. the virtual clock of an event driven simulation
+    def __init__(self, timeout=30, max_bytes=1 << 20, clock=time.monotonic):
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.pending_D = OrderedDict()  # {(src, dst, id): PartialPacket}, oldest first
+        self.buffered = 0  # data held by incomplete packets
+        self.evicted = 0  # number of incomplete packets dropped
+
+    ## called when printing the object
+    def __str__(self):
+        return 'Reassembler'
+
+    ## add a received segment
+    # @param p: NetworkPacket segment
+    # @return the data of the whole packet once complete, otherwise None
+    def add(self, p):
+        now = self.clock()
+        self.expire(now)
+        key = (p.src_addr, p.dst_addr, p.pkt_id)
+        partial = self.pending_D.get(key)
+        if partial is None:
+            if p.flag == 0 and p.offset == 0:
+                return p.data_S  # not segmented
+            partial = self.pending_D[key] = PartialPacket(now)
+        if p.offset in partial.segment_D:
+            return None  # duplicate
+        partial.segment_D[p.offset] = p.data_S
+        partial.received += len(p.data_S)
+        self.buffered += len(p.data_S)
+        if p.flag == 0:
+            partial.total = p.offset + len(p.data_S)
+        if partial.total is not None and partial.received >= partial.total:
+            data_S = partial.join()
+            if data_S is not None:
+                self.discard(key)
+                return data_S
+        while self.buffered > self.max_bytes and self.pending_D:
+            self.discard(next(iter(self.pending_D)))
+            self.evicted += 1
+        return None
+
+    ## drop incomplete packets whose first segment is older than the timeout
+    # @param now: current time, read from the clock if None
+    def expire(self, now=None):
+        if now is None:
+            now = self.clock()
+        while self.pending_D:
+            key, partial = next(iter(self.pending_D.items()))
+            if now - partial.first_time < self.timeout:
+                return
+            self.discard(key)
+            self.evicted += 1
+
+    ## forget a packet and release its buffered data
+    def discard(self, key):
+        partial = self.pending_D.pop(key)
+        self.buffered -= partial.received
@@ -1,24 +1,32 @@
+import eventlog
 import link3
 import network3
 import threading
+import sys
 from time import sleep
+from event_sim import Simulator
 
 ##configuration parameters
 
 
 router_queue_size = 0  # 0 means unlimited
+router_batch_size = 8  # max packets a router drains from each interface per pass
 simulation_time = 40  # give the network sufficient time to transfer all packets before quitting
+event_driven = '--des' in sys.argv  # run on the discrete-event engine instead of threads
+wire_format = 'binary' if '--binary' in sys.argv else 'string'  # encoding of packets on the links
+log_level = eventlog.OFF if '--quiet' in sys.argv else eventlog.DEBUG if '--verbose' in sys.argv else eventlog.INFO  # OFF, ERROR, INFO or DEBUG
 
 if __name__ == '__main__':
+    eventlog.set_level(log_level)
     object_L = []  # keeps track of objects, so we can kill their threads
 
     # create network nodes
     # These are changed to correspond with the files for part 2 of the assignment
     # adding addresses to them for routing tables
-    host_1 = network3.Host(1271)
-    host_2 = network3.Host(1272)
-    host_3 = network3.Host(1291)
-    host_4 = network3.Host(1292)
+    host_1 = network3.Host(1271, wire_format)
+    host_2 = network3.Host(1272, wire_format)
+    host_3 = network3.Host(1291, wire_format)
+    host_4 = network3.Host(1292, wire_format)
     # adding hosts to the object list
     object_L.append(host_1)
     object_L.append(host_2)
@@ -26,16 +34,16 @@ if __name__ == '__main__':
     object_L.append(host_4)
 
     # setting up router network
-    router_a = network3.Router(name='A', intf_count=2, max_queue_size=router_queue_size)
-    router_b = network3.Router(name='B', intf_count=1, max_queue_size=router_queue_size)
-    router_c = network3.Router(name='C', intf_count=1, max_queue_size=router_queue_size)
-    router_d = network3.Router(name='D', intf_count=2, max_queue_size=router_queue_size)
+    router_a = network3.Router(name='A', intf_count=2, max_queue_size=router_queue_size, batch_size=router_batch_size)
+    router_b = network3.Router(name='B', intf_count=1, max_queue_size=router_queue_size, batch_size=router_batch_size)
+    router_c = network3.Router(name='C', intf_count=1, max_queue_size=router_queue_size, batch_size=router_batch_size)
+    router_d = network3.Router(name='D', intf_count=2, max_queue_size=router_queue_size, batch_size=router_batch_size)
 
     # adding routing information to tables
-    router_a.addToTable((1271, 0))
-    router_a.addToTable((1272, 1))
-    router_d.addToTable((0, 1291))
-    router_d.addToTable((1, 1292))
+    router_a.addToTable((1271, 0), 'src')  # source based: (src_addr, out_intf)
+    router_a.addToTable((1272, 1), 'src')
+    router_d.addToTable((0, 1291), 'dst')  # destination based: (out_intf, dst_addr)
+    router_d.addToTable((1, 1292), 'dst')
 
     # adding routers to the object list
     object_L.append(router_a)
@@ -60,6 +68,27 @@ if __name__ == '__main__':
     # tier 4
     link_layer.add_link(link3.Link(router_d, 0, host_3, 0, 30))
 
+    # the messages sent by the hosts, ten (real or virtual) seconds apart
+    send_L = [(host_1, 1291, ' Sample data for host 3 from host 1'),
+              (host_1, 1292, ' Sample data for host 4 from host 1'),
+              (host_2, 1291, ' Sample data for host 3 from host 2'),
+              (host_2, 1292, ' Sample data for host 4 from host 2')]
+
+    if event_driven:
+        # nodes and links only run when a packet arrives, on a virtual clock
+        sim = Simulator()
+        for o in object_L:
+            if o is link_layer:
+                sim.add_link_layer(link_layer)
+            else:
+                sim.add_node(o)
+        for i, (host, dst_addr, data_S) in enumerate(send_L):
+            sim.schedule(10 * i, host.udt_send, dst_addr, data_S, link_layer.link_L[1].in_intf.mtu)
+        sim.run()
+        eventlog.flush()
+        print("Simulation finished at virtual time %.1f after %d events" % (sim.now, sim.events_processed))
+        sys.exit(0)
+
     # start all the objects
     thread_L = [threading.Thread(name=host_1.__str__(), target=host_1.run),
                 threading.Thread(name=host_2.__str__(), target=host_2.run),
@@ -75,23 +104,14 @@ if __name__ == '__main__':
         t.start()
 
     # create some send events
-    for i in range(1):  # sending the two host's messages
-        host_1.udt_send(1291, ' Sample data for host 3 from host 1', link_layer.link_L[1].in_intf.mtu)
-        sleep(10)
-        print("____________")
-        print("__breaks__")
-        print("____________")
-        host_1.udt_send(1292, ' Sample data for host 4 from host 1', link_layer.link_L[1].in_intf.mtu)
-        sleep(10)
-        print("____________")
-        print("__breaks__")
-        print("____________")
-        host_2.udt_send(1291, ' Sample data for host 3 from host 2', link_layer.link_L[1].in_intf.mtu)
-        sleep(10)
-        print("____________")
-        print("__breaks__")
-        print("____________")
-        host_2.udt_send(1292, ' Sample data for host 4 from host 2', link_layer.link_L[1].in_intf.mtu)
+    for i, (host, dst_addr, data_S) in enumerate(send_L):  # sending the two host's messages
+        if i > 0:
+            sleep(10)
+            eventlog.flush()
+            print("____________")
+            print("__breaks__")
+            print("____________")
+        host.udt_send(dst_addr, data_S, link_layer.link_L[1].in_intf.mtu)
 
     # give the network sufficient time to transfer all packets before quitting
     sleep(simulation_time)
@@ -102,4 +122,5 @@ if __name__ == '__main__':
     for t in thread_L:
         t.join()
 
+    eventlog.flush()
     print("All simulation threads joined")
@@ -0,0 +1,76 @@
+import unittest
+from event_sim import Simulator
+
+
+## A node that records the virtual times it runs at and asks to run again after a delay
+class TickNode:
+
+    def __init__(self, delay=None, count=0):
+        self.delay = delay
+        self.count = count  # runs left that ask to run again
+        self.run_L = []
+        self.clock = None
+        self.wakeup = None
+
+    def attach_wakeup(self, callback):
+        self.wakeup = callback
+
+    def step(self):
+        self.run_L.append(self.clock())
+        if self.count > 0:
+            self.count -= 1
+            return self.clock() + self.delay
+        return None
+
+
+class SimulatorTest(unittest.TestCase):
+
+    def test_events_run_in_time_order_and_fifo_on_ties(self):
+        sim = Simulator()
+        event_L = []
+        sim.schedule(2, event_L.append, 'late')
+        sim.schedule(1, event_L.append, 'first')
+        sim.schedule(1, event_L.append, 'second')
+        sim.schedule_at(-5, event_L.append, 'past')  # clamped to now
+        self.assertEqual(sim.run(), 2)
+        self.assertEqual(event_L, ['past', 'first', 'second', 'late'])
+        self.assertEqual(sim.events_processed, 4)
+
+    def test_run_until(self):
+        sim = Simulator()
+        event_L = []
+        for t in (1, 2, 3):
+            sim.schedule(t, event_L.append, t)
+        sim.run(until=2)
+        self.assertEqual(event_L, [1, 2])
+        self.assertEqual(sim.clock(), 2)
+        sim.run()
+        self.assertEqual(event_L, [1, 2, 3])
+
+    def test_node_reschedules_itself_on_the_virtual_clock(self):
+        sim = Simulator()
+        node = TickNode(delay=0.5, count=3)
+        sim.add_node(node)
+        sim.run()
+        self.assertEqual(node.run_L, [0, 0.5, 1.0, 1.5])
+
+    def test_wakeups_are_coalesced(self):
+        sim = Simulator()
+        node = TickNode()
+        sim.add_node(node)
+        sim.run()
+        sim.wake(node.step, 3)
+        sim.wake(node.step, 2)  # supersedes the wakeup at 3
+        sim.run()
+        self.assertEqual(node.run_L, [0, 2])
+        # packets arriving together run the node once, and a node that ran drops the later wakeup
+        # it was given before, as step() returns the time it needs itself
+        sim.wake(node.step, 5)
+        sim.schedule(1, node.wakeup)
+        sim.schedule(1, node.wakeup)
+        sim.run()
+        self.assertEqual(node.run_L, [0, 2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
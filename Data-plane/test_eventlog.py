@@ -0,0 +1,76 @@
+import io
+import threading
+import unittest
+from contextlib import redirect_stdout
+import eventlog
+
+
+class EventLogTest(unittest.TestCase):
+
+    def setUp(self):
+        eventlog.flush()
+        self.log = eventlog.get_log('test')
+        self.log.set_level(eventlog.DEBUG)
+        # the background writer may flush at any time, so everything written goes to one buffer
+        self.out = io.StringIO()
+        redirect = redirect_stdout(self.out)
+        redirect.__enter__()
+        self.addCleanup(redirect.__exit__, None, None, None)
+        self.read = 0
+
+    ## the lines written since the last call, after a flush of the buffered events
+    def flushed(self):
+        eventlog.flush()
+        text = self.out.getvalue()
+        line_L = text[self.read:].splitlines()
+        self.read = len(text)
+        return line_L
+
+    def test_events_are_formatted_at_flush_in_sequence_order(self):
+        self.log.info('%s: %d', 'first', 1)
+        thread = threading.Thread(target=self.log.error, args=('second',))
+        thread.start()
+        thread.join()
+        self.log.debug('third %s', [3])
+        self.assertEqual(self.flushed(), ['first: 1', 'second', 'third [3]'])
+        self.assertEqual(self.flushed(), [])
+
+    def test_arguments_are_formatted_when_flushed(self):
+        item_L = []
+        self.log.info('%s', item_L)
+        self.log.info('%s', str(item_L))
+        item_L.append(1)
+        self.assertEqual(self.flushed(), ['[1]', '[]'])
+
+    def test_levels(self):
+        self.log.set_level(eventlog.ERROR)
+        self.log.info('dropped')
+        self.log.error('kept')
+        self.assertFalse(self.log.enabled(eventlog.INFO))
+        with eventlog.quiet('test'):
+            self.log.error('silenced')
+        self.log.error('kept again')
+        self.assertEqual(self.flushed(), ['kept', 'kept again'])
+        self.assertEqual(self.log.level, eventlog.ERROR)
+
+    ## log ten events from a new thread, without the writer flushing part of them
+    def log_ten(self):
+        eventlog.thread_buffer()
+        with eventlog.buffer_lock:
+            for k in range(10):
+                self.log.info('%d', k)
+
+    def test_ring_keeps_the_newest_events(self):
+        ring_size = eventlog.ring_size
+        eventlog.ring_size = 4
+        try:
+            thread = threading.Thread(target=self.log_ten)
+            thread.start()
+            thread.join()
+        finally:
+            eventlog.ring_size = ring_size
+        self.assertEqual(self.flushed(), ['6', '7', '8', '9'])
+
+
+if __name__ == '__main__':
+    unittest.main()
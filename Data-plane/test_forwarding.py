@@ -0,0 +1,82 @@
+import io
+import os
+import unittest
+from contextlib import redirect_stdout
+import bench
+import eventlog
+import topology
+from fib import PrefixTable
+from network3 import Interface
+
+
+class PrefixTableTest(unittest.TestCase):
+
+    def test_longest_prefix_wins(self):
+        table = PrefixTable()
+        table.insert(1291, 'host')
+        table.insert(1291, 'short', prefix_len=24)
+        table.insert(0, 'default', prefix_len=0)
+        self.assertEqual(table.lookup(1291), 'host')
+        self.assertEqual(table.lookup(1292), 'short')
+        self.assertEqual(table.lookup(1 << 20), 'default')
+        self.assertEqual(len(table), 3)
+
+    def test_no_match(self):
+        table = PrefixTable()
+        table.insert(1271, 0)
+        self.assertIsNone(table.lookup(1272))
+        with self.assertRaises(ValueError):
+            table.insert(1271, 0, prefix_len=33)
+
+
+class InterfaceBatchTest(unittest.TestCase):
+
+    def test_batches_keep_order(self):
+        for maxsize in (0, 10):
+            intf = Interface(maxsize)
+            intf.put_batch(['a', 'b', 'c'])
+            intf.put('d')
+            self.assertEqual(intf.get_batch(3), ['a', 'b', 'c'])
+            self.assertEqual(intf.get_batch(3), ['d'])
+            self.assertEqual(intf.get_batch(3), [])
+
+
+class RouterTest(unittest.TestCase):
+
+    ## send data from host 1271 to each destination on the event engine
+    # @return (data received by host 1291, lines logged)
+    def send(self, dst_L, wire_format):
+        topo = topology.load(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'topology3.json'),
+                             wire_format=wire_format)
+        received_L = []
+        topo.node(1291).receive_callback = received_L.append
+        sim = bench.simulator(topo.object_L)
+        out = io.StringIO()
+        eventlog.set_level(eventlog.ERROR)
+        try:
+            with redirect_stdout(out):
+                for k, dst in enumerate(dst_L):
+                    sim.schedule(k, topo.node(1271).udt_send, dst, 'data for %d, long enough to be fragmented' % dst, 50)
+                sim.run()
+                eventlog.flush()
+        finally:
+            eventlog.set_level(eventlog.INFO)
+        return received_L, out.getvalue()
+
+    def test_delivery(self):
+        for wire_format in ('string', 'binary'):
+            received_L, log_S = self.send([1291], wire_format)
+            self.assertEqual(received_L, ['data for 1291, long enough to be fragmented'])
+            self.assertEqual(log_S, '')
+
+    def test_interface_without_link_drops_packets(self):
+        # router D routes host 1292 to its interface 1, which has no link in topology3.json
+        for wire_format in ('string', 'binary'):
+            received_L, log_S = self.send([1292, 1291], wire_format)
+            self.assertEqual(received_L, ['data for 1291, long enough to be fragmented'])
+            self.assertIn('Router_D: no link on interface 1, dropping packet', log_S)
+            self.assertNotIn('Error', log_S)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+from network3 import NetworkPacket
+from reassembly import Reassembler
+
+
+class StringSegmentationTest(unittest.TestCase):
+
+    ## fragment a packet, parse every segment back from the string encoding and reassemble it
+    def round_trip(self, data_S, mtu, pkt_id=0):
+        pkt_S = NetworkPacket(1271, 1291, data_S, pkt_id=pkt_id).to_byte_SSegment()
+        segment_L = [NetworkPacket.segment_from_byte_S(p.to_byte_SSegment()) for p in NetworkPacket.from_byte_S(pkt_S, mtu)]
+        reassembler = Reassembler()
+        result_L = [reassembler.add(p) for p in segment_L]
+        self.assertEqual([p.offset for p in segment_L], list(range(0, len(data_S), mtu - NetworkPacket.header_length)))
+        self.assertEqual(result_L[:-1], [None] * (len(segment_L) - 1))
+        return result_L[-1]
+
+    def test_long_payload(self):
+        data_S = ''.join(chr(ord('a') + k % 26) for k in range(300))
+        self.assertEqual(self.round_trip(data_S, 50), data_S)
+
+    def test_payloads_of_100_characters_and_more(self):
+        for length in (100, 101, 1000, 5000):
+            data_S = ''.join(str(k % 10) for k in range(length))
+            self.assertEqual(self.round_trip(data_S, 30), data_S)
+
+    def test_large_packet_id(self):
+        data_S = 'x' * 120
+        self.assertEqual(self.round_trip(data_S, 50, pkt_id=10 ** NetworkPacket.id_S_length - 1), data_S)
+
+    def test_overflow(self):
+        with self.assertRaises(ValueError):
+            NetworkPacket(1271, 1291, 'x', offset=10 ** NetworkPacket.offset_S_length).to_byte_SSegment()
+        with self.assertRaises(ValueError):
+            NetworkPacket(1271, 1291, 'x', pkt_id=10 ** NetworkPacket.id_S_length).to_byte_SSegment()
+
+
+if __name__ == '__main__':
+    unittest.main()
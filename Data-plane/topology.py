@@ -0,0 +1,136 @@
+'''
+Declarative topologies for the part 3 network.
+
+A topology file (JSON, or YAML when PyYAML is installed) lists the hosts,
+the routers with their forwarding tables and the links with their MTUs:
+
+    {"hosts": [{"addr": 1271}, ...],
+     "routers": [{"name": "A", "intf_count": 2,
+                  "routes": [{"addr": 1271, "intf": 0, "policy": "src"}, ...]}, ...],
+     "links": [{"from": ["1271", 0], "to": ["A", 0], "mtu": 50}, ...]}
+
+Links refer to hosts by their address and to routers by their name. Routes
+take an optional "prefix_len". Routers may override the queue size and the
+batch size given to load().
+
+usage: python topology.py FILE  (build FILE and report the time taken)
+       python topology.py --ring N FILE  (write a ring of N routers with a host each)
+'''
+
+import gc
+import json
+import sys
+import time
+import link3
+import network3
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+## A network built from a topology file
+class Topology:
+
+    def __init__(self):
+        self.host_D = {}  # {name: Host}
+        self.router_D = {}  # {name: Router}
+        self.link_layer = link3.LinkLayer()
+
+    ## called when printing the object
+    def __str__(self):
+        return 'Topology with %d hosts, %d routers and %d links' % (len(self.host_D), len(self.router_D), len(self.link_layer.link_L))
+
+    ## hosts, routers and the link layer, e.g. to start their threads
+    @property
+    def object_L(self):
+        return list(self.host_D.values()) + list(self.router_D.values()) + [self.link_layer]
+
+    ## look up a host or router by name
+    def node(self, name):
+        name = str(name)
+        node = self.host_D.get(name)
+        return node if node is not None else self.router_D[name]
+
+
+## read a topology description
+# @param path: .json file, or .yaml/.yml file if PyYAML is installed
+# @return the description as a dict
+def read(path):
+    with open(path) as f:
+        if path.endswith(('.yaml', '.yml')):
+            if yaml is None:
+                raise ImportError('PyYAML is required to read %s' % path)
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+## instantiate the network of a topology description
+# Routes are installed with Router.add_route and links are collected in one
+# list, so building does not log per object. The garbage collector is paused
+# meanwhile, as the many interface queues would trigger repeated collections.
+# @param spec: topology description, see the module documentation
+# @param wire_format: encoding of packets sent by the hosts
+# @param max_queue_size: default queue length of router interfaces, 0 means unlimited
+# @param batch_size: default number of packets a router drains from each interface per pass
+def build(spec, wire_format='string', max_queue_size=0, batch_size=1):
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return build_objects(spec, wire_format, max_queue_size, batch_size)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+## instantiate the objects of a topology description, called by build()
+def build_objects(spec, wire_format, max_queue_size, batch_size):
+    topo = Topology()
+    for h in spec.get('hosts', []):
+        topo.host_D[str(h['addr'])] = network3.Host(h['addr'], h.get('wire_format', wire_format))
+    for r in spec.get('routers', []):
+        router = network3.Router(r['name'], r['intf_count'], r.get('max_queue_size', max_queue_size),
+                                 r.get('batch_size', batch_size), r.get('fairness_cap'))
+        for route in r.get('routes', []):
+            router.add_route(route['addr'], route['intf'], route.get('policy', 'dst'), route.get('prefix_len'))
+        topo.router_D[str(r['name'])] = router
+    node = topo.node
+    topo.link_layer.link_L = [link3.Link(node(l['from'][0]), l['from'][1], node(l['to'][0]), l['to'][1], l['mtu'])
+                              for l in spec.get('links', [])]
+    return topo
+
+
+## read and instantiate a topology file, see build() for the options
+def load(path, **option_D):
+    return build(read(path), **option_D)
+
+
+## describe a ring of routers, each with one host attached
+# Router i forwards packets for its own host to it and everything else to router i+1.
+# @param router_count: number of routers, and of hosts
+# @param mtu: MTU of every link
+def ring(router_count, mtu=50):
+    first_addr = 1000
+    host_L = [{'addr': first_addr + i} for i in range(router_count)]
+    router_L = [{'name': 'R%d' % i, 'intf_count': 2,
+                 'routes': [{'addr': first_addr + i, 'intf': 1},
+                            {'addr': 0, 'intf': 0, 'prefix_len': 0}]}
+                for i in range(router_count)]
+    link_L = []
+    for i in range(router_count):
+        link_L.append({'from': [str(first_addr + i), 0], 'to': ['R%d' % i, 1], 'mtu': mtu})
+        link_L.append({'from': ['R%d' % i, 1], 'to': [str(first_addr + i), 0], 'mtu': mtu})
+        link_L.append({'from': ['R%d' % i, 0], 'to': ['R%d' % ((i + 1) % router_count), 0], 'mtu': mtu})
+    return {'hosts': host_L, 'routers': router_L, 'links': link_L}
+
+
+if __name__ == '__main__':
+    if sys.argv[1] == '--ring':
+        with open(sys.argv[3], 'w') as f:
+            json.dump(ring(int(sys.argv[2])), f)
+    else:
+        spec = read(sys.argv[1])
+        start = time.perf_counter()
+        topo = build(spec)
+        print('%s built in %.3f seconds' % (topo, time.perf_counter() - start))
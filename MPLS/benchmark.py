@@ -0,0 +1,55 @@
+import bench
+import eventlog
+import topology
+
+## drives packets over the two label switched paths of the part 3 network and reports JSON
+# usage: python benchmark.py [-n packets] [--payload bytes] [--des] [--binary]
+
+##configuration parameters
+router_queue_size = 0 #0 means unlimited
+router_batch_size = 8 #max frames a router drains from each interface per pass
+link_capacity = 10**9 #bps of every interface, so that forwarding rather than serialization is measured; None keeps the capacities of simulation_3.py
+
+
+## build the network of simulation_3.py from topology_3.json
+# @param wire_format: encoding of frames on the links
+# @return (list of network objects, list of (source host, destination, priority))
+def build(wire_format):
+    topo = topology.load('topology_3.json', wire_format=wire_format, max_queue_size=router_queue_size,
+                         batch_size=router_batch_size)
+    if link_capacity is not None:
+        for node in list(topo.host_D.values()) + list(topo.router_D.values()):
+            for intf in node.intf_L:
+                intf.capacity = link_capacity
+    # host 1 sends on the high priority path over RC, host 2 on the low priority one over RB
+    flow_L = [(topo.node('H1'), 'H3', 1), (topo.node('H2'), 'H3', 0)]
+    return topo.object_L, flow_L
+
+
+if __name__ == '__main__':
+    args = bench.parse_args('Throughput and latency of the MPLS part 3 network')
+    eventlog.set_level(eventlog.INFO if args.log else eventlog.OFF)
+    wire_format = 'binary' if args.binary else 'string'
+    object_L, flow_L = build(wire_format)
+    recorder = bench.Recorder()
+    for o in object_L:
+        if hasattr(o, 'receive_callback'):
+            o.receive_callback = recorder.deliver
+
+    ## send packet seq, alternating between the flows
+    def send(seq):
+        host, dst, priority = flow_L[seq % len(flow_L)]
+        host.udt_send(dst, recorder.payload(seq, args.payload), priority)
+
+    config_D = {'mode': 'des' if args.des else 'threads', 'wire_format': wire_format, 'payload': args.payload,
+                'link_capacity': link_capacity}
+    if args.des:
+        sim = bench.simulator(object_L)
+        result_D = bench.measure('MPLS', lambda: bench.run_des(sim, send, args.packets), recorder, config_D)
+    else:
+        thread_L = bench.start_threads(object_L)
+        run = lambda: bench.run_threads(send, recorder, args.packets, args.window, args.timeout)
+        result_D = bench.measure('MPLS', run, recorder, config_D)
+        bench.stop_threads(object_L, thread_L)
+    eventlog.flush()
+    bench.report(result_D)
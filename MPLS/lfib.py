@@ -0,0 +1,108 @@
+## label forwarding actions
+SWAP = 0  # replace the top label with the out labels
+POP = 1  # remove the top label, the packet leaves unlabeled if it was the last
+PUSH = 2  # put the out labels on top of the stack, e.g. on a packet entering the MPLS network
+## actions by their names in forwarding tables
+action_D = {'swap': SWAP, 'pop': POP, 'push': PUSH}
+## number of MPLS labels, labels are 20 bit integers
+label_count = 1 << 20
+
+
+## the integer value of a label from a forwarding table
+# @param label: int, or str of digits
+def label_value(label):
+    value = int(label)
+    if not 0 <= value < label_count:
+        raise ValueError('label %s is not a 20 bit label' % label)
+    return value
+
+
+## the labels of a forwarding table entry as a tuple, top first
+# @param label: a label, a list of labels (top first) or None
+def label_tuple(label):
+    if label is None:
+        return ()
+    if isinstance(label, (list, tuple)):
+        return tuple(label_value(l) for l in label)
+    return (label_value(label),)
+
+
+## Label forwarding information base (LFIB) of a router
+# Compiled from a forwarding table {in label: entry}. An entry is either
+# explicit, (action, out labels, out interface) with the action 'swap',
+# 'pop' or 'push' and the out labels a label, a list of labels (top first,
+# pushed together for hierarchical paths) or None, or in the original form
+# (out label, destination, out interface), in which an out label equal to
+# the destination pops the label and any other one swaps it.
+# Entries (out labels, action, out interface) are held in a list indexed by
+# the integer in label, preallocated up to the highest label of the table,
+# so that a frame is resolved with one lookup and no string handling. In
+# labels that are not numbers ("L", "H") name forwarding equivalence
+# classes: packets entering the MPLS network are assigned to them, and
+# their entries push labels. A class can be narrowed to one destination,
+# "L:H3", which takes precedence over the class for packets to it, e.g. for
+# the paths placed by te.py.
+# The LFIB also holds the routes of network packets that are forwarded
+# without labels, e.g. by an egress router after the penultimate hop popped
+# the last label: the destinations of the original pop entries, and any
+# routes given.
+class LFIB:
+
+    ##@param frwd_tbl_D: forwarding table {in label: entry}
+    # @param route_D: network routes {destination: out interface}
+    def __init__(self, frwd_tbl_D, route_D=None):
+        self.fec_D = {}  # {class name: (out labels, PUSH, out interface)}
+        self.dst_fec_D = {}  # {(class name, destination): (out labels, PUSH, out interface)}
+        self.route_D = {}  # {destination: out interface}
+        label_D = {}  # {in label: (out labels, action, out interface)}
+        for in_label, (out, dst, out_intf) in frwd_tbl_D.items():
+            if out in action_D:
+                action = action_D[out]
+                entry = (label_tuple(dst), action, out_intf)
+                if action != POP and not entry[0]:
+                    raise ValueError('%s entry of label %s has no out label' % (out, in_label))
+            elif out == dst:
+                entry = ((), POP, out_intf)
+                self.route_D[dst] = out_intf
+            else:
+                entry = (label_tuple(out), SWAP, out_intf)
+            if isinstance(in_label, str) and not in_label.isdigit():
+                fec, _, dst = in_label.partition(':')
+                entry = entry if entry[1] == POP else (entry[0], PUSH, out_intf)
+                if dst:
+                    self.dst_fec_D[(fec, dst)] = entry
+                else:
+                    self.fec_D[fec] = entry
+            else:
+                label_D[label_value(in_label)] = entry
+        self.route_D.update(route_D or {})
+        self.entry_L = [None] * (max(label_D, default=-1) + 1)  # entries indexed by in label, None for none
+        for in_label, entry in label_D.items():
+            self.entry_L[in_label] = entry
+
+    ## called when printing the object
+    def __str__(self):
+        return 'LFIB with %d labels, %d classes and %d routes' % (
+            sum(e is not None for e in self.entry_L), len(self.fec_D) + len(self.dst_fec_D), len(self.route_D))
+
+    ## the entry of an in label
+    # @return (out labels, action, out interface), or None if the label has no entry
+    def lookup(self, label):
+        entry_L = self.entry_L
+        return entry_L[label] if 0 <= label < len(entry_L) else None
+
+    ## the entry of a forwarding equivalence class at the ingress
+    # @param fec: class name
+    # @param dst: destination of the packet, its own entry in the class is preferred
+    # @return (out labels, PUSH or POP, out interface), or None if the class has no entry
+    def lookup_fec(self, fec, dst=None):
+        if self.dst_fec_D:
+            entry = self.dst_fec_D.get((fec, dst))
+            if entry is not None:
+                return entry
+        return self.fec_D.get(fec)
+
+    ## the interface of the network route to a destination
+    # @return the out interface, or None without a route
+    def lookup_route(self, dst):
+        return self.route_D.get(dst)
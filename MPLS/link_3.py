@@ -1,12 +1,21 @@
 import queue
+import struct
 import threading
 import time
+from event_sim import Readiness
+import eventlog
+
+link_log = eventlog.get_log('link')
 
 ## Implements a link layer frame
 # Needed to tell the network layer the type of the payload
 class LinkFrame:
     ## packet encoding lengths
     type_S_length = 1
+    ## binary encoding: a one byte type code followed by the payload
+    header = struct.Struct('!c')
+    type_code_D = {'MPLS': b'M', 'Network': b'N'}
+    type_name_D = {b'M': 'MPLS', b'N': 'Network'}
 
     ##@param type_S: type of packet in the frame - what higher layer should handle it
     # @param data_S: frame payload
@@ -16,7 +25,9 @@ class LinkFrame:
 
     ## called when printing the object
     def __str__(self):
-        return self.to_byte_S()
+        if isinstance(self.data_S, str):
+            return self.to_byte_S()
+        return str(self.to_bytes())
 
     ## convert frame to a byte string for transmission over links
     def to_byte_S(self):
@@ -44,6 +55,37 @@ class LinkFrame:
         data_S = byte_S[self.type_S_length: ]
         return self(type_S, data_S)
 
+    ## convert frame to bytes using the binary encoding
+    def to_bytes(self):
+        if self.type_S not in self.type_code_D:
+            raise Exception('%s: unknown type_S option: %s' % (self, self.type_S))
+        data = self.data_S
+        if isinstance(data, str):
+            data = data.encode()
+        return self.header.pack(self.type_code_D[self.type_S]) + data
+
+    ## extract a frame object from its binary encoding
+    # @param data: bytes representation of the frame
+    @classmethod
+    def from_bytes(self, data):
+        (code,) = self.header.unpack_from(data)
+        if code not in self.type_name_D:
+            raise Exception('%s: unknown type code: %s' % (self, code))
+        return self(self.type_name_D[code], bytes(data[self.header.size:]))
+
+    ## convert frame for transmission
+    # @param binary: use the binary encoding instead of the string one
+    def to_wire(self, binary):
+        return self.to_bytes() if binary else self.to_byte_S()
+
+    ## extract a frame object from either encoding
+    # @param frame: str (string encoding) or bytes (binary encoding)
+    @classmethod
+    def from_wire(self, frame):
+        if isinstance(frame, str):
+            return self.from_byte_S(frame)
+        return self.from_bytes(frame)
+
 
 
 ## An abstraction of a link between router interfaces
@@ -59,48 +101,72 @@ class Link:
         self.node_1_intf = node_1_intf
         self.node_2 = node_2
         self.node_2_intf = node_2_intf
-        print('Created link %s' % self.__str__())
+        self.clock = time.time #source of the current time, replaced by a virtual clock when event driven
+        self.in_flight_L = [None, None] #(frame, time its transmission completes) in each direction, None when idle
+        link_log.info('Created link %s', self)
 
     ## called when printing the object
     def __str__(self):
         return 'Link %s-%d - %s-%d' % (self.node_1, self.node_1_intf, self.node_2, self.node_2_intf)
 
     ##transmit a packet between interfaces in each direction
+    # A frame takes its size over the capacity of the sending interface to be
+    # serialized: it arrives at the other end when its transmission completes,
+    # and the direction is busy until then.
     def tx_pkt(self):
-        for (node_a, node_a_intf, node_b, node_b_intf) in \
-        [(self.node_1, self.node_1_intf, self.node_2, self.node_2_intf),
-         (self.node_2, self.node_2_intf, self.node_1, self.node_1_intf)]:
+        now = self.clock()
+        for direction, (node_a, node_a_intf, node_b, node_b_intf) in \
+        enumerate([(self.node_1, self.node_1_intf, self.node_2, self.node_2_intf),
+                   (self.node_2, self.node_2_intf, self.node_1, self.node_1_intf)]):
             intf_a = node_a.intf_L[node_a_intf]
             intf_b = node_b.intf_L[node_b_intf]
+            in_flight = self.in_flight_L[direction]
+            if in_flight is not None:
+                if in_flight[1] > now:
+                    continue #still serializing the previous frame
+                #the transmission completed, the frame arrives
+                self.in_flight_L[direction] = None
+                try:
+                    intf_b.put(in_flight[0], 'in')
+                except queue.Full:
+                    link_log.error('%s: packet lost', self)
             if intf_a.out_queue.empty():
                 continue #continue if no packet to transfer
-            #otherwise try transmitting the packet
-            try:
-                #check if the interface is free to transmit a packet
-                if intf_a.next_avail_time <= time.time():
-
-                    #transmit the packet
-                    pkt_S = intf_a.get('out')
-                    intf_b.put(pkt_S, 'in')
-                    #update the next free time of the interface according to serialization delay
-                    pkt_size = len(pkt_S)*8 #assuming each character is 8 bits
-                    intf_a.next_avail_time = time.time() + pkt_size/intf_a.capacity
-                    print('%s: transmitting frame "%s" on %s %s -> %s %s \n' \
-                          ' - seconds until the next available time %f\n' \
-                          ' - queue size %d' \
-                          % (self, pkt_S, node_a, node_a_intf, node_b, node_b_intf, intf_a.next_avail_time - time.time(), intf_a.out_queue.qsize()))
-                if intf_a.out_queue.qsize() != 0:
-                    print("\n ######### Queue for %s######## \n" % self.node_1)
-                    for pkt in intf_a.out_queue.queue:
-                        print("Packet with Priority: ",pkt[-1])
-                    print('\n#-----------------#\n')
-
-                # uncomment the lines below to see waiting time until next transmission
-#                 else:
-#                     print('%s: waiting to transmit packet on %s %s -> %s, %s for another %f milliseconds' % (self, node_a, node_a_intf, node_b, node_b_intf, intf_a.next_avail_time - time.time()))
-            except queue.Full:
-                print('%s: packet lost' % (self))
-                pass
+            #transmit the packet, it arrives once serialized
+            pkt_S = intf_a.get('out')
+            pkt_size = len(pkt_S)*8 #assuming each character is 8 bits
+            intf_a.next_avail_time = now + pkt_size/intf_a.capacity
+            self.in_flight_L[direction] = (pkt_S, intf_a.next_avail_time)
+            link_log.info('%s: transmitting frame "%s" on %s %s -> %s %s \n'
+                          ' - seconds until the next available time %f\n'
+                          ' - queue size %d',
+                          self, pkt_S, node_a, node_a_intf, node_b, node_b_intf, intf_a.next_avail_time - now, intf_a.out_queue.qsize())
+            if intf_a.out_queue.qsize() != 0 and link_log.enabled(eventlog.DEBUG):
+                line_L = ["\n ######### Queue for %s######## \n" % self.node_1]
+                for pkt in intf_a.out_queue.queue:
+                    line_L.append("Packet with Priority:  %s" % pkt[-1])
+                line_L.append('\n#-----------------#\n')
+                link_log.debug('\n'.join(line_L))
+
+    ## register a callback to be notified when a packet is queued for this link
+    # Egress schedulers of the interfaces also time their queues on the clock of the link.
+    # @param callback: function without arguments, e.g. an event scheduler wakeup
+    def attach_wakeup(self, callback):
+        for intf in (self.node_1.intf_L[self.node_1_intf], self.node_2.intf_L[self.node_2_intf]):
+            intf.out_wakeup = callback
+            if hasattr(intf.out_queue, 'clock'):
+                intf.out_queue.clock = self.clock
+
+    ## event handler: deliver the frames whose transmission completed and start the next ones
+    # @return the time at which the next transmission completes, or None when idle
+    def step(self):
+        while True:
+            self.tx_pkt()
+            wait_L = [in_flight[1] for in_flight in self.in_flight_L if in_flight is not None]
+            if not wait_L:
+                return None
+            if min(wait_L) > self.clock():
+                return min(wait_L) #the completion event of the earliest transmission
 
 
 ## An abstraction of the link layer
@@ -126,11 +192,17 @@ class LinkLayer:
 
     ## thread target for the network to keep transmitting data across links
     def run(self):
-        print (threading.currentThread().getName() + ': Starting')
+        link_log.info('%s: Starting', threading.currentThread().getName())
+        ready = Readiness()
+        for link in self.link_L:
+            link.attach_wakeup(ready.notify)
         while True:
-            #transfer one packet on all the links
-            self.transfer()
+            #transfer the frames each link is free to send
+            wait_L = [link.step() for link in self.link_L]
             #terminate
             if self.stop:
-                print (threading.currentThread().getName() + ': Ending')
-                return
\ No newline at end of file
+                link_log.info('%s: Ending', threading.currentThread().getName())
+                return
+            #sleep until a frame is queued or a busy interface frees up
+            wait_L = [t for t in wait_L if t is not None]
+            ready.wait(min(wait_L) - time.time() if wait_L else None)
\ No newline at end of file
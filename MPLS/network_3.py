@@ -1,17 +1,28 @@
 import queue
+import struct
 import threading
 from link_3 import LinkFrame
+from event_sim import Readiness
+from lfib import LFIB, POP, PUSH, SWAP
+from scheduler import Scheduler
+import eventlog
+
+host_log = eventlog.get_log('host')
+router_log = eventlog.get_log('router')
 
 
 ## wrapper class for a queue of packets
 class Interface:
     ## @param maxsize - the maximum size of the queue storing packets
     #  @param capacity - the capacity of the link in bps
-    def __init__(self, maxsize=0, capacity=500):
+    #  @param scheduler - egress Scheduler used as the out queue, None for a FIFO
+    def __init__(self, maxsize=0, capacity=500, scheduler=None):
         self.in_queue = queue.Queue(maxsize)
-        self.out_queue = queue.Queue(maxsize)
+        self.out_queue = queue.Queue(maxsize) if scheduler is None else scheduler
         self.capacity = capacity #serialization rate
         self.next_avail_time = 0 #the next time the interface can transmit a packet
+        self.in_wakeup = None #callback notifying the node of a new incoming packet
+        self.out_wakeup = None #callback notifying the link of a new outgoing packet
 
     ##get packet from the queue interface
     # @param in_or_out - use 'in' or 'out' interface
@@ -38,9 +49,53 @@ class Interface:
         if in_or_out == 'out':
             # print('putting packet in the OUT queue')
             self.out_queue.put(pkt, block)
+            if self.out_wakeup is not None:
+                self.out_wakeup()
         else:
             # print('putting packet in the IN queue')
             self.in_queue.put(pkt, block)
+            if self.in_wakeup is not None:
+                self.in_wakeup()
+
+    ##get up to max_count packets from the queue interface at once
+    # Holds the queue.Queue lock once for the batch and pops from its deque, as queue.Queue.get() does per packet.
+    # @param in_or_out - use 'in' or 'out' interface
+    # @param max_count - the maximum number of packets to return
+    def get_batch(self, in_or_out, max_count):
+        q = self.in_queue if in_or_out == 'in' else self.out_queue
+        with q.mutex:
+            count = min(max_count, q._qsize())
+            if isinstance(q, Scheduler):
+                pkt_L = [q._get() for _ in range(count)]  # in the order of its policy
+            else:
+                pkt_L = [q.queue.popleft() for _ in range(count)]
+            if pkt_L:
+                q.not_full.notify(len(pkt_L))
+        return pkt_L
+
+    ##put several packets into the interface queue, notifying the consumer once
+    # Without a bound, appends to the deque of the queue.Queue under its lock and keeps its task count and
+    # condition as queue.Queue.put() does.
+    # @param pkt_L - Packets to be inserted into the queue in order
+    # @param in_or_out - use 'in' or 'out' interface
+    # @param block - if True, block until room in queue, if False may throw queue.Full exception
+    def put_batch(self, pkt_L, in_or_out, block=False):
+        q = self.in_queue if in_or_out == 'in' else self.out_queue
+        if q.maxsize > 0:
+            for pkt in pkt_L:  # respect the queue bound packet by packet
+                q.put(pkt, block)
+        else:
+            with q.mutex:
+                if isinstance(q, Scheduler):
+                    for pkt in pkt_L:
+                        q._put(pkt)
+                else:
+                    q.queue.extend(pkt_L)
+                q.unfinished_tasks += len(pkt_L)
+                q.not_empty.notify(len(pkt_L))
+        wakeup = self.out_wakeup if in_or_out == 'out' else self.in_wakeup
+        if wakeup is not None:
+            wakeup()
 
 
 ## Implements a network layer packet
@@ -49,6 +104,8 @@ class Interface:
 class NetworkPacket:
     ## packet encoding lengths
     dst_S_length = 5
+    ## binary encoding: priority and destination length, followed by the destination and payload
+    header = struct.Struct('!BB')
 
     ##@param dst: address of the destination host
     # @param data_S: packet payload
@@ -73,28 +130,90 @@ class NetworkPacket:
     # @param byte_S: byte string representation of the packet
     @classmethod
     def from_byte_S(self, byte_S):
-        dst = byte_S[0 : NetworkPacket.dst_S_length].strip('0')
+        dst = byte_S[0 : NetworkPacket.dst_S_length].lstrip('0')
         data_S = byte_S[NetworkPacket.dst_S_length : -1]
         priority = int(byte_S[-1])
         return self(dst, data_S, priority)
 
+    ## convert packet to bytes using the binary encoding
+    def to_bytes(self):
+        dst_B = str(self.dst).encode()
+        return self.header.pack(self.priority, len(dst_B)) + dst_B + self.data_S.encode()
+
+    ## extract a packet object from its binary encoding
+    # @param data: bytes representation of the packet
+    @classmethod
+    def from_bytes(self, data):
+        priority, dst_length = self.header.unpack_from(data)
+        dst_end = self.header.size + dst_length
+        dst = bytes(data[self.header.size : dst_end]).decode()
+        data_S = bytes(data[dst_end:]).decode()
+        return self(dst, data_S, priority)
+
+    ## convert packet for transmission
+    # @param binary: use the binary encoding instead of the string one
+    def to_wire(self, binary):
+        return self.to_bytes() if binary else self.to_byte_S()
 
+    ## extract a packet object from either encoding
+    # @param pkt: str (string encoding) or bytes (binary encoding)
+    @classmethod
+    def from_wire(self, pkt):
+        if isinstance(pkt, str):
+            return self.from_byte_S(pkt)
+        return self.from_bytes(pkt)
+
+
+## MPLS frame: a label stack and the encapsulated network packet
+# Every label stack entry holds a 20 bit label and a bottom of stack flag,
+# set on the last entry, so that a router can pop the top label without
+# parsing the rest of the stack.
 class MPLSFrame:
-    ## packet encoding lengths
-    label_S_length = 5
+    ## string encoding of a stack entry: the label in label_S_length digits, then '1' at the bottom of the stack or '0'
+    label_S_length = 7
+    entry_S_length = label_S_length + 1
+    ## binary encoding of a stack entry, 32 bits: label << 12 | bottom << 8
+    entry = struct.Struct('!I')
+    bottom = 0x100
 
     ##init class
-    def __init__(self, label, netPacket):
-        self.label = label
+    # @param label_L: label stack, top first, of 20 bit integer labels
+    # @param netPacket: encapsulated packet, a NetworkPacket or its encoding
+    def __init__(self, label_L, netPacket):
+        self.label_L = list(label_L)
         self.packet = netPacket
 
     ## called when printing the object
     def __str__(self):
+        if isinstance(self.packet, bytes):
+            return str(self.to_bytes())
         return self.to_byte_S()
 
+    ## top label of the stack
+    @property
+    def label(self):
+        return self.label_L[0]
+
+    ## encode label stack entries
+    # @param label_L: labels, top first
+    # @param bottom: whether the last label is the bottom of the stack
+    # @param binary: use the binary encoding instead of the string one
+    @classmethod
+    def encode_stack(self, label_L, bottom=True, binary=False):
+        if len(label_L) == 1:
+            if binary:
+                return self.entry.pack(label_L[0] << 12 | (self.bottom if bottom else 0))
+            return str(label_L[0]).zfill(self.label_S_length) + ('1' if bottom else '0')
+        last = len(label_L) - 1 if bottom else -1
+        if binary:
+            return b''.join(self.entry.pack(label << 12 | (self.bottom if k == last else 0))
+                            for k, label in enumerate(label_L))
+        return ''.join(str(label).zfill(self.label_S_length) + ('1' if k == last else '0')
+                       for k, label in enumerate(label_L))
+
     ## convert packet to a byte string for transmission over links
     def to_byte_S(self):
-        byte_S = str(self.label).zfill(self.label_S_length)
+        byte_S = self.encode_stack(self.label_L)
         byte_S += str(self.packet)
         return byte_S
 
@@ -102,19 +221,83 @@ class MPLSFrame:
     # @param byte_S: byte string representation of the packet
     @classmethod
     def from_byte_S(self, byte_S):
-        label = byte_S[0 : self.label_S_length].strip('0')
-        packet = byte_S[self.label_S_length:]
-        return self(label, packet)
+        label_L = []
+        start = 0
+        while True:
+            end = start + self.entry_S_length
+            label_L.append(int(byte_S[start : end - 1]))
+            start = end
+            if byte_S[end - 1] == '1':
+                break
+        packet = byte_S[start:]
+        return self(label_L, packet)
+
+    ## convert frame to bytes using the binary encoding
+    def to_bytes(self):
+        packet = self.packet
+        if isinstance(packet, NetworkPacket):
+            packet = packet.to_bytes()
+        return self.encode_stack(self.label_L, binary=True) + packet
+
+    ## extract a frame object from its binary encoding
+    # @param data: bytes representation of the frame
+    @classmethod
+    def from_bytes(self, data):
+        label_L = []
+        start = 0
+        while True:
+            (value,) = self.entry.unpack_from(data, start)
+            label_L.append(value >> 12)
+            start += self.entry.size
+            if value & self.bottom:
+                break
+        return self(label_L, bytes(data[start:]))
+
+    ## end of the binary encoding of a label stack
+    # @param data: bytes holding the encoding
+    # @param start: offset of the top of the stack in data
+    # @return offset of the encapsulated packet in data
+    @classmethod
+    def stack_end(self, data, start=0):
+        while not self.entry.unpack_from(data, start)[0] & self.bottom:
+            start += self.entry.size
+        return start + self.entry.size
+
+    ## convert frame for transmission
+    # @param binary: use the binary encoding instead of the string one
+    def to_wire(self, binary):
+        return self.to_bytes() if binary else self.to_byte_S()
+
+    ## extract a frame object from either encoding
+    # @param frame: str (string encoding) or bytes (binary encoding)
+    @classmethod
+    def from_wire(self, frame):
+        if isinstance(frame, str):
+            return self.from_byte_S(frame)
+        return self.from_bytes(frame)
+
+
+## traffic class of an encoded link frame, the priority of the network packet it carries
+# @param fr_S: link frame holding a network packet or an MPLS frame, str or bytes
+def frame_priority(fr_S):
+    if isinstance(fr_S, str):
+        return int(fr_S[-1]) #string packets end with their priority
+    if fr_S[0] == 77: #MPLS frame
+        return fr_S[MPLSFrame.stack_end(fr_S, LinkFrame.header.size)]
+    return fr_S[LinkFrame.header.size]
 
 
 ## Implements a network host for receiving and transmitting data
 class Host:
 
     ##@param addr: address of this node represented as an integer
-    def __init__(self, addr):
+    # @param wire_format: 'string' for the original encoding or 'binary' for the struct based one
+    def __init__(self, addr, wire_format='string'):
         self.addr = addr
         self.intf_L = [Interface()]
         self.stop = False #for thread termination
+        self.binary = wire_format == 'binary'
+        self.receive_callback = None #called with the data of every received packet, e.g. by a benchmark
 
     ## called when printing the object
     def __str__(self):
@@ -126,11 +309,11 @@ class Host:
     # @param priority: packet priority
     def udt_send(self, dst, data_S, priority=0):
         pkt = NetworkPacket(dst, data_S, priority)
-        print('%s: sending packet "%s" with priority %d' % (self, pkt, priority))
+        host_log.info('%s: sending packet "%s" with priority %d', self, pkt, priority)
         #encapsulate network packet in a link frame (usually would be done by the OS)
-        fr = LinkFrame('Network', pkt.to_byte_S())
+        fr = LinkFrame('Network', pkt.to_wire(self.binary))
         #enque frame onto the interface for transmission
-        self.intf_L[0].put(fr.to_byte_S(), 'out')
+        self.intf_L[0].put(fr.to_wire(self.binary), 'out')
 
     ## receive frame from the link layer
     def udt_receive(self):
@@ -138,21 +321,37 @@ class Host:
         if fr_S is None:
             return
         #decapsulate the network packet
-        fr = LinkFrame.from_byte_S(fr_S)
+        fr = LinkFrame.from_wire(fr_S)
         assert(fr.type_S == 'Network') #should be receiving network packets by hosts
-        pkt_S = fr.data_S
-        print('\n\n\n---%s: received packet "%s"\n\n\n' % (self, pkt_S))
+        pkt = NetworkPacket.from_wire(fr.data_S)
+        host_log.info('\n\n\n---%s: received packet "%s"\n\n\n', self, pkt)
+        if self.receive_callback is not None:
+            self.receive_callback(pkt.data_S)
+
+    ## register a callback to be notified when a packet arrives
+    # @param callback: function without arguments, e.g. an event scheduler wakeup
+    def attach_wakeup(self, callback):
+        self.intf_L[0].in_wakeup = callback
+
+    ## event handler: receive everything that has arrived
+    def step(self):
+        while not self.intf_L[0].in_queue.empty():
+            self.udt_receive()
 
     ## thread target for the host to keep receiving data
     def run(self):
-        print (threading.currentThread().getName() + ': Starting')
+        host_log.info('%s: Starting', threading.currentThread().getName())
+        ready = Readiness()
+        self.attach_wakeup(ready.notify)
         while True:
             #receive data arriving to the in interface
-            self.udt_receive()
+            self.step()
             #terminate
             if(self.stop):
-                print (threading.currentThread().getName() + ': Ending')
+                host_log.info('%s: Ending', threading.currentThread().getName())
                 return
+            #sleep until a frame arrives
+            ready.wait()
 
 
 
@@ -162,18 +361,31 @@ class Router:
     ##@param name: friendly router name for debugging
     # @param intf_capacity_L: capacities of outgoing interfaces in bps
     # @param encap_tbl_D: table used to encapsulate network packets into MPLS frames
-    # @param frwd_tbl_D: table used to forward MPLS frames
+    # @param frwd_tbl_D: table used to forward MPLS frames {in label: (action, out labels, out interface)}, see lfib.LFIB
     # @param decap_tbl_D: table used to decapsulate network packets from MPLS frames
     # @param max_queue_size: max queue length (passed to Interface)
-    def __init__(self, name, intf_capacity_L, encap_tbl_D, frwd_tbl_D, decap_tbl_D, max_queue_size):
+    # @param batch_size: max frames drained from each interface per pass
+    # @param fairness_cap: max frames processed per pass over all interfaces, None for no cap
+    # @param scheduler: egress scheduler factory of every interface, called with the queue size and
+    #     frame_priority (e.g. a Scheduler subclass or scheduler.factory()), None for FIFO interfaces
+    # @param rt_tbl_D: routes of network packets that are not encapsulated {destination: out interface},
+    #     e.g. on an egress router after penultimate hop popping
+    def __init__(self, name, intf_capacity_L, encap_tbl_D, frwd_tbl_D, decap_tbl_D, max_queue_size, batch_size=1, fairness_cap=None,
+                 scheduler=None, rt_tbl_D=None):
         self.stop = False #for thread termination
         self.name = name
+        self.batch_size = batch_size
+        self.fairness_cap = fairness_cap
+        self.first_intf = 0 #interface served first in the next pass, rotated for fairness
         #create a list of interfaces
-        self.intf_L = [Interface(max_queue_size, intf_capacity_L[i]) for i in range(len(intf_capacity_L))]
+        self.intf_L = [Interface(max_queue_size, intf_capacity_L[i],
+                                 None if scheduler is None else scheduler(max_queue_size, frame_priority))
+                       for i in range(len(intf_capacity_L))]
         #save MPLS tables
         self.encap_tbl_D = encap_tbl_D
         self.frwd_tbl_D = frwd_tbl_D
         self.decap_tbl_D = decap_tbl_D
+        self.lfib = LFIB(frwd_tbl_D, rt_tbl_D) #the forwarding table compiled for lookups by integer label
 
 
     ## called when printing the object
@@ -182,74 +394,217 @@ class Router:
 
     ## look through the content of incoming interfaces and
     # process data and control packets
+    # Up to batch_size frames are drained from each interface per pass, and the
+    # frames leaving on the same interface are enqueued together.
     def process_queues(self):
-        for i in range(len(self.intf_L)):
-            fr_S = None #make sure we are starting the loop with a blank frame
-            fr_S = self.intf_L[i].get('in') #get frame from interface i
-            if fr_S is None:
-                continue # no frame to process yet
-            #decapsulate the packet
-            fr = LinkFrame.from_byte_S(fr_S)
-            pkt_S = fr.data_S
-            #process the packet as network, or MPLS
-            if fr.type_S == "Network":
-                p = NetworkPacket.from_byte_S(pkt_S) #parse a packet out
-                self.process_network_packet(p, i)
-            elif fr.type_S == "MPLS":
-                m_fr = MPLSFrame.from_byte_S(pkt_S)
-                self.process_MPLS_frame(m_fr, i)
-            else:
-                raise('%s: unknown frame type: %s' % (self, m_fr.type))
+        intf_count = len(self.intf_L)
+        budget = self.fairness_cap
+        first = self.first_intf
+        self.first_intf = (first + 1) % intf_count
+        for i in [(first + n) % intf_count for n in range(intf_count)]:
+            batch_size = self.batch_size if budget is None else min(self.batch_size, budget)
+            if batch_size <= 0:
+                break
+            fr_L = self.intf_L[i].get_batch('in', batch_size) #get frames from interface i
+            if budget is not None:
+                budget -= len(fr_L)
+            out_D = {} #{outgoing interface: [frames]}
+            for fr_S in fr_L:
+                #forward in the encoding the frame arrived in
+                binary = not isinstance(fr_S, str)
+                #switch MPLS frames on their encoding, without parsing them
+                if fr_S[0] == (77 if binary else 'M'):
+                    self.switch_MPLS_frame(fr_S, i, binary, out_D)
+                    continue
+                #and network packets with a route, reading only their destination
+                if self.lfib.route_D and self.route_network_frame(fr_S, i, binary, out_D):
+                    continue
+                #decapsulate the packet
+                fr = LinkFrame.from_wire(fr_S)
+                pkt_S = fr.data_S
+                #process the packet as network, or MPLS
+                if fr.type_S == "Network":
+                    p = NetworkPacket.from_wire(pkt_S) #parse a packet out
+                    self.process_network_packet(p, i, binary, out_D)
+                elif fr.type_S == "MPLS":
+                    m_fr = MPLSFrame.from_wire(pkt_S)
+                    self.process_MPLS_frame(m_fr, i, binary, out_D)
+                else:
+                    raise('%s: unknown frame type: %s' % (self, m_fr.type))
+            for outInterface, out_L in out_D.items():
+                try:
+                    self.intf_L[outInterface].put_batch(out_L, 'out', True)
+                except queue.Full:
+                    router_log.error('%s: frames lost on interface %d', self, outInterface)
+                    pass
+
+    ## switch an encoded MPLS link frame on its top label
+    # The top label is read from and rewritten in the encoding, and the rest
+    # of the frame is passed on as it arrived, or as the payload of a network
+    # link frame when the bottom label is popped.
+    #  @param fr_S: link frame holding an MPLS frame, str or bytes
+    #  @param i Incoming interface number for the frame
+    #  @param binary: whether the frame uses the binary encoding
+    #  @param out_D: collects outgoing frames per interface
+    def switch_MPLS_frame(self, fr_S, i, binary, out_D):
+        if binary:
+            top = LinkFrame.header.size
+            start = top + MPLSFrame.entry.size
+            value = MPLSFrame.entry.unpack_from(fr_S, top)[0]
+            label = value >> 12
+            bottom = value & MPLSFrame.bottom
+        else:
+            top = LinkFrame.type_S_length
+            start = top + MPLSFrame.entry_S_length
+            label = int(fr_S[top : start - 1])
+            bottom = fr_S[start - 1] == '1'
+        entry = self.lfib.lookup(label)
+        if entry is None:
+            router_log.error('%s: no entry for label %d, frame "%s" dropped', self, label, fr_S)
+            return
+        out_label_L, action, outInterface = entry
+        if action == POP:
+            out_S = (b'N' if binary else 'N') + fr_S[start:] if bottom else fr_S[:top] + fr_S[start:]
+        else:
+            if action == PUSH:
+                start = top
+                bottom = False
+            out_S = fr_S[:top] + MPLSFrame.encode_stack(out_label_L, bottom, binary) + fr_S[start:]
+        out_D.setdefault(outInterface, []).append(out_S)
+        router_log.info('%s: forwarding frame "%s" from interface %d to %d', self, out_S, i, outInterface)
+
+    ## forward an encoded network link frame on a network route, as it arrived
+    #  @param fr_S: link frame holding a network packet, str or bytes
+    #  @param i Incoming interface number for the frame
+    #  @param binary: whether the frame uses the binary encoding
+    #  @param out_D: collects outgoing frames per interface
+    #  @return False if there is no route to the destination of the packet
+    def route_network_frame(self, fr_S, i, binary, out_D):
+        if binary:
+            start = LinkFrame.header.size + NetworkPacket.header.size
+            dst = fr_S[start : start + fr_S[start - 1]].decode()
+        else:
+            dst = fr_S[LinkFrame.type_S_length : LinkFrame.type_S_length + NetworkPacket.dst_S_length].lstrip('0')
+        outInterface = self.lfib.lookup_route(dst)
+        if outInterface is None:
+            return False
+        out_D.setdefault(outInterface, []).append(fr_S)
+        router_log.info('%s: routing frame "%s" from interface %d to %d', self, fr_S, i, outInterface)
+        return True
 
     ## process a network packet incoming to this router
     #  @param p Packet to forward
     #  @param i Incoming interface number for packet p
-    def process_network_packet(self, pkt, i):
+    #  @param binary: forward using the binary encoding
+    #  @param out_D: collects outgoing frames per interface instead of enqueuing them, if given
+    def process_network_packet(self, pkt, i, binary=False, out_D=None):
+        router_log.debug("...packet %s PRIORITY %d", pkt, pkt.priority)
+        #forward packets with a network route as they are, e.g. at the egress after penultimate hop popping
+        outInterface = self.lfib.lookup_route(pkt.dst)
+        if outInterface is not None:
+            self.send_frame(LinkFrame("Network", pkt.to_wire(binary)), i, outInterface, binary, out_D)
+            return
         #if from host or router to router that is not destination, encapsulate
-        print("...packet %s PRIORITY %d" % (pkt, pkt.priority))
         if pkt.dst not in self.encap_tbl_D:
             # assign path based on priority (L - Low Priority; H - High Priority)
             if pkt.priority == 0:
                 # h1
-                m_fr = MPLSFrame("L", pkt)
+                fec = "L"
             elif pkt.priority == 1:
                 # h2
-                m_fr = MPLSFrame("H", pkt)
-            print('%s: encapsulated packet "%s" as MPLS frame "%s"' % (self, pkt, m_fr))
-            #send the encapsulated packet for processing as MPLS frame
-            self.process_MPLS_frame(m_fr, i)
+                fec = "H"
+            entry = self.lfib.lookup_fec(fec, pkt.dst)
+            if entry is None:
+                router_log.error('%s: no label for class %s, packet "%s" dropped', self, fec, pkt)
+                return
+            m_fr = MPLSFrame([], pkt)
+            if router_log.enabled(eventlog.INFO):
+                router_log.info('%s: encapsulating packet "%s" with labels %s', self, pkt, list(entry[0]))
+            #send the encapsulated packet as MPLS frame
+            self.forward_MPLS_frame(m_fr, entry, i, binary, out_D)
         else:
-            print("Did not encapsulate the packet")
+            router_log.debug("Did not encapsulate the packet")
 
     ## process an MPLS frame incoming to this router
     #  @param m_fr: MPLS frame to process
     #  @param i Incoming interface number for the frame
-    def process_MPLS_frame(self, m_fr, i):
-        print('%s: processing MPLS frame "%s"' % (self, m_fr))
+    #  @param binary: forward using the binary encoding
+    #  @param out_D: collects outgoing frames per interface instead of enqueuing them, if given
+    def process_MPLS_frame(self, m_fr, i, binary=False, out_D=None):
+        if router_log.enabled(eventlog.INFO):
+            router_log.info('%s: processing MPLS frame "%s"', self, str(m_fr))
         ## From the label received, we determine where it's going
-        inlabel = m_fr.label
-        m_fr.label = self.frwd_tbl_D[inlabel][0]
-        outInterface = self.frwd_tbl_D[inlabel][2]
+        entry = self.lfib.lookup(m_fr.label)
+        if entry is None:
+            router_log.error('%s: no entry for label %d, frame "%s" dropped', self, m_fr.label, m_fr)
+            return
+        self.forward_MPLS_frame(m_fr, entry, i, binary, out_D)
+
+    ## apply a label forwarding entry to the label stack of an MPLS frame and send the result
+    #  @param m_fr: MPLS frame to forward, its stack is changed in place
+    #  @param entry: (out labels, action, out interface) from the LFIB
+    #  @param i Incoming interface number for the frame
+    #  @param binary: forward using the binary encoding
+    #  @param out_D: collects outgoing frames per interface instead of enqueuing them, if given
+    def forward_MPLS_frame(self, m_fr, entry, i, binary=False, out_D=None):
+        out_label_L, action, outInterface = entry
+        label_L = m_fr.label_L
+        if action == SWAP:
+            label_L[0:1] = out_label_L
+        elif action == PUSH:
+            label_L[0:0] = out_label_L
+        elif label_L:
+            del label_L[0]
+        if label_L:
+            # forward
+            router_log.debug("\ngoing to forwarding\n")
+            fr = LinkFrame("MPLS", m_fr.to_wire(binary))
+        else:
+            # decapsulate, the bottom label was popped
+            router_log.debug("\ngoing to decapsulate\n")
+            packet = m_fr.packet
+            if isinstance(packet, NetworkPacket):
+                packet = packet.to_wire(binary)
+            fr = LinkFrame("Network", packet)
+        self.send_frame(fr, i, outInterface, binary, out_D)
+
+    ## send a link frame on an interface
+    #  @param fr: LinkFrame to send
+    #  @param i Incoming interface number of the frame
+    #  @param outInterface: number of the outgoing interface
+    #  @param binary: send using the binary encoding
+    #  @param out_D: collects outgoing frames per interface instead of enqueuing them, if given
+    def send_frame(self, fr, i, outInterface, binary=False, out_D=None):
         try:
-            # decapsulate
-            if m_fr.label == self.frwd_tbl_D[inlabel][1]:
-                print("\ngoing to decapsulate\n")
-                fr = LinkFrame("Network", m_fr.packet)
+            if out_D is None:
+                self.intf_L[outInterface].put(fr.to_wire(binary), 'out', True)
             else:
-                # forward
-                print("\ngoing to forwarding\n")
-                fr = LinkFrame("MPLS", m_fr.to_byte_S())
-            self.intf_L[outInterface].put(fr.to_byte_S(), 'out', True)
-            print('%s: forwarding frame "%s" from interface %d to %d' % (self, fr, i, outInterface))
+                out_D.setdefault(outInterface, []).append(fr.to_wire(binary))
+            router_log.info('%s: forwarding frame "%s" from interface %d to %d', self, fr, i, outInterface)
         except queue.Full:
-            print('%s: frame "%s" lost on interface %d' % (self, m_fr, i))
+            router_log.error('%s: frame "%s" lost on interface %d', self, fr, i)
             pass
 
+    ## register a callback to be notified when a packet arrives on any interface
+    # @param callback: function without arguments, e.g. an event scheduler wakeup
+    def attach_wakeup(self, callback):
+        for intf in self.intf_L:
+            intf.in_wakeup = callback
+
+    ## event handler: process everything that has arrived
+    def step(self):
+        while any(not intf.in_queue.empty() for intf in self.intf_L):
+            self.process_queues()
+
     ## thread target for the host to keep forwarding data
     def run(self):
-        print (threading.currentThread().getName() + ': Starting')
+        router_log.info('%s: Starting', threading.currentThread().getName())
+        ready = Readiness()
+        self.attach_wakeup(ready.notify)
         while True:
-            self.process_queues()
+            self.step()
             if self.stop:
-                print (threading.currentThread().getName() + ': Ending')
-                return
\ No newline at end of file
+                router_log.info('%s: Ending', threading.currentThread().getName())
+                return
+            #sleep until a frame arrives on any interface
+            ready.wait()
\ No newline at end of file
@@ -0,0 +1,222 @@
+import collections
+import functools
+import heapq
+import queue
+import time
+
+
+## Egress scheduler of an interface
+# Frames waiting on an interface are kept in one FIFO per traffic class,
+# and a policy picks the class served next. Like queue.PriorityQueue, a
+# scheduler is a queue.Queue with its own _put and _get, so the locking,
+# blocking and size bound are those of queue.Queue and it can stand in for
+# the out queue of an Interface. The depth of every class and the time its
+# frames wait are recorded, on the clock of the link serving the interface.
+class Scheduler(queue.Queue):
+
+    ##@param maxsize: maximum number of frames over all classes, 0 for no limit
+    # @param classify: function giving the class of a frame
+    def __init__(self, maxsize=0, classify=None):
+        self.classify = classify
+        self.clock = time.time  # set to the clock of the link by Link.attach_wakeup()
+        super().__init__(maxsize)
+
+    ## called when printing the object
+    def __str__(self):
+        return '%s with %d frames' % (type(self).__name__, self.count)
+
+    def _init(self, maxsize):
+        self.class_D = {}  # {class: deque of (frame, time enqueued)}
+        self.stat_D = {}  # {class: {'enqueued', 'dequeued', 'max_depth', 'total_delay', 'max_delay'}}
+        self.count = 0
+
+    def _qsize(self):
+        return self.count
+
+    def _put(self, item):
+        cls = self.classify(item)
+        q = self.class_D.get(cls)
+        if q is None:
+            q = self.class_D[cls] = collections.deque()
+            self.stat_D[cls] = {'enqueued': 0, 'dequeued': 0, 'max_depth': 0, 'total_delay': 0.0, 'max_delay': 0.0}
+        q.append((item, self.clock()))
+        self.count += 1
+        stat = self.stat_D[cls]
+        stat['enqueued'] += 1
+        if len(q) > stat['max_depth']:
+            stat['max_depth'] = len(q)
+        self.enqueued(cls, item, len(q) == 1)
+
+    def _get(self):
+        cls = self.select()
+        q = self.class_D[cls]
+        item, enqueued = q.popleft()
+        self.count -= 1
+        delay = self.clock() - enqueued
+        stat = self.stat_D[cls]
+        stat['dequeued'] += 1
+        stat['total_delay'] += delay
+        if delay > stat['max_delay']:
+            stat['max_delay'] = delay
+        self.dequeued(cls, item, not q)
+        return item
+
+    ## frames waiting, class by class, e.g. for printing
+    @property
+    def queue(self):
+        return [item for q in self.class_D.values() for item, _ in q]
+
+    ## policy hook: a frame was added to a class
+    # @param empty: whether the class was empty before
+    def enqueued(self, cls, item, empty):
+        pass
+
+    ## policy hook: the class to serve next, only called with frames waiting
+    def select(self):
+        raise NotImplementedError
+
+    ## policy hook: a frame of the class returned by select() was removed
+    # @param empty: whether the class is empty now
+    def dequeued(self, cls, item, empty):
+        pass
+
+    ## queue depth and delay per class
+    # @return {class: {'depth', 'max_depth', 'enqueued', 'dequeued', 'mean_delay', 'max_delay'}}
+    def stats(self):
+        with self.mutex:
+            return {cls: {'depth': len(self.class_D[cls]), 'max_depth': stat['max_depth'],
+                          'enqueued': stat['enqueued'], 'dequeued': stat['dequeued'],
+                          'mean_delay': stat['total_delay'] / stat['dequeued'] if stat['dequeued'] else 0.0,
+                          'max_delay': stat['max_delay']}
+                    for cls, stat in self.stat_D.items()}
+
+
+## Strict priority: the highest class with frames waiting is always served first
+# The waiting classes are kept in a heap, so both operations cost O(log classes).
+class StrictPriority(Scheduler):
+
+    def _init(self, maxsize):
+        super()._init(maxsize)
+        self.ready_L = []  # heap of the negated classes with frames waiting
+
+    def enqueued(self, cls, item, empty):
+        if empty:
+            heapq.heappush(self.ready_L, -cls)
+
+    def select(self):
+        return -self.ready_L[0]
+
+    def dequeued(self, cls, item, empty):
+        if empty:
+            heapq.heappop(self.ready_L)
+
+
+## Weighted fair queuing, self-clocked
+# Every frame gets a finish tag, the larger of the virtual time and the tag
+# of the previous frame of its class, plus its size divided by the weight of
+# the class. The frame with the smallest tag at the head of a class is
+# served next, and the virtual time is the tag of the last frame served.
+# The heads of the classes are kept in a heap: O(log classes) per frame.
+class WFQ(Scheduler):
+
+    ##@param maxsize: maximum number of frames over all classes, 0 for no limit
+    # @param classify: function giving the class of a frame
+    # @param weight_D: {class: weight}, classes left out weigh 1
+    def __init__(self, maxsize=0, classify=None, weight_D=None):
+        self.weight_D = weight_D or {}
+        super().__init__(maxsize, classify)
+
+    def _init(self, maxsize):
+        super()._init(maxsize)
+        self.virtual_time = 0.0
+        self.tag_D = {}  # {class: deque of the finish tags of its frames}
+        self.last_tag_D = {}  # {class: finish tag of its last frame enqueued}
+        self.head_L = []  # heap of (finish tag, class) of the frames at the head of the classes
+
+    def enqueued(self, cls, item, empty):
+        start = max(self.virtual_time, self.last_tag_D.get(cls, 0.0))
+        tag = self.last_tag_D[cls] = start + len(item) / self.weight_D.get(cls, 1)
+        self.tag_D.setdefault(cls, collections.deque()).append(tag)
+        if empty:
+            heapq.heappush(self.head_L, (tag, cls))
+
+    def select(self):
+        return self.head_L[0][1]
+
+    def dequeued(self, cls, item, empty):
+        tag_q = self.tag_D[cls]
+        self.virtual_time = tag_q.popleft()
+        if empty:
+            heapq.heappop(self.head_L)
+        else:
+            heapq.heapreplace(self.head_L, (tag_q[0], cls))
+
+
+## Deficit round robin
+# The classes with frames waiting take turns. At the start of its turn a
+# class gets quantum times its weight in bytes of credit, and sends frames
+# while its credit covers the next one; an emptied class loses its credit.
+# O(1) per frame when the quantum is at least the largest frame.
+class DRR(Scheduler):
+
+    ##@param maxsize: maximum number of frames over all classes, 0 for no limit
+    # @param classify: function giving the class of a frame
+    # @param weight_D: {class: weight}, classes left out weigh 1
+    # @param quantum: bytes of credit per turn of a class of weight 1
+    def __init__(self, maxsize=0, classify=None, weight_D=None, quantum=200):
+        self.weight_D = weight_D or {}
+        self.quantum = quantum
+        super().__init__(maxsize, classify)
+
+    def _init(self, maxsize):
+        super()._init(maxsize)
+        self.active_q = collections.deque()  # classes with frames waiting, the one in its turn first
+        self.deficit_D = {}  # {class: credit in bytes}
+        self.turn_started = False  # whether the first class got the credit of its turn
+
+    def enqueued(self, cls, item, empty):
+        if empty:
+            self.active_q.append(cls)
+            self.deficit_D[cls] = 0
+
+    def select(self):
+        while True:
+            cls = self.active_q[0]
+            if not self.turn_started:
+                self.deficit_D[cls] += self.quantum * self.weight_D.get(cls, 1)
+                self.turn_started = True
+            size = len(self.class_D[cls][0][0])
+            if self.deficit_D[cls] >= size:
+                self.deficit_D[cls] -= size
+                return cls
+            self.active_q.rotate(-1)  # the turn passes to the next class
+            self.turn_started = False
+
+    def dequeued(self, cls, item, empty):
+        if empty:
+            self.active_q.popleft()
+            self.deficit_D[cls] = 0
+            self.turn_started = False
+
+
+## scheduler classes by policy name
+policy_D = {'priority': StrictPriority, 'wfq': WFQ, 'drr': DRR}
+
+
+## the scheduler factory described by a topology file entry
+# @param spec_D: {"policy": "priority", "wfq" or "drr", "weights": {class: weight > 0}, "quantum": bytes > 0}
+# @return function of (maxsize, classify) creating a scheduler for one interface
+def factory(spec_D):
+    cls = policy_D[spec_D['policy']]
+    if cls is StrictPriority and ('weights' in spec_D or 'quantum' in spec_D):
+        raise ValueError('strict priority scheduling takes no weights or quantum')
+    option_D = {}
+    if 'weights' in spec_D:
+        option_D['weight_D'] = {int(k): v for k, v in spec_D['weights'].items()}
+        if any(weight <= 0 for weight in option_D['weight_D'].values()):
+            raise ValueError('scheduler weights must be positive: %s' % spec_D['weights'])
+    if 'quantum' in spec_D:
+        option_D['quantum'] = spec_D['quantum']
+        if option_D['quantum'] <= 0:
+            raise ValueError('the scheduler quantum must be positive: %s' % spec_D['quantum'])
+    return functools.partial(cls, **option_D)
@@ -3,21 +3,43 @@ from link_3 import Link, LinkLayer
 import threading
 from time import sleep
 import sys
+from event_sim import Simulator
+import scheduler
 from copy import deepcopy
+import eventlog
 
 ##configuration parameters
 router_queue_size = 0 #0 means unlimited
+router_batch_size = 8 #max frames a router drains from each interface per pass
 simulation_time = 60 #give the network sufficient time to execute transfers
+event_driven = '--des' in sys.argv #run on the discrete-event engine instead of threads
+wire_format = 'binary' if '--binary' in sys.argv else 'string' #encoding of frames on the links
+egress_scheduler = {'policy': 'priority'} #scheduler of the router interfaces, see scheduler.factory(); None for FIFO interfaces
+log_level = eventlog.OFF if '--quiet' in sys.argv else eventlog.DEBUG if '--verbose' in sys.argv else eventlog.INFO #OFF, ERROR, INFO or DEBUG
+
+## print the queue depth and delay per class of a router interface, if it has an egress scheduler
+# @param router: the router
+# @param intf: number of the interface
+def print_egress_stats(router, intf):
+    out_queue = router.intf_L[intf].out_queue
+    if not hasattr(out_queue, 'stats'):
+        return
+    for cls, stat_D in sorted(out_queue.stats().items()):
+        print("%s-%d priority %d: %d frames, max depth %d, mean delay %.3f s, max delay %.3f s" % (
+            router, intf, cls, stat_D['dequeued'], stat_D['max_depth'], stat_D['mean_delay'], stat_D['max_delay']))
+
 
 if __name__ == '__main__':
+    eventlog.set_level(log_level)
     object_L = [] #keeps track of objects, so we can kill their threads at the end
+    scheduler_factory = None if egress_scheduler is None else scheduler.factory(egress_scheduler)
 
     #create network hosts
-    host_1 = Host('H1')
+    host_1 = Host('H1', wire_format)
     object_L.append(host_1)
-    host_2 = Host('H2')
+    host_2 = Host('H2', wire_format)
     object_L.append(host_2)
-    host_3 = Host('H3')
+    host_3 = Host('H3', wire_format)
     object_L.append(host_3)
 
     #create routers and routing tables for connected clients (subnets)
@@ -27,48 +49,56 @@ if __name__ == '__main__':
     encap_tbl_D = {"L": {"RA"}, "H": {"RA"}}
     decap_tbl_D = {"RD":{"H3"}}
 
-    # inlabel outlabel, dest, outinterface
-    frwd_tbl_D = {"L": ("1", "H3", 2), "H": ("2", "H3", 3)}
+    # inlabel action, outlabels, outinterface
+    frwd_tbl_D = {"L": ("push", "1", 2), "H": ("push", "2", 3)}
 
     router_a = Router(name='RA',
                               intf_capacity_L=[500,500,500,500],
                               encap_tbl_D = encap_tbl_D,
                               frwd_tbl_D = frwd_tbl_D,
                               decap_tbl_D = decap_tbl_D,
-                              max_queue_size=router_queue_size)
+                              max_queue_size=router_queue_size,
+                              batch_size=router_batch_size,
+                              scheduler=scheduler_factory)
     object_L.append(router_a)
 
-    # inlabel outlabel, dest, outinterface
-    frwd_tbl_D = {"1": ("1", "H3", 1)}
+    # penultimate hops pop the last label
+    frwd_tbl_D = {"1": ("pop", None, 1)}
 
     router_b = Router(name='RB',
                               intf_capacity_L=[500,500],
                               encap_tbl_D = encap_tbl_D,
                               frwd_tbl_D = frwd_tbl_D,
                               decap_tbl_D = decap_tbl_D,
-                              max_queue_size=router_queue_size)
+                              max_queue_size=router_queue_size,
+                              batch_size=router_batch_size,
+                              scheduler=scheduler_factory)
     object_L.append(router_b)
 
-    # inlabel outlabel, dest, outinterface
-    frwd_tbl_D = {"2": ("2", "H3", 1)}
+    frwd_tbl_D = {"2": ("pop", None, 1)}
 
     router_c = Router(name='RC',
                               intf_capacity_L=[500,500],
                               encap_tbl_D = encap_tbl_D,
                               frwd_tbl_D = frwd_tbl_D,
                               decap_tbl_D = decap_tbl_D,
-                              max_queue_size=router_queue_size)
+                              max_queue_size=router_queue_size,
+                              batch_size=router_batch_size,
+                              scheduler=scheduler_factory)
     object_L.append(router_c)
 
-    # inlabel outlabel, dest, outinterface
-    frwd_tbl_D = {"1": ("H3", "H3", 2), "2": ("H3", "H3", 2)}
+    # the egress forwards unlabeled packets on network routes: dest, outinterface
+    rt_tbl_D = {"H3": 2}
 
     router_d = Router(name='RD',
                               intf_capacity_L=[500,500,100],
                               encap_tbl_D = encap_tbl_D,
-                              frwd_tbl_D = frwd_tbl_D,
+                              frwd_tbl_D = {},
                               decap_tbl_D = decap_tbl_D,
-                              max_queue_size=router_queue_size)
+                              max_queue_size=router_queue_size,
+                              batch_size=router_batch_size,
+                              scheduler=scheduler_factory,
+                              rt_tbl_D=rt_tbl_D)
     object_L.append(router_d)
 
 
@@ -86,6 +116,25 @@ if __name__ == '__main__':
     link_layer.add_link(Link(router_d, 2, host_3, 0))
 
 
+    if event_driven:
+        #nodes and links only run when a frame arrives or an interface frees up, on a virtual clock
+        sim = Simulator()
+        for obj in object_L:
+            if obj is link_layer:
+                sim.add_link_layer(link_layer)
+            else:
+                sim.add_node(obj)
+        for i in range(2):
+            # priority 1
+            host_1.udt_send('H3', 'from H1: Sending on Priority Level Channel', 1)
+            # priority 0
+            host_2.udt_send('H3', 'from H2: Sending on Non-Priority Level Channel', 0)
+        sim.run()
+        eventlog.flush()
+        print("Simulation finished at virtual time %f after %d events" % (sim.now, sim.events_processed))
+        print_egress_stats(router_d, 2)
+        sys.exit(0)
+
     #start all the objects
     thread_L = []
     for obj in object_L:
@@ -97,9 +146,9 @@ if __name__ == '__main__':
     #create some send events
     for i in range(2):
         # priority 1
-        host_1.udt_send('from H1 to H3 ', ' Sending on Priority Level Channel ', 1)
+        host_1.udt_send('H3', 'from H1: Sending on Priority Level Channel', 1)
         # priority 0
-        host_2.udt_send('from H2 to H3 ', ' Sending on Non-Priority Level Channel ', 0)
+        host_2.udt_send('H3', 'from H2: Sending on Non-Priority Level Channel', 0)
 
     #give the network sufficient time to transfer all packets before quitting
     sleep(simulation_time)
@@ -111,4 +160,6 @@ if __name__ == '__main__':
     for t in thread_L:
         t.join()
 
-    print("All simulation threads joined")
\ No newline at end of file
+    eventlog.flush()
+    print("All simulation threads joined")
+    print_egress_stats(router_d, 2)
\ No newline at end of file
@@ -0,0 +1,425 @@
+'''
+Traffic engineering for the part 3 network: label switched paths placed by
+constrained shortest path first (CSPF) computation.
+
+Demands ask for bandwidth from a source host to a destination host in a
+forwarding equivalence class, "L" or "H" as assigned by the ingress router
+from the packet priority. They are listed in a topology file next to the
+routers and links:
+
+    "demands": [{"fec": "H", "src": "H1", "dst": "H3", "bandwidth": 60},
+                {"fec": "L", "src": "H2", "dst": "H3", "bandwidth": 40}]
+
+Every demand gets the cheapest path between its ingress and egress routers
+whose links all have the bandwidth left, counting the interface capacities
+of the routers and of the hosts; the links cost 1 or their "cost". The
+links from the source host and to the destination host are on every path,
+so a demand that does not fit them is not placed either. The bandwidth is
+reserved on the path and its labels are allocated and written to the
+forwarding tables of the routers on it: the ingress pushes, the transit
+routers swap, the penultimate hop pops and the egress forwards on a network
+route. When demands change, only the paths of the demands changed are
+computed and only the tables of the routers on those paths are rewritten.
+
+usage: python te.py FILE [OUT]  (place the demands of FILE, e.g. te_3.json, print the paths and write the topology with the tables to OUT)
+'''
+
+import heapq
+import json
+import sys
+import time
+import eventlog
+from lfib import LFIB, label_count
+
+te_log = eventlog.get_log('te')
+
+host_capacity = 500  # capacity in bps of the hosts without a "capacity", as network_3.Interface
+
+
+## A label switched path of a demand
+class LSP:
+
+    ##@param fec: forwarding equivalence class of the packets, e.g. "L"
+    # @param ingress: router where the packets enter the MPLS network
+    # @param dst: destination host
+    def __init__(self, fec, ingress, dst):
+        self.fec = fec
+        self.ingress = ingress
+        self.dst = dst
+        self.src_D = {}  # {source host, or ingress router: bps of its demand}
+        self.hop_L = []  # (router, out interface) from the ingress to the egress router, which sends to dst
+        self.label_L = []  # labels of the routers between the ingress and the egress, which gets none
+        self.cost = None  # cost of the path, None while not placed
+
+    ## called when printing the object
+    def __str__(self):
+        path_S = ' '.join(router for router, _ in self.hop_L) if self.hop_L else 'unplaced'
+        return 'LSP %s %s->%s %s bps: %s' % (self.fec, self.ingress, self.dst, self.bandwidth, path_S)
+
+    ## bandwidth of the path, the sum of the demands sharing it
+    @property
+    def bandwidth(self):
+        return sum(self.src_D.values())
+
+    ## class name of the packets at the ingress, narrowed to the destination
+    @property
+    def fec_name(self):
+        return '%s:%s' % (self.fec, self.dst)
+
+
+## CSPF placement of label switched paths over the links of a topology
+# The links between routers are edges in both directions, each with the
+# capacity of the interface sending on it, and the links of the hosts are
+# edges from the host to its router and from the router to the host. The
+# bandwidth reserved on every edge is kept, so a path is computed with one
+# Dijkstra search, on a heap, over the edges that still have the bandwidth. Labels are allocated per
+# router, the lowest free one first, so forwarding tables stay dense.
+# A demand that does not fit stays pending, and is placed again when
+# bandwidth is released.
+class TrafficEngineering:
+
+    ##@param spec: topology description, see topology.py
+    def __init__(self, spec):
+        host_D = {h['addr']: h.get('capacity', host_capacity) for h in spec.get('hosts', [])}
+        self.capacity_D = {}  # {(router or host, out interface): capacity in bps}
+        self.reserved_D = {}  # {(router or host, out interface): bps reserved}
+        self.edge_D = {}  # {router: [(neighbor, out interface, cost)]}
+        self.attach_D = {}  # {host: (router, interface of the router to the host)}
+        self.host_edge_D = {}  # {host: (host, interface of the host to its router)}
+        self.frwd_D = {}  # {router: {in label: [action, out labels, out interface]}}
+        self.route_D = {}  # {router: {destination: out interface}}
+        self.next_label_D = {}  # {router: lowest label never allocated}
+        self.free_label_D = {}  # {router: heap of released labels}
+        for r in spec.get('routers', []):
+            name = r['name']
+            for intf, capacity in enumerate(r['capacities']):
+                self.capacity_D[(name, intf)] = capacity
+                self.reserved_D[(name, intf)] = 0
+            self.edge_D[name] = []
+            self.frwd_D[name] = {label: list(entry) for label, entry in r.get('frwd', {}).items()}
+            self.route_D[name] = dict(r.get('routes', {}))
+            # labels 0-15 are reserved, and the labels of the table given are kept
+            self.next_label_D[name] = max([16] + [int(label) + 1 for label in self.frwd_D[name] if label.isdigit()])
+            self.free_label_D[name] = []
+        for l in spec.get('links', []):
+            (node_1, intf_1), (node_2, intf_2) = l['from'], l['to']
+            cost = l.get('cost', 1)
+            if node_1 in host_D or node_2 in host_D:
+                if node_2 in host_D:
+                    (node_1, intf_1), (node_2, intf_2) = (node_2, intf_2), (node_1, intf_1)
+                self.attach_D[node_1] = (node_2, intf_2)
+                self.host_edge_D[node_1] = (node_1, intf_1)
+                self.capacity_D[(node_1, intf_1)] = host_D[node_1]
+                self.reserved_D[(node_1, intf_1)] = 0
+            else:
+                self.edge_D[node_1].append((node_2, intf_1, cost))
+                self.edge_D[node_2].append((node_1, intf_2, cost))
+        self.route_count_D = {}  # {(egress router, destination): paths ending there}
+        self.lsp_D = {}  # {(class, ingress, destination): placed LSP}
+        self.pending_D = {}  # {(class, ingress, destination): LSP that did not fit}
+        self.changed_S = set()  # routers whose tables changed since update_routers()
+
+    ## the ingress router of a source host, or the router itself
+    def ingress(self, src):
+        return self.attach_D[src][0] if src in self.attach_D else src
+
+    ## called when printing the object
+    def __str__(self):
+        return 'TrafficEngineering with %d paths placed and %d pending' % (len(self.lsp_D), len(self.pending_D))
+
+    ## the constrained shortest path from a router to a host
+    # @param ingress: router the path starts at
+    # @param dst: destination host, whose router the path ends at
+    # @param bandwidth: bandwidth every edge of the path must have left
+    # @return (cost, [(router, out interface)] ending with the egress and its interface to dst), or None if no path fits
+    def cspf(self, ingress, dst, bandwidth):
+        egress, egress_intf = self.attach_D[dst]
+        if self.available(egress, egress_intf) < bandwidth:
+            return None
+        capacity_D = self.capacity_D
+        reserved_D = self.reserved_D
+        dist_D = {ingress: 0}
+        prev_D = {ingress: None}  # {router: (previous router, its out interface)}
+        heap_L = [(0, 0, ingress)]  # (cost, hops, router), hops and names break ties
+        done_S = set()
+        while heap_L:
+            cost, hops, router = heapq.heappop(heap_L)
+            if router in done_S:
+                continue
+            if router == egress:
+                hop_L = [(egress, egress_intf)]
+                while prev_D[router] is not None:
+                    router, intf = prev_D[router]
+                    hop_L.append((router, intf))
+                hop_L.reverse()
+                return cost, hop_L
+            done_S.add(router)
+            for neighbor, intf, edge_cost in self.edge_D[router]:
+                edge = (router, intf)
+                if capacity_D[edge] - reserved_D[edge] < bandwidth:
+                    continue
+                new_cost = cost + edge_cost
+                if neighbor not in done_S and new_cost < dist_D.get(neighbor, float('inf')):
+                    dist_D[neighbor] = new_cost
+                    prev_D[neighbor] = (router, intf)
+                    heapq.heappush(heap_L, (new_cost, hops + 1, neighbor))
+        return None
+
+    ## bandwidth an LSP takes on every edge: its path and the links from its source hosts
+    # @param lsp: LSP
+    # @param hop_L: path to count instead of that of the LSP
+    # @return [((router or host, out interface), bps)]
+    def usage(self, lsp, hop_L=None):
+        bandwidth = lsp.bandwidth
+        usage_L = [(edge, bandwidth) for edge in (lsp.hop_L if hop_L is None else hop_L)]
+        usage_L += [(self.host_edge_D[src], src_bandwidth) for src, src_bandwidth in lsp.src_D.items()
+                    if src in self.host_edge_D]
+        return usage_L
+
+    ## whether the edges have the bandwidth left
+    # @param usage_L: [(edge, bps)], see usage()
+    def fits(self, usage_L):
+        return all(self.available(*edge) >= bandwidth for edge, bandwidth in usage_L)
+
+    ## reserve bandwidth on edges, or release it
+    # @param usage_L: [(edge, bps)], see usage()
+    # @param sign: 1 to reserve, -1 to release
+    def reserve(self, usage_L, sign=1):
+        for edge, bandwidth in usage_L:
+            self.reserved_D[edge] += sign * bandwidth
+
+    ## allocate the lowest free label of a router
+    def allocate_label(self, router):
+        free_L = self.free_label_D[router]
+        if free_L:
+            return heapq.heappop(free_L)
+        label = self.next_label_D[router]
+        if label >= label_count:
+            raise ValueError('%s: out of labels' % router)
+        self.next_label_D[router] = label + 1
+        return label
+
+    ## write the forwarding entries of a placed path and allocate its labels
+    def install(self, lsp):
+        hop_L = lsp.hop_L
+        egress = hop_L[-1][0]
+        # the ingress pushes the label of the next router and the penultimate hop pops it,
+        # so the routers between the two get labels
+        lsp.label_L = [self.allocate_label(router) for router, _ in hop_L[1:-1]]
+        if len(hop_L) > 1:
+            ingress, intf = hop_L[0]
+            if lsp.label_L:
+                self.frwd_D[ingress][lsp.fec_name] = ['push', lsp.label_L[0], intf]
+            else:
+                self.frwd_D[ingress][lsp.fec_name] = ['pop', None, intf]  # the egress is next, no label
+            for k, (router, intf) in enumerate(hop_L[1:-1]):
+                if k + 1 < len(lsp.label_L):
+                    self.frwd_D[router][str(lsp.label_L[k])] = ['swap', lsp.label_L[k + 1], intf]
+                else:
+                    self.frwd_D[router][str(lsp.label_L[k])] = ['pop', None, intf]
+        key = (egress, lsp.dst)
+        self.route_count_D[key] = self.route_count_D.get(key, 0) + 1
+        self.route_D[egress][lsp.dst] = self.attach_D[lsp.dst][1]
+        self.changed_S.update(router for router, _ in hop_L)
+
+    ## remove the forwarding entries of a path and release its labels
+    def uninstall(self, lsp):
+        hop_L = lsp.hop_L
+        egress = hop_L[-1][0]
+        if len(hop_L) > 1:
+            del self.frwd_D[hop_L[0][0]][lsp.fec_name]
+        for (router, _), label in zip(hop_L[1:-1], lsp.label_L):
+            del self.frwd_D[router][str(label)]
+            heapq.heappush(self.free_label_D[router], label)
+        key = (egress, lsp.dst)
+        self.route_count_D[key] -= 1
+        if not self.route_count_D[key]:
+            del self.route_count_D[key]
+            del self.route_D[egress][lsp.dst]
+        lsp.label_L = []
+        self.changed_S.update(router for router, _ in hop_L)
+
+    ## compute, reserve and install the path of an LSP, replacing its current path if it has one
+    # The bandwidth of the LSP must be released before, so its current path
+    # counts as available to the new one, as the new path is set up before the
+    # current one is torn down. Nothing is changed when no path fits.
+    # @param lsp: LSP to place
+    # @param better: replace the current path only by a cheaper one, else only if it no longer fits
+    # @return whether the LSP has a path that fits, with its bandwidth reserved
+    def place(self, lsp, better=False):
+        if not self.fits(self.usage(lsp, [])):
+            return False  # the links from the source hosts are on every path
+        if lsp.hop_L and not better and self.fits(self.usage(lsp)):
+            self.reserve(self.usage(lsp))
+            return True
+        found = self.cspf(lsp.ingress, lsp.dst, lsp.bandwidth)
+        if found is None:
+            return False
+        cost, hop_L = found
+        if lsp.hop_L:
+            if hop_L == lsp.hop_L or better and cost >= lsp.cost:
+                self.reserve(self.usage(lsp))
+                return True
+            self.uninstall(lsp)
+        lsp.cost, lsp.hop_L = cost, hop_L
+        self.reserve(self.usage(lsp))
+        self.install(lsp)
+        te_log.info('%s: placed %s', str(self), str(lsp))  # formatted now, as both change
+        return True
+
+    ## add or change a demand, placing or resizing its LSP
+    # An LSP that still fits its path keeps it, otherwise only its path is
+    # computed again. When the new bandwidth fits no path, an LSP already
+    # placed keeps its path and bandwidth, and a new one stays pending.
+    # A demand is identified by its class, source and destination, and the
+    # demands of a class from the hosts behind an ingress router to a
+    # destination share one LSP, with the sum of their bandwidths.
+    # @param fec: forwarding equivalence class of the packets, e.g. "L"
+    # @param src: source host, or ingress router
+    # @param dst: destination host
+    # @param bandwidth: bandwidth in bps
+    # @return whether the demand is placed with that bandwidth
+    def set_demand(self, fec, src, dst, bandwidth):
+        key = (fec, self.ingress(src), dst)
+        lsp = self.lsp_D.get(key)
+        if lsp is None:
+            lsp = self.pending_D.pop(key, None) or LSP(fec, key[1], dst)
+            lsp.src_D[src] = bandwidth
+            if self.place(lsp):
+                self.lsp_D[key] = lsp
+                return True
+            self.pending_D[key] = lsp
+            te_log.error('%s: no path for %s', str(self), str(lsp))
+            return False
+        old_bandwidth, old_hop_L = lsp.src_D.get(src, 0), lsp.hop_L
+        self.reserve(self.usage(lsp), -1)
+        lsp.src_D[src] = bandwidth
+        if not self.place(lsp):
+            te_log.error('%s: no path for %s with %s bps from %s', str(self), str(lsp), bandwidth, src)
+            if old_bandwidth:
+                lsp.src_D[src] = old_bandwidth
+            else:
+                del lsp.src_D[src]
+            self.reserve(self.usage(lsp))  # the path was kept
+            return False
+        if self.pending_D and (bandwidth < old_bandwidth or lsp.hop_L is not old_hop_L):
+            self.place_pending()  # bandwidth was released
+        return True
+
+    ## remove a demand, releasing its bandwidth for pending demands
+    # @param fec: forwarding equivalence class of the packets
+    # @param src: source host, or ingress router
+    # @param dst: destination host
+    def remove_demand(self, fec, src, dst):
+        key = (fec, self.ingress(src), dst)
+        lsp = self.lsp_D.get(key)
+        if lsp is None:
+            lsp = self.pending_D[key]
+            del lsp.src_D[src]
+            if not lsp.src_D:
+                del self.pending_D[key]
+            return
+        self.reserve(self.usage(lsp), -1)
+        del lsp.src_D[src]
+        if lsp.src_D:
+            self.reserve(self.usage(lsp))  # the others keep the path
+        else:
+            del self.lsp_D[key]
+            self.uninstall(lsp)
+        self.place_pending()
+
+    ## place the demands in a list, the largest first as they are the hardest to fit
+    # Demands listed twice are added up.
+    # @param demand_L: [{"fec", "src", "dst", "bandwidth"}]
+    # @return number of demands placed
+    def set_demands(self, demand_L):
+        bandwidth_D = {}  # {(class, source, destination): bandwidth}
+        for d in demand_L:
+            key = (d['fec'], d['src'], d['dst'])
+            bandwidth_D[key] = bandwidth_D.get(key, 0) + d['bandwidth']
+        placed = 0
+        for (fec, src, dst), bandwidth in sorted(bandwidth_D.items(), key=lambda item: (-item[1], item[0])):
+            placed += self.set_demand(fec, src, dst, bandwidth)
+        return placed
+
+    ## try to place the pending demands, the largest first
+    # @return number of demands placed
+    def place_pending(self):
+        placed = 0
+        for key, lsp in sorted(self.pending_D.items(), key=lambda item: -item[1].bandwidth):
+            if self.place(lsp):
+                del self.pending_D[key]
+                self.lsp_D[key] = lsp
+                placed += 1
+        return placed
+
+    ## move LSPs to cheaper paths that fit now, e.g. after demands were removed, then place pending demands
+    # @param key_L: (class, ingress router, destination) of the LSPs to consider, None for all
+    # @return number of LSPs moved or placed
+    def reoptimize(self, key_L=None):
+        lsp_L = [self.lsp_D[key] for key in key_L] if key_L is not None else list(self.lsp_D.values())
+        moved = 0
+        for lsp in sorted(lsp_L, key=lambda lsp: -lsp.bandwidth):
+            hop_L = lsp.hop_L
+            self.reserve(self.usage(lsp), -1)
+            self.place(lsp, better=True)  # the current path fits, so the LSP keeps a path
+            moved += lsp.hop_L is not hop_L
+        return moved + self.place_pending()
+
+    ## bandwidth left on an interface of a router or host
+    def available(self, node, intf):
+        return self.capacity_D[(node, intf)] - self.reserved_D[(node, intf)]
+
+    ## write the tables to a copy of a topology description
+    # The routers get their forwarding tables and routes, and the encapsulation
+    # and decapsulation tables list the ingress and egress routers of the paths.
+    # @param spec: topology description the engine was created from
+    # @return the description with the tables
+    def apply(self, spec):
+        spec = dict(spec)
+        spec['routers'] = [dict(r, frwd=self.frwd_D[r['name']], routes=self.route_D[r['name']]) for r in spec.get('routers', [])]
+        encap_D = {fec: list(routers) for fec, routers in spec.get('encap', {}).items()}
+        decap_D = {router: list(dsts) for router, dsts in spec.get('decap', {}).items()}
+        for lsp in self.lsp_D.values():
+            ingress_L = encap_D.setdefault(lsp.fec_name, [])
+            if lsp.ingress not in ingress_L:
+                ingress_L.append(lsp.ingress)
+            dst_L = decap_D.setdefault(lsp.hop_L[-1][0], [])
+            if lsp.dst not in dst_L:
+                dst_L.append(lsp.dst)
+        spec['encap'] = encap_D
+        spec['decap'] = decap_D
+        return spec
+
+    ## load the tables changed since the last call into running routers
+    # @param router_D: {name: Router}
+    # @return names of the routers updated
+    def update_routers(self, router_D):
+        changed_S = self.changed_S
+        self.changed_S = set()
+        for name in changed_S:
+            router_D[name].lfib = LFIB(self.frwd_D[name], self.route_D[name])
+        return changed_S
+
+
+## place the demands of a topology description and write the tables to it
+# @param spec: topology description with "demands"
+# @return (description with the tables, TrafficEngineering holding the paths)
+def apply(spec):
+    engine = TrafficEngineering(spec)
+    engine.set_demands(spec.get('demands', []))
+    return engine.apply(spec), engine
+
+
+if __name__ == '__main__':
+    import topology
+    spec = topology.read(sys.argv[1])
+    start = time.perf_counter()
+    spec, engine = apply(spec)
+    elapsed = time.perf_counter() - start
+    for lsp in list(engine.lsp_D.values()) + list(engine.pending_D.values()):
+        print(lsp)
+    print('%s in %.3f seconds' % (engine, elapsed))
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], 'w') as f:
+            json.dump(spec, f, indent=2)
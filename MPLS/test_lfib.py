@@ -0,0 +1,102 @@
+import unittest
+import eventlog
+from lfib import LFIB, POP, PUSH, SWAP
+from link_3 import LinkFrame
+from network_3 import MPLSFrame, NetworkPacket, Router
+
+## forwarding table of the router under test, in both forms of entries
+frwd_tbl_D = {'L': ['push', '1', 1],
+              'H': ['push', [3, 4], 2],  # hierarchical path, 3 on top
+              'L:H8': ['push', '21', 3],
+              '5': ['swap', '6', 1],
+              '7': ['pop', None, 2],
+              '8': ['9', 'H3', 3],  # original form, swaps
+              '10': ['H3', 'H3', 3]}  # original form, pops at the penultimate hop and routes to H3
+
+
+class LFIBTest(unittest.TestCase):
+
+    def test_entries(self):
+        lfib = LFIB(frwd_tbl_D, {'H4': 0})
+        self.assertEqual(lfib.lookup(5), ((6,), SWAP, 1))
+        self.assertEqual(lfib.lookup(7), ((), POP, 2))
+        self.assertEqual(lfib.lookup(8), ((9,), SWAP, 3))
+        self.assertEqual(lfib.lookup(10), ((), POP, 3))
+        self.assertIsNone(lfib.lookup(4))
+        self.assertIsNone(lfib.lookup(11))
+        self.assertEqual(lfib.lookup_fec('L'), ((1,), PUSH, 1))
+        self.assertEqual(lfib.lookup_fec('L', 'H8'), ((21,), PUSH, 3))
+        self.assertEqual(lfib.lookup_fec('H', 'H8'), ((3, 4), PUSH, 2))
+        self.assertIsNone(lfib.lookup_fec('X'))
+        self.assertEqual(lfib.route_D, {'H3': 3, 'H4': 0})
+
+    def test_invalid_entries(self):
+        for frwd_D in ({'1': ['swap', None, 0]}, {'L': ['push', [], 0]}, {'1': ['swap', 1 << 20, 0]},
+                       {str(1 << 20): ['pop', None, 0]}):
+            with self.assertRaises(ValueError):
+                LFIB(frwd_D)
+
+
+class SwitchingTest(unittest.TestCase):
+
+    def setUp(self):
+        eventlog.set_level(eventlog.OFF)
+        self.addCleanup(eventlog.set_level, eventlog.INFO)
+        self.router = Router('RL', [500] * 4, {}, frwd_tbl_D, {}, 0, batch_size=16)
+
+    ## a link frame decoded as (out interface, label stack, destination and payload of the packet)
+    @staticmethod
+    def decode(intf, fr_S):
+        fr = LinkFrame.from_wire(fr_S)
+        if fr.type_S == 'Network':
+            label_L, pkt = [], fr.data_S
+        else:
+            m_fr = MPLSFrame.from_wire(fr.data_S)
+            label_L, pkt = m_fr.label_L, m_fr.packet
+        pkt = NetworkPacket.from_wire(pkt)
+        return intf, label_L, pkt.dst, pkt.data_S
+
+    ## frames sent by the router for a frame arriving on interface 0, switched on its encoding
+    def switch(self, fr_S):
+        self.router.intf_L[0].put(fr_S, 'in')
+        self.router.process_queues()
+        return [self.decode(intf, out_S)
+                for intf in range(len(self.router.intf_L)) for out_S in self.router.intf_L[intf].get_batch('out', 16)]
+
+    ## frames sent by the router for an MPLS frame it parsed
+    def forward(self, label_L, pkt, binary):
+        out_D = {}
+        self.router.process_MPLS_frame(MPLSFrame(label_L, pkt.to_wire(binary)), 0, binary, out_D)
+        return [self.decode(intf, out_S) for intf, out_L in out_D.items() for out_S in out_L]
+
+    def test_labels(self):
+        pkt = NetworkPacket('H8', 'data')
+        for binary in (False, True):
+            for label_L, expected in (([5], [(1, [6], 'H8', 'data')]),
+                                      ([8, 30], [(3, [9, 30], 'H8', 'data')]),
+                                      ([7, 30], [(2, [30], 'H8', 'data')]),
+                                      ([7], [(2, [], 'H8', 'data')]),  # penultimate hop popping
+                                      ([10], [(3, [], 'H8', 'data')]),
+                                      ([11], []), ([4], [])):  # no entry
+                fr_S = LinkFrame('MPLS', MPLSFrame(label_L, pkt).to_wire(binary)).to_wire(binary)
+                self.assertEqual(self.switch(fr_S), expected, (label_L, binary))
+                self.assertEqual(self.forward(label_L, pkt, binary), expected, (label_L, binary))
+
+    def test_push_at_the_ingress(self):
+        for binary in (False, True):
+            for pkt, expected in ((NetworkPacket('H9', 'low', 0), (1, [1], 'H9', 'low')),
+                                  (NetworkPacket('H9', 'high', 1), (2, [3, 4], 'H9', 'high')),
+                                  (NetworkPacket('H8', 'low', 0), (3, [21], 'H8', 'low'))):
+                self.assertEqual(self.switch(LinkFrame('Network', pkt.to_wire(binary)).to_wire(binary)), [expected])
+            # a pushed frame is switched on at the next hop
+            fr_S = LinkFrame('MPLS', MPLSFrame([7, 5], NetworkPacket('H9', 'x')).to_wire(binary)).to_wire(binary)
+            self.assertEqual(self.switch(fr_S), [(2, [5], 'H9', 'x')])
+
+    def test_egress_routes_unlabeled_packets(self):
+        for binary in (False, True):
+            fr_S = LinkFrame('Network', NetworkPacket('H3', 'popped').to_wire(binary)).to_wire(binary)
+            self.assertEqual(self.switch(fr_S), [(3, [], 'H3', 'popped')])
+
+
+if __name__ == '__main__':
+    unittest.main()
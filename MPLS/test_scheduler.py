@@ -0,0 +1,111 @@
+import queue
+import unittest
+import scheduler
+from link_3 import LinkFrame
+from network_3 import Interface, MPLSFrame, NetworkPacket, frame_priority
+
+
+## class of the test frames: their first character
+def first_digit(item):
+    return int(item[0])
+
+
+## frames of a class and size, numbered so that they can be told apart
+def frames(cls, size, count):
+    return [('%d%d' % (cls, k)).ljust(size, '.') for k in range(count)]
+
+
+## the classes of the frames taken from a scheduler
+def drain(q):
+    cls_L = []
+    while not q.empty():
+        cls_L.append(first_digit(q.get(False)))
+    return cls_L
+
+
+class PolicyTest(unittest.TestCase):
+
+    def test_strict_priority(self):
+        q = scheduler.StrictPriority(classify=first_digit)
+        for item in ['0a', '2a', '1a', '0b', '2b']:
+            q.put(item)
+        self.assertEqual([q.get(False) for _ in range(3)], ['2a', '2b', '1a'])
+        q.put('1b')
+        self.assertEqual([q.get(False) for _ in range(3)], ['1b', '0a', '0b'])
+
+    def test_wfq_shares_by_weight(self):
+        q = scheduler.WFQ(classify=first_digit, weight_D={1: 3})
+        for item in frames(0, 10, 3) + frames(1, 9, 8):
+            q.put(item)
+        self.assertEqual(drain(q), [1, 1, 1, 0, 1, 1, 1, 0, 1, 1, 0])
+
+    def test_drr_shares_by_weight(self):
+        q = scheduler.DRR(classify=first_digit, weight_D={1: 2}, quantum=20)
+        for item0, item1 in zip(frames(0, 10, 6), frames(1, 10, 6)):
+            q.put(item0)
+            q.put(item1)
+        self.assertEqual(drain(q), [0, 0, 1, 1, 1, 1, 0, 0, 1, 1, 0, 0])
+
+    def test_drr_frames_larger_than_the_quantum(self):
+        q = scheduler.DRR(classify=first_digit, quantum=4)
+        for item in frames(0, 10, 2) + frames(1, 3, 4):
+            q.put(item)
+        # class 0 needs three turns of credit for a frame, class 1 sends one frame per turn
+        self.assertEqual(drain(q), [1, 1, 0, 1, 1, 0])
+
+    def test_stats(self):
+        now = [0.0]
+        q = scheduler.StrictPriority(classify=first_digit)
+        q.clock = lambda: now[0]
+        q.put('1a')
+        q.put('1b')
+        now[0] = 2.0
+        q.get(False)
+        now[0] = 3.0
+        q.get(False)
+        self.assertEqual(q.stats(), {1: {'depth': 0, 'max_depth': 2, 'enqueued': 2, 'dequeued': 2,
+                                         'mean_delay': 2.5, 'max_delay': 3.0}})
+
+    def test_bounded(self):
+        q = scheduler.DRR(maxsize=2, classify=first_digit)
+        q.put('0a')
+        q.put('1a')
+        with self.assertRaises(queue.Full):
+            q.put('0b', False)
+
+
+class FactoryTest(unittest.TestCase):
+
+    def test_policies(self):
+        q = scheduler.factory({'policy': 'drr', 'weights': {'1': 2}, 'quantum': 50})(0, first_digit)
+        self.assertIsInstance(q, scheduler.DRR)
+        self.assertEqual((q.weight_D, q.quantum), ({1: 2}, 50))
+        self.assertIsInstance(scheduler.factory({'policy': 'wfq', 'weights': {'0': 0.5}})(0, first_digit), scheduler.WFQ)
+        self.assertIsInstance(scheduler.factory({'policy': 'priority'})(0, first_digit), scheduler.StrictPriority)
+
+    def test_invalid_parameters(self):
+        for spec_D in ({'policy': 'wfq', 'weights': {'1': 0}}, {'policy': 'drr', 'weights': {'0': 1, '1': -2}},
+                       {'policy': 'drr', 'quantum': 0}, {'policy': 'priority', 'weights': {'1': 2}}):
+            with self.assertRaises(ValueError):
+                scheduler.factory(spec_D)
+        with self.assertRaises(KeyError):
+            scheduler.factory({'policy': 'fifo'})
+
+
+class InterfaceTest(unittest.TestCase):
+
+    def test_batches_follow_the_policy(self):
+        for binary in (False, True):
+            intf = Interface(scheduler=scheduler.StrictPriority(classify=frame_priority))
+            fr_L = [LinkFrame('Network', NetworkPacket('H3', 'low', 0).to_wire(binary)).to_wire(binary),
+                    LinkFrame('MPLS', MPLSFrame([1], NetworkPacket('H3', 'high', 1)).to_wire(binary)).to_wire(binary),
+                    LinkFrame('Network', NetworkPacket('H3', 'high', 1).to_wire(binary)).to_wire(binary)]
+            intf.put_batch(fr_L, 'out')
+            self.assertEqual(intf.get_batch('out', 2), fr_L[1:])
+            self.assertEqual(intf.get_batch('out', 2), fr_L[:1])
+            self.assertEqual(intf.get_batch('out', 2), [])
+            self.assertEqual(intf.out_queue.stats()[1]['dequeued'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import copy
+import io
+import os
+import random
+import unittest
+from contextlib import redirect_stdout
+import bench
+import eventlog
+import te
+import topology
+
+## te_3.json, with the demands left out
+base_spec = topology.read(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'te_3.json'))
+base_spec = dict(base_spec, demands=[])
+
+
+## te_3.json with host H4 behind router RB, a second ingress
+def spec_with_H4():
+    spec = copy.deepcopy(base_spec)
+    spec['hosts'].append({'addr': 'H4', 'capacity': 50})
+    spec['routers'][1]['capacities'].append(500)
+    spec['links'].append({'from': ['H4', 0], 'to': ['RB', 2]})
+    return spec
+
+
+class TrafficEngineeringTest(unittest.TestCase):
+
+    def setUp(self):
+        eventlog.set_level(eventlog.OFF)
+        self.addCleanup(eventlog.set_level, eventlog.INFO)
+
+    ## check that the reservations are those of the placed paths, and their labels those in the tables
+    def check(self, engine):
+        reserved_D = dict.fromkeys(engine.reserved_D, 0)
+        label_D = {router: set() for router in engine.frwd_D}
+        for key, lsp in engine.lsp_D.items():
+            self.assertEqual(key, (lsp.fec, lsp.ingress, lsp.dst))
+            for edge, bandwidth in engine.usage(lsp):
+                reserved_D[edge] += bandwidth
+            for (router, _), label in zip(lsp.hop_L[1:-1], lsp.label_L):
+                label_D[router].add(str(label))
+            self.assertIn(lsp.fec_name, engine.frwd_D[lsp.ingress])
+            self.assertIn(lsp.dst, engine.route_D[lsp.hop_L[-1][0]])
+        self.assertEqual(engine.reserved_D, reserved_D)
+        for edge, reserved in engine.reserved_D.items():
+            self.assertLessEqual(reserved, engine.capacity_D[edge], edge)
+        for router, frwd_D in engine.frwd_D.items():
+            self.assertEqual({label for label in frwd_D if label.isdigit()}, label_D[router])
+        for lsp in engine.pending_D.values():
+            self.assertFalse(lsp.label_L)
+
+    def test_te_3(self):
+        spec, engine = te.apply(topology.read(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'te_3.json')))
+        self.check(engine)
+        self.assertEqual(len(engine.lsp_D), 2)
+        lsp = engine.lsp_D[('H', 'RA', 'H3')]
+        self.assertEqual((lsp.hop_L, lsp.label_L, lsp.cost), ([('RA', 2), ('RB', 1), ('RD', 2)], [16], 2))
+        self.assertEqual(engine.frwd_D['RA']['H:H3'], ['push', 16, 2])
+        self.assertEqual(engine.frwd_D['RB']['16'], ['pop', None, 1])
+        self.assertEqual(engine.route_D['RD'], {'H3': 2})
+        self.assertEqual(engine.available('RD', 2), 0)
+        self.assertEqual(engine.available('H1', 0), 440)
+        self.assertEqual(spec['decap'], {'RD': ['H3']})
+
+    def test_demands_larger_than_the_egress_link_stay_pending(self):
+        engine = te.TrafficEngineering(base_spec)
+        self.assertEqual(engine.set_demands([{'fec': 'H', 'src': 'H1', 'dst': 'H3', 'bandwidth': 300},
+                                             {'fec': 'L', 'src': 'H2', 'dst': 'H3', 'bandwidth': 300}]), 0)
+        self.assertEqual(len(engine.pending_D), 2)
+        self.assertFalse(any(engine.reserved_D.values()))
+        self.check(engine)
+
+    def test_pending_demands_are_placed_when_bandwidth_is_released(self):
+        engine = te.TrafficEngineering(spec_with_H4())
+        self.assertTrue(engine.set_demand('H', 'H1', 'H3', 60))
+        self.assertTrue(engine.set_demand('L', 'H2', 'H3', 40))
+        self.assertFalse(engine.set_demand('L', 'H4', 'H3', 30))
+        self.assertFalse(engine.set_demand('L', 'H1', 'H3', 10))  # shares the LSP of H2, which keeps its bandwidth
+        self.assertEqual(engine.lsp_D[('L', 'RA', 'H3')].src_D, {'H2': 40})
+        self.assertIn(('L', 'RB', 'H3'), engine.pending_D)
+        self.check(engine)
+        engine.remove_demand('H', 'H1', 'H3')
+        self.assertFalse(engine.pending_D)
+        self.assertEqual(engine.lsp_D[('L', 'RB', 'H3')].hop_L, [('RB', 1), ('RD', 2)])
+        self.assertEqual(engine.frwd_D['RB']['L:H3'], ['pop', None, 1])
+        self.assertEqual(engine.available('RD', 2), 30)
+        self.check(engine)
+        self.assertTrue(engine.set_demand('H', 'H1', 'H3', 30))
+        self.assertEqual(engine.lsp_D[('H', 'RA', 'H3')].label_L, [16])  # released before
+        self.check(engine)
+
+    def test_host_links_are_reserved(self):
+        engine = te.TrafficEngineering(spec_with_H4())
+        self.assertFalse(engine.set_demand('L', 'H4', 'H3', 60))  # H4 sends 50 bps at most
+        self.assertTrue(engine.set_demand('L', 'H4', 'H3', 50))
+        self.assertEqual(engine.available('H4', 0), 0)
+        self.assertEqual(engine.available('RD', 2), 50)
+        engine.remove_demand('L', 'H4', 'H3')
+        self.assertFalse(any(engine.reserved_D.values()))
+        self.assertEqual(engine.route_D['RD'], {})
+        self.check(engine)
+
+    def test_random_changes_keep_the_bookkeeping(self):
+        spec = spec_with_H4()
+        spec['routers'][3]['capacities'][2] = 400
+        engine = te.TrafficEngineering(spec)
+        rnd = random.Random(2)
+        for _ in range(300):
+            fec, src = rnd.choice('LH'), rnd.choice(['H1', 'H2', 'H4'])
+            key = (fec, engine.ingress(src), 'H3')
+            lsp = engine.lsp_D.get(key) or engine.pending_D.get(key)
+            if lsp is not None and src in lsp.src_D and rnd.random() < 0.4:
+                engine.remove_demand(fec, src, 'H3')
+            elif rnd.random() < 0.1:
+                engine.reoptimize()
+            else:
+                engine.set_demand(fec, src, 'H3', rnd.randint(1, 200))
+            self.check(engine)
+
+    def test_log_shows_the_path_when_placed(self):
+        engine = te.TrafficEngineering(base_spec)
+        out = io.StringIO()
+        eventlog.set_level(eventlog.INFO, 'te')
+        with redirect_stdout(out):
+            engine.set_demand('H', 'H1', 'H3', 60)
+            engine.set_demand('H', 'H1', 'H3', 70)  # fits the same path, not logged
+            eventlog.flush()
+        self.assertEqual(out.getvalue().splitlines(),
+                         ['TrafficEngineering with 0 paths placed and 0 pending: placed LSP H RA->H3 60 bps: RA RB RD'])
+
+    def test_packets_follow_the_paths(self):
+        topo = topology.load(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'te_3.json'))
+        received_L = []
+        topo.node('H3').receive_callback = received_L.append
+        sim = bench.simulator(topo.object_L)
+        for wire_format in ('string', 'binary'):
+            for host in topo.host_D.values():
+                host.wire_format = wire_format
+            sim.schedule(0, topo.node('H1').udt_send, 'H3', 'high', 1)
+            sim.schedule(0, topo.node('H2').udt_send, 'H3', 'low', 0)
+            sim.run()
+        self.assertEqual(sorted(received_L), ['high', 'high', 'low', 'low'])
+
+
+if __name__ == '__main__':
+    unittest.main()
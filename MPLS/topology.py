@@ -0,0 +1,178 @@
+'''
+Declarative topologies for the part 3 network.
+
+A topology file (JSON, or YAML when PyYAML is installed) lists the hosts,
+the routers with their interface capacities and label forwarding tables,
+the encapsulation and decapsulation tables shared by the routers, and the
+links between interfaces:
+
+    {"hosts": [{"addr": "H1"}, ...],
+     "encap": {"L": ["RA"], ...},
+     "decap": {"RD": ["H3"]},
+     "routers": [{"name": "RA", "capacities": [500, 500, 500, 500],
+                  "frwd": {"L": ["push", "1", 2], ...}}, ...,
+                 {"name": "RD", "capacities": [500, 500, 100],
+                  "routes": {"H3": 2}}],
+     "links": [{"from": ["H1", 0], "to": ["RA", 0]}, ...]}
+
+Forwarding entries are [action, out labels, out interface] with the action
+"push", "swap" or "pop" and the out labels a label, a list of labels (top
+first) or null, or [out label, destination, out interface] as in
+simulation_3.py, which pops when the out label is the destination. Labels
+are 20 bit numbers and in labels that are not numbers ("L", "H") name the
+classes packets are assigned to when entering the network. With
+penultimate hop popping the last label is popped one hop before the
+egress router, which forwards the packet on its "routes" {destination: out
+interface}. Hosts take
+an optional "capacity" in bps, routers may override the encapsulation and
+decapsulation tables as well as the queue size and the batch size given to
+load(). Routers may also give the egress scheduler of their interfaces,
+e.g. "scheduler": {"policy": "drr", "weights": {"1": 3, "0": 1}} with the
+policy "priority", "wfq" or "drr" (see scheduler.py); their interfaces are
+FIFOs otherwise. Bandwidth "demands" between hosts are placed on label
+switched paths by te.py, which writes the tables of the routers.
+
+usage: python topology.py FILE  (build FILE and report the time taken)
+       python topology.py --ring N FILE  (write a ring of N routers with a host each)
+'''
+
+import gc
+import json
+import sys
+import time
+import eventlog
+import scheduler
+import te
+from link_3 import Link, LinkLayer
+from network_3 import Router, Host
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+## A network built from a topology file
+class Topology:
+
+    def __init__(self):
+        self.host_D = {}  # {name: Host}
+        self.router_D = {}  # {name: Router}
+        self.link_layer = LinkLayer()
+        self.te = None  # TrafficEngineering holding the paths of the demands, if any
+
+    ## called when printing the object
+    def __str__(self):
+        return 'Topology with %d hosts, %d routers and %d links' % (len(self.host_D), len(self.router_D), len(self.link_layer.link_L))
+
+    ## hosts, routers and the link layer, e.g. to start their threads
+    @property
+    def object_L(self):
+        return list(self.host_D.values()) + list(self.router_D.values()) + [self.link_layer]
+
+    ## look up a host or router by name
+    def node(self, name):
+        node = self.host_D.get(name)
+        return node if node is not None else self.router_D[name]
+
+
+## read a topology description
+# @param path: .json file, or .yaml/.yml file if PyYAML is installed
+# @return the description as a dict
+def read(path):
+    with open(path) as f:
+        if path.endswith(('.yaml', '.yml')):
+            if yaml is None:
+                raise ImportError('PyYAML is required to read %s' % path)
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+## convert a table of lists from a topology file to the table of sets used by the routers
+def set_table(table_D):
+    return {k: set(v) for k, v in table_D.items()}
+
+
+## instantiate the network of a topology description
+# The links are created with their construction messages turned off and
+# collected in one list. The garbage collector is paused meanwhile, as the
+# many interface queues would trigger repeated collections.
+# @param spec: topology description, see the module documentation
+# @param wire_format: encoding of frames sent by the hosts
+# @param max_queue_size: default queue length of router interfaces, 0 means unlimited
+# @param batch_size: default number of frames a router drains from each interface per pass
+def build(spec, wire_format='string', max_queue_size=0, batch_size=1):
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        engine = None
+        if spec.get('demands'):
+            spec, engine = te.apply(spec)
+        with eventlog.quiet('link'):
+            topo = build_objects(spec, wire_format, max_queue_size, batch_size)
+        topo.te = engine
+        return topo
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+## instantiate the objects of a topology description, called by build()
+def build_objects(spec, wire_format, max_queue_size, batch_size):
+    topo = Topology()
+    for h in spec.get('hosts', []):
+        host = topo.host_D[h['addr']] = Host(h['addr'], h.get('wire_format', wire_format))
+        if 'capacity' in h:
+            host.intf_L[0].capacity = h['capacity']
+    # like in simulation_3.py, the routers share the encapsulation and decapsulation tables
+    encap_tbl_D = set_table(spec.get('encap', {}))
+    decap_tbl_D = set_table(spec.get('decap', {}))
+    for r in spec.get('routers', []):
+        frwd_tbl_D = {label: (out_label, dst, out_intf) for label, (out_label, dst, out_intf) in r.get('frwd', {}).items()}
+        topo.router_D[r['name']] = Router(r['name'], r['capacities'],
+                                          set_table(r['encap']) if 'encap' in r else encap_tbl_D,
+                                          frwd_tbl_D,
+                                          set_table(r['decap']) if 'decap' in r else decap_tbl_D,
+                                          r.get('max_queue_size', max_queue_size),
+                                          r.get('batch_size', batch_size), r.get('fairness_cap'),
+                                          scheduler.factory(r['scheduler']) if 'scheduler' in r else None,
+                                          r.get('routes'))
+    node = topo.node
+    topo.link_layer.link_L = [Link(node(l['from'][0]), l['from'][1], node(l['to'][0]), l['to'][1])
+                              for l in spec.get('links', [])]
+    return topo
+
+
+## read and instantiate a topology file, see build() for the options
+def load(path, **option_D):
+    return build(read(path), **option_D)
+
+
+## describe a ring of routers, each with one host attached
+# Router i encapsulates with label "L" and passes the frames on to router i+1,
+# which decapsulates them for its host.
+# @param router_count: number of routers, and of hosts
+# @param capacity: capacity of every interface in bps
+def ring(router_count, capacity=500):
+    host_L = [{'addr': 'H%d' % i, 'capacity': capacity} for i in range(router_count)]
+    router_L = [{'name': 'R%d' % i, 'capacities': [capacity] * 3,
+                 'frwd': {'L': [str((i + 1) % router_count), 'H%d' % ((i + 1) % router_count), 1],
+                          str(i): ['H%d' % i, 'H%d' % i, 0]}}
+                for i in range(router_count)]
+    link_L = []
+    for i in range(router_count):
+        link_L.append({'from': ['H%d' % i, 0], 'to': ['R%d' % i, 0]})
+        link_L.append({'from': ['R%d' % i, 1], 'to': ['R%d' % ((i + 1) % router_count), 2]})
+    return {'hosts': host_L, 'encap': {'L': ['R%d' % i for i in range(router_count)]},
+            'decap': {}, 'routers': router_L, 'links': link_L}
+
+
+if __name__ == '__main__':
+    if sys.argv[1] == '--ring':
+        with open(sys.argv[3], 'w') as f:
+            json.dump(ring(int(sys.argv[2])), f)
+    else:
+        spec = read(sys.argv[1])
+        start = time.perf_counter()
+        topo = build(spec)
+        print('%s built in %.3f seconds' % (topo, time.perf_counter() - start))
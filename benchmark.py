@@ -0,0 +1,79 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+## runs the benchmark of every simulation variant in its own process and collects the JSON reports
+# usage: python benchmark.py [-n packets] [--des] [--binary] [--output results.json]
+# Each variant runs in a separate process so that its CPU time and peak RSS are measured in isolation.
+
+## the directories holding a benchmark.py, with the options they support
+variant_L = [('Data-plane', {'binary'}),
+             ('control_plane', {'binary'}),
+             ('MPLS', {'binary'})]
+
+## columns of the summary table: (report key, heading, width, format)
+column_L = [('variant', 'variant', -14, '%s'),
+            ('mode', 'mode', -8, '%s'),
+            ('wire_format', 'format', -7, '%s'),
+            ('packets_delivered', 'delivered', 10, '%d'),
+            ('packets_per_sec', 'pkts/s', 10, '%.0f'),
+            ('bytes_per_sec', 'bytes/s', 12, '%.0f'),
+            ('latency_p50', 'p50 (ms)', 9, '%.3f'),
+            ('latency_p99', 'p99 (ms)', 9, '%.3f'),
+            ('cpu_time', 'cpu (s)', 8, '%.3f'),
+            ('peak_rss_kib', 'rss (KiB)', 10, '%d')]
+
+
+## run the benchmark of one variant
+# @param directory: directory of the variant, relative to this file
+# @param option_L: command line options for its benchmark.py
+# @return the parsed report
+def run_variant(directory, option_L):
+    cwd = os.path.join(os.path.dirname(os.path.abspath(__file__)), directory)
+    out = subprocess.run([sys.executable, 'benchmark.py'] + option_L, cwd=cwd,
+                         stdout=subprocess.PIPE, check=True, universal_newlines=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+## format one report as a row of the summary table, or the headings if None
+def row(result_D=None):
+    cell_L = []
+    for key, heading, width, fmt in column_L:
+        if result_D is None:
+            cell_S = heading
+        elif result_D.get(key) is None:
+            cell_S = '-'
+        else:
+            value = result_D[key]
+            if key.startswith('latency'):
+                value *= 1000
+            cell_S = fmt % value
+        cell_L.append('%*s' % (width, cell_S))
+    return ' '.join(cell_L)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark all simulation variants')
+    parser.add_argument('-n', '--packets', type=int, default=1000, help='number of packets to send')
+    parser.add_argument('--des', action='store_true', help='run on the discrete-event engine instead of threads')
+    parser.add_argument('--binary', action='store_true', help='use the binary wire format where supported')
+    parser.add_argument('--output', help='write the reports to this JSON file')
+    args = parser.parse_args()
+
+    result_L = []
+    for directory, supported_S in variant_L:
+        option_L = ['-n', str(args.packets)]
+        if args.des:
+            option_L.append('--des')
+        if args.binary and 'binary' in supported_S:
+            option_L.append('--binary')
+        result_L.append(run_variant(directory, option_L))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result_L, f, indent=2, sort_keys=True)
+    print(row())
+    for result_D in result_L:
+        print(row(result_D))
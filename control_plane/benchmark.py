@@ -0,0 +1,55 @@
+import bench
+import eventlog
+import topology
+from convergence import ConvergenceDetector
+
+## drives packets through the part 3 network (routers RA-RD) once the routing tables converged, and reports JSON
+# usage: python benchmark.py [-n packets] [--payload bytes] [--des] [--binary]
+
+##configuration parameters
+router_queue_size = 0 #0 means unlimited
+router_batch_size = 8 #max packets a router drains from each interface per pass
+convergence_time = 2 #longest time given to the routing updates to converge when running on threads
+
+
+## build the network of simulation_3.py from topology_3.json
+# @param wire_format: encoding of the routing updates
+# @return (list of network objects, router starting the routing updates, list of (source host, destination))
+def build(wire_format):
+    topo = topology.load('topology_3.json', max_queue_size=router_queue_size, batch_size=router_batch_size,
+                         wire_format=wire_format)
+    flow_L = [(topo.node('H1'), 'H3'), (topo.node('H2'), 'H3')]
+    return topo.object_L, topo.node('RA'), flow_L
+
+
+if __name__ == '__main__':
+    args = bench.parse_args('Throughput and latency of the control_plane part 3 network')
+    eventlog.set_level(eventlog.INFO if args.log else eventlog.OFF)
+    wire_format = 'binary' if args.binary else 'string'
+    object_L, router_a, flow_L = build(wire_format)
+    recorder = bench.Recorder()
+    for o in object_L:
+        if hasattr(o, 'receive_callback'):
+            o.receive_callback = recorder.deliver
+
+    ## send packet seq, alternating between the flows
+    def send(seq):
+        host, dst = flow_L[seq % len(flow_L)]
+        host.udt_send(dst, recorder.payload(seq, args.payload))
+
+    # the wire format applies to the routing updates, data packets always use the string encoding
+    config_D = {'mode': 'des' if args.des else 'threads', 'wire_format': wire_format, 'payload': args.payload}
+    if args.des:
+        sim = bench.simulator(object_L)
+        router_a.send_routes(2) #one update starts the routing process
+        sim.run()
+        result_D = bench.measure('control_plane', lambda: bench.run_des(sim, send, args.packets), recorder, config_D)
+    else:
+        thread_L = bench.start_threads(object_L)
+        router_a.send_routes(2)
+        ConvergenceDetector(object_L).wait(convergence_time)
+        run = lambda: bench.run_threads(send, recorder, args.packets, args.window, args.timeout)
+        result_D = bench.measure('control_plane', run, recorder, config_D)
+        bench.stop_threads(object_L, thread_L)
+    eventlog.flush()
+    bench.report(result_D)
@@ -0,0 +1,73 @@
+import time
+
+
+## Detects when the routing of a network has converged
+# The network is quiet when no packet is queued on any interface, no router
+# has a routing update or shortest path computation pending, and no router
+# sent an update or changed its table since the previous check. wait() polls
+# the network once per round and returns once it has been quiet for a full
+# round, so threaded simulations need not sleep for a fixed time. Messages,
+# bytes and the time of the last table change are counted from the creation
+# of the detector (or the last call to start()).
+class ConvergenceDetector:
+
+    ##@param object_L: hosts, routers and link layer of the network, others are ignored
+    # @param clock: source of the current time, the virtual clock when event driven
+    # @param round_time: seconds between two checks of the network
+    def __init__(self, object_L, clock=time.monotonic, round_time=0.05):
+        self.router_L = [o for o in object_L if hasattr(o, 'table_version')]
+        self.intf_L = [intf for o in object_L for intf in getattr(o, 'intf_L', [])]
+        self.clock = clock
+        self.round_time = round_time
+        self.start()
+
+    ## called when printing the object
+    def __str__(self):
+        return 'ConvergenceDetector of %d routers' % len(self.router_L)
+
+    ## restart the counts, e.g. before changing a link cost
+    def start(self):
+        self.start_time = self.clock()
+        self.base_D = {router: self.counters(router) for router in self.router_L}
+
+    ## counters of a router that change with routing activity
+    @staticmethod
+    def counters(router):
+        return router.updates_sent, router.update_bytes, router.table_version
+
+    ## whether no packet is queued and no routing work is pending
+    def idle(self):
+        return (all(intf.in_queue.empty() and intf.out_queue.empty() for intf in self.intf_L) and
+                all(router.update_due is None for router in self.router_L))
+
+    ## wait until the network has been quiet for a full round
+    # @param timeout: maximum seconds to wait
+    # @return report(), with 'converged' False if the timeout expired first
+    def wait(self, timeout=10):
+        deadline = time.monotonic() + timeout
+        last = None
+        while time.monotonic() < deadline:
+            state = [self.counters(router) for router in self.router_L] if self.idle() else None
+            if state is not None and state == last:
+                return self.report()
+            last = state
+            time.sleep(self.round_time)
+        return self.report(converged=False)
+
+    ## routing activity since start()
+    # @param converged: whether the network was found quiet, reported as is
+    # @return {'converged', 'messages', 'bytes', 'time'}, time being the seconds
+    #     from start() to the last routing table change, 0 if none changed
+    def report(self, converged=True):
+        messages = 0
+        byte_count = 0
+        changed = self.start_time
+        for router in self.router_L:
+            sent, sent_bytes, version = self.counters(router)
+            base_sent, base_bytes, base_version = self.base_D[router]
+            messages += sent - base_sent
+            byte_count += sent_bytes - base_bytes
+            if version != base_version:
+                changed = max(changed, router.table_changed)
+        return {'converged': converged, 'messages': messages, 'bytes': byte_count,
+                'time': changed - self.start_time}
@@ -0,0 +1,164 @@
+from registry import nodes
+
+
+## Incremental distance vector (Bellman-Ford) routing state of one router
+# The last vector advertised by every neighbor is kept, together with the
+# best cost and the neighbor it goes through (the argmin) for every
+# destination. An advertisement is compared against the previous vector of
+# the same neighbor and only the destinations whose advertised cost changed
+# are reconsidered: a cheaper offer replaces the best route directly, and
+# only a route that got worse through its current next hop is recomputed
+# over all neighbors. An update therefore costs O(changes * neighbors) in
+# the worst case instead of O(table size).
+# The vector advertised to a neighbor can leave out (split horizon) or
+# advertise as unreachable (poisoned reverse) the routes through that
+# neighbor, and costs are capped at a finite infinity, so that loops after a
+# link got worse or failed die out instead of counting to infinity.
+# Nodes are identified by their ids in the node registry.
+class DistanceVector:
+    ## cost of an unreachable destination
+    infinity = float('inf')
+    ## routes through a neighbor are advertised to it as they are
+    no_horizon = 'none'
+    ## routes through a neighbor are not advertised to it
+    split_horizon = 'split'
+    ## routes through a neighbor are advertised to it at infinity
+    poisoned_reverse = 'poison'
+
+    ##@param name: name of the router
+    # @param cost_D: cost table to neighbors {neighbor: {interface: cost}}
+    # @param horizon: no_horizon, split_horizon or poisoned_reverse
+    # @param infinity: cost from which a destination is unreachable, finite for poisoned reverse
+    def __init__(self, name, cost_D, horizon=no_horizon, infinity=infinity):
+        if horizon == self.poisoned_reverse and infinity == float('inf'):
+            raise ValueError('%s: poisoned reverse needs a finite infinity' % name)
+        self.name = name
+        self.id = nodes.intern(name)
+        self.horizon = horizon
+        self.infinity = infinity
+        self.link_D = {}  # {neighbor: (cost, interface)} over the cheapest interface
+        for neighbor, intf_D in cost_D.items():
+            intf = min(intf_D, key=intf_D.get)
+            self.link_D[nodes.intern(neighbor)] = (intf_D[intf], intf)
+        self.vector_D = {neighbor: {} for neighbor in self.link_D}  # {neighbor: {destination: cost}} last advertised
+        self.dist_D = {self.id: 0}  # {destination: best cost}
+        self.via_D = {self.id: None}  # {destination: neighbor on the best route}
+        self.through_D = {neighbor: set() for neighbor in self.link_D}  # {neighbor: destinations routed through it}
+        for neighbor in self.link_D:
+            self.recompute(neighbor)
+
+    ## called when printing the object
+    def __str__(self):
+        return 'DistanceVector_%s' % self.name
+
+    ## cost of reaching a destination through a neighbor
+    # @return the cost, capped at infinity
+    def offer(self, neighbor, dest):
+        if dest == neighbor:
+            cost = self.link_D[neighbor][0]
+        else:
+            cost = self.vector_D[neighbor].get(dest)
+            if cost is None:
+                return self.infinity
+            cost += self.link_D[neighbor][0]
+        return cost if cost < self.infinity else self.infinity
+
+    ## outgoing interface and cost of the best route to a destination
+    # @return (interface, cost), or None if the destination is unreachable or this router
+    def route(self, dest):
+        via = self.via_D.get(dest)
+        if via is None:
+            return None
+        return self.link_D[via][1], self.dist_D[dest]
+
+    ## the vector to advertise to a neighbor
+    # Only the routes through the neighbor are looked at: without any, or
+    # without a horizon, the best costs are returned as they are, not copied.
+    # @param neighbor: id of the neighbor, None for the best costs
+    # @return {destination: cost}
+    def vector(self, neighbor=None):
+        through_S = self.through_D.get(neighbor)
+        if not through_S or self.horizon == self.no_horizon:
+            return self.dist_D
+        if self.horizon == self.split_horizon:
+            return {dest: cost for dest, cost in self.dist_D.items() if dest not in through_S}
+        vector_D = self.dist_D.copy()
+        vector_D.update(dict.fromkeys(through_S, self.infinity))
+        return vector_D
+
+    ## recompute the best route to a destination over all neighbors
+    # @return True if its cost or next hop changed
+    def recompute(self, dest):
+        if dest == self.id:
+            return False
+        best, via = self.infinity, None
+        for neighbor in self.link_D:
+            cost = self.offer(neighbor, dest)
+            if cost < best:
+                best, via = cost, neighbor
+        return self.set_best(dest, best, via)
+
+    ## record the best route to a destination
+    # @return True if its cost or next hop changed
+    def set_best(self, dest, cost, via):
+        old_via = self.via_D.get(dest)
+        if via is None:
+            if dest not in self.dist_D:
+                return False
+            del self.dist_D[dest]
+            del self.via_D[dest]
+            self.through_D[old_via].discard(dest)
+            return True
+        if self.dist_D.get(dest) == cost and old_via == via:
+            return False
+        self.dist_D[dest] = cost
+        self.via_D[dest] = via
+        if old_via != via:
+            if old_via is not None:
+                self.through_D[old_via].discard(dest)
+            self.through_D[via].add(dest)
+        return True
+
+    ## reconsider a destination after the offer of one neighbor changed
+    # @return True if its cost or next hop changed
+    def reconsider(self, neighbor, dest):
+        if dest == self.id:
+            return False
+        cost = self.offer(neighbor, dest)
+        best = self.dist_D.get(dest, self.infinity)
+        if self.via_D.get(dest) == neighbor:
+            if cost <= best:
+                return self.set_best(dest, cost, neighbor)
+            return self.recompute(dest)  # the current route got worse, look for a better one
+        if cost < best:
+            return self.set_best(dest, cost, neighbor)
+        return False
+
+    ## process a vector advertised by a neighbor
+    # @param neighbor: id of the advertising neighbor
+    # @param vector_D: its costs {destination: cost}, destinations left out are unreachable
+    # @return the destinations whose best route changed
+    def update(self, neighbor, vector_D):
+        old_D = self.vector_D[neighbor]
+        self.vector_D[neighbor] = vector_D
+        changed_S = set()
+        for dest, cost in vector_D.items():
+            if old_D.get(dest) != cost and self.reconsider(neighbor, dest):
+                changed_S.add(dest)
+        for dest in old_D:
+            if dest not in vector_D and self.reconsider(neighbor, dest):
+                changed_S.add(dest)
+        return changed_S
+
+    ## change the cost of the link to a neighbor
+    # @param neighbor: id of the neighbor
+    # @param cost: new link cost, infinity for a failed link
+    # @return the destinations whose best route changed
+    def set_link_cost(self, neighbor, cost):
+        intf = self.link_D[neighbor][1]
+        self.link_D[neighbor] = (cost, intf)
+        changed_S = set()
+        for dest in [neighbor] + list(self.vector_D[neighbor]):
+            if self.reconsider(neighbor, dest):
+                changed_S.add(dest)
+        return changed_S
@@ -0,0 +1,178 @@
+from distance_vector import DistanceVector
+from registry import nodes
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+## Distance vector routing state kept in a NumPy cost matrix
+# The last vector advertised by every neighbor is a row of a matrix
+# (neighbors x destinations), and the cost of the link to every neighbor an
+# array. Destinations get matrix columns in the order they are first heard
+# of, so the matrix grows with the destinations a router knows rather than
+# with the node ids of the whole process. An advertisement replaces the row
+# of its neighbor, and the best route to every destination whose advertised
+# cost changed is recomputed with one vectorized min and argmin over the
+# link costs plus the matching columns, instead of a Python loop over the
+# destinations. The current next
+# hop is kept when another neighbor offers the same cost, as DistanceVector
+# does, so both produce the same tables. Costs must be integers; unreachable
+# destinations are held as a large sentinel cost.
+# The best routes are also kept in the dicts of DistanceVector (dist_D,
+# via_D, through_D), which are only updated for the destinations that
+# changed, so routers use both classes the same way.
+class MatrixDistanceVector(DistanceVector):
+    ## matrix cost of an unreachable destination, the sum of two still fits in 64 bits
+    unreachable = 1 << 61
+
+    ##@param name: name of the router
+    # @param cost_D: cost table to neighbors {neighbor: {interface: cost}}
+    # @param horizon: no_horizon, split_horizon or poisoned_reverse
+    # @param infinity: cost from which a destination is unreachable, finite for poisoned reverse
+    def __init__(self, name, cost_D, horizon=DistanceVector.no_horizon, infinity=DistanceVector.infinity):
+        if numpy is None:
+            raise ImportError('%s: the matrix distance vector needs numpy' % name)
+        if horizon == self.poisoned_reverse and infinity == float('inf'):
+            raise ValueError('%s: poisoned reverse needs a finite infinity' % name)
+        self.name = name
+        self.id = nodes.intern(name)
+        self.horizon = horizon
+        self.infinity = infinity
+        self.cap = self.unreachable if infinity == float('inf') else int(infinity)  # first unreachable matrix cost
+        self.link_D = {}  # {neighbor: (cost, interface)} over the cheapest interface
+        for neighbor, intf_D in cost_D.items():
+            intf = min(intf_D, key=intf_D.get)
+            self.link_D[nodes.intern(neighbor)] = (intf_D[intf], intf)
+        self.neighbor_L = list(self.link_D)  # neighbor ids in matrix row order
+        self.row_D = {neighbor: row for row, neighbor in enumerate(self.neighbor_L)}  # {neighbor: matrix row}
+        self.link_A = numpy.array([self.matrix_cost(cost) for cost, _ in self.link_D.values()], numpy.int64)
+        self.adv_M = numpy.full((len(self.neighbor_L), 0), self.unreachable, numpy.int64)  # advertised costs
+        self.best_A = numpy.full(0, self.unreachable, numpy.int64)  # best cost per column
+        self.via_A = numpy.full(0, -1, numpy.int64)  # row of the next hop per column, -1 for none
+        self.col_D = {}  # {destination: matrix column}
+        self.dest_A = numpy.full(0, -1, numpy.int64)  # destination of every column
+        self.vector_D = {neighbor: {} for neighbor in self.link_D}  # {neighbor: {destination: cost}} last advertised
+        self.dist_D = {self.id: 0}  # {destination: best cost}
+        self.via_D = {self.id: None}  # {destination: neighbor on the best route}
+        self.through_D = {neighbor: set() for neighbor in self.link_D}  # {neighbor: destinations routed through it}
+        self.columns([self.id])  # column 0, never relaxed
+        col_A = self.columns(self.neighbor_L)
+        self.adv_M[numpy.arange(len(col_A)), col_A] = 0  # a neighbor is reached over its link
+        self.relax(col_A)
+
+    ## called when printing the object
+    def __str__(self):
+        return 'MatrixDistanceVector_%s' % self.name
+
+    ## the matrix cost of a link cost
+    def matrix_cost(self, cost):
+        return int(cost) if cost < self.cap else self.unreachable
+
+    ## the matrix columns of destinations, giving new destinations the next free columns
+    # @param dest_L: destination ids
+    # @return array of their columns
+    def columns(self, dest_L):
+        col_D = self.col_D
+        col_L = []
+        new_L = []
+        for dest in dest_L:
+            col = col_D.get(dest)
+            if col is None:
+                col = col_D[dest] = len(col_D)
+                new_L.append(dest)
+            col_L.append(col)
+        if new_L:
+            self.reserve(len(col_D))
+            self.dest_A[len(col_D) - len(new_L):len(col_D)] = new_L
+        return numpy.array(col_L, numpy.int64)
+
+    ## grow the matrix to hold a number of columns, doubling them
+    def reserve(self, size):
+        old = self.adv_M.shape[1]
+        if size <= old:
+            return
+        new = max(size, 2 * old)
+        adv_M = numpy.full((len(self.neighbor_L), new), self.unreachable, numpy.int64)
+        adv_M[:, :old] = self.adv_M
+        self.adv_M = adv_M
+        self.best_A = numpy.concatenate((self.best_A, numpy.full(new - old, self.unreachable, numpy.int64)))
+        self.via_A = numpy.concatenate((self.via_A, numpy.full(new - old, -1, numpy.int64)))
+        self.dest_A = numpy.concatenate((self.dest_A, numpy.full(new - old, -1, numpy.int64)))
+
+    ## recompute the best routes to some destinations over all neighbors
+    # @param col_A: array of matrix columns of the destinations
+    # @return the destinations whose cost or next hop changed
+    def relax(self, col_A):
+        col_A = col_A[col_A != 0]  # column of the router itself
+        if not len(col_A) or not len(self.neighbor_L):
+            return set()
+        total_M = self.adv_M[:, col_A] + self.link_A[:, None]
+        best_A = total_M.min(axis=0)
+        via_A = total_M.argmin(axis=0)
+        # keep the current next hop when it offers the best cost and did not get worse, otherwise take
+        # the first best neighbor, as DistanceVector.reconsider() does
+        old_via_A = self.via_A[col_A]
+        old_best_A = self.best_A[col_A]
+        via_cost_A = total_M[numpy.maximum(old_via_A, 0), numpy.arange(len(col_A))]
+        keep_A = (old_via_A >= 0) & (via_cost_A == best_A) & (via_cost_A <= old_best_A)
+        via_A = numpy.where(keep_A, old_via_A, via_A)
+        lost_A = best_A >= self.cap
+        best_A[lost_A] = self.unreachable
+        via_A[lost_A] = -1
+        changed_A = (best_A != old_best_A) | (via_A != old_via_A)
+        col_A, best_A, via_A, old_via_A = col_A[changed_A], best_A[changed_A], via_A[changed_A], old_via_A[changed_A]
+        self.best_A[col_A] = best_A
+        self.via_A[col_A] = via_A
+        dest_A = self.dest_A[col_A]
+        self.copy_routes(dest_A, best_A, via_A, old_via_A)
+        return set(dest_A.tolist())
+
+    ## copy changed best routes into dist_D, via_D and through_D, in bulk per neighbor
+    # @param dest_A: destination ids
+    # @param best_A: their new costs
+    # @param via_A: their new next hop rows, -1 for unreachable
+    # @param old_via_A: their previous next hop rows
+    def copy_routes(self, dest_A, best_A, via_A, old_via_A):
+        lost_A = via_A < 0
+        for dest in dest_A[lost_A].tolist():
+            self.dist_D.pop(dest, None)
+            self.via_D.pop(dest, None)
+        reach_A = ~lost_A
+        reach_L = dest_A[reach_A].tolist()
+        neighbor_L = self.neighbor_L
+        self.dist_D.update(zip(reach_L, best_A[reach_A].tolist()))
+        self.via_D.update(zip(reach_L, [neighbor_L[via] for via in via_A[reach_A].tolist()]))
+        moved_A = via_A != old_via_A
+        for row, neighbor in enumerate(neighbor_L):
+            through_S = self.through_D[neighbor]
+            through_S.difference_update(dest_A[moved_A & (old_via_A == row)].tolist())
+            through_S.update(dest_A[moved_A & (via_A == row)].tolist())
+
+    ## process a vector advertised by a neighbor
+    # @param neighbor: id of the advertising neighbor
+    # @param vector_D: its costs {destination: cost}, destinations left out are unreachable
+    # @return the destinations whose best route changed
+    def update(self, neighbor, vector_D):
+        row = self.row_D[neighbor]
+        self.vector_D[neighbor] = vector_D
+        col_A = self.columns(vector_D)
+        cost_A = numpy.fromiter(vector_D.values(), numpy.int64, len(vector_D))
+        row_A = numpy.full(self.adv_M.shape[1], self.unreachable, numpy.int64)
+        row_A[col_A] = cost_A
+        row_A[self.col_D[neighbor]] = 0
+        changed_A = numpy.flatnonzero(row_A != self.adv_M[row])
+        self.adv_M[row] = row_A
+        return self.relax(changed_A)
+
+    ## change the cost of the link to a neighbor
+    # @param neighbor: id of the neighbor
+    # @param cost: new link cost, infinity for a failed link
+    # @return the destinations whose best route changed
+    def set_link_cost(self, neighbor, cost):
+        intf = self.link_D[neighbor][1]
+        self.link_D[neighbor] = (cost, intf)
+        row = self.row_D[neighbor]
+        self.link_A[row] = self.matrix_cost(cost)
+        return self.relax(numpy.flatnonzero(self.adv_M[row] < self.unreachable))
@@ -0,0 +1,117 @@
+import heapq
+import itertools
+import threading
+
+
+## Discrete-event simulation engine with a virtual clock
+# Nodes (hosts, routers) and links plug in as event handlers: each exposes
+# attach_wakeup(callback), which registers callback to be invoked whenever a
+# packet is put into one of the queues the object consumes, and step(), which
+# processes all pending work and returns the virtual time at which it wants to
+# run again (or None if it only needs to run on packet arrival).
+class Simulator:
+
+    def __init__(self):
+        self.now = 0.0  # the virtual clock
+        self.event_q = []  # heap of (time, sequence, handler, args)
+        self.seq = itertools.count()  # tie breaker keeping same-time events FIFO
+        self.pending = {}  # {handler: time} for coalesced handler wakeups
+        self.events_processed = 0
+
+    ## called when printing the object
+    def __str__(self):
+        return 'Simulator'
+
+    ## current virtual time, used as a drop-in replacement for time.time()
+    def clock(self):
+        return self.now
+
+    ## run handler(*args) after delay units of virtual time
+    # @param delay: virtual time from now until the event fires
+    # @param handler: callable to invoke
+    def schedule(self, delay, handler, *args):
+        self.schedule_at(self.now + delay, handler, *args)
+
+    ## run handler(*args) at virtual time t
+    # @param t: absolute virtual time, clamped to now if in the past
+    # @param handler: callable to invoke
+    def schedule_at(self, t, handler, *args):
+        heapq.heappush(self.event_q, (max(t, self.now), next(self.seq), handler, args))
+
+    ## schedule a node handler once at virtual time t, coalescing repeated wakeups
+    # @param handler: step() of a node or link
+    # @param t: absolute virtual time, defaults to now
+    def wake(self, handler, t=None):
+        t = self.now if t is None else max(t, self.now)
+        scheduled = self.pending.get(handler)
+        if scheduled is not None and scheduled <= t:
+            return  # already due to run no later than t
+        self.pending[handler] = t
+        heapq.heappush(self.event_q, (t, next(self.seq), handler, None))
+
+    ## register a node (or link) as an event handler
+    # @param node: object exposing attach_wakeup() and step()
+    def add_node(self, node):
+        if hasattr(node, 'clock'):
+            node.clock = self.clock
+        handler = node.step
+        node.attach_wakeup(lambda: self.wake(handler))
+        # let the node pick up anything enqueued before it was attached
+        self.wake(handler)
+
+    ## register every link of a link layer as an event handler
+    # @param link_layer: LinkLayer whose links should be driven by events
+    def add_link_layer(self, link_layer):
+        for link in link_layer.link_L:
+            self.add_node(link)
+
+    ## process events in time order
+    # @param until: stop once the next event is later than this virtual time
+    # @return the virtual time of the last processed event
+    def run(self, until=None):
+        while self.event_q:
+            t, _, handler, args = self.event_q[0]
+            if until is not None and t > until:
+                break
+            heapq.heappop(self.event_q)
+            if args is None:
+                if self.pending.get(handler) != t:
+                    continue  # superseded by an earlier wakeup
+                del self.pending[handler]
+            self.now = t
+            self.events_processed += 1
+            if args is None:
+                next_t = handler()
+                if next_t is not None:
+                    self.wake(handler, next_t)
+            else:
+                handler(*args)
+        return self.now
+
+
+## Readiness notification for threaded nodes
+# Interfaces signal it on put (through attach_wakeup), so a node thread can
+# sleep until at least one of its queues has work instead of polling them.
+class Readiness:
+    ## how often a sleeping thread wakes up to check its stop flag
+    poll_interval = 0.1
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.ready = False
+
+    ## signal that work is available, safe to call from any thread
+    def notify(self):
+        with self.cond:
+            self.ready = True
+            self.cond.notify()
+
+    ## block until notified or until the timeout expires
+    # @param timeout: maximum seconds to sleep, defaults to poll_interval
+    def wait(self, timeout=None):
+        if timeout is None or timeout > self.poll_interval:
+            timeout = self.poll_interval
+        with self.cond:
+            if not self.ready and timeout > 0:
+                self.cond.wait(timeout)
+            self.ready = False
@@ -1,5 +1,9 @@
 import queue
 import threading
+from event_sim import Readiness
+from eventlog import get_log
+
+link_log = get_log('link')
 
 
 ## An abstraction of a link between router interfaces
@@ -15,7 +19,7 @@ class Link:
         self.node_1_intf = node_1_intf
         self.node_2 = node_2
         self.node_2_intf = node_2_intf
-        print('Created link %s' % self.__str__())
+        link_log.info('Created link %s', self)
 
     ## called when printing the object
     def __str__(self):
@@ -34,13 +38,25 @@ class Link:
             # otherwise transmit the packet
             try:
                 intf_b.put(pkt_S, 'in')
-                print('%s: direction %s-%s -> %s-%s: transmitting packet "%s"' % \
-                      (self, node_a, node_a_intf, node_b, node_b_intf, pkt_S))
+                link_log.info('%s: direction %s-%s -> %s-%s: transmitting packet "%s"',
+                              self, node_a, node_a_intf, node_b, node_b_intf, pkt_S)
             except queue.Full:
-                print('%s: direction %s-%s -> %s-%s: packet lost' % \
-                      (self, node_a, node_a_intf, node_b, node_b_intf))
+                link_log.error('%s: direction %s-%s -> %s-%s: packet lost',
+                               self, node_a, node_a_intf, node_b, node_b_intf)
                 pass
 
+    ## register a callback to be notified when a packet is queued for this link
+    # @param callback: function without arguments, e.g. an event scheduler wakeup
+    def attach_wakeup(self, callback):
+        self.node_1.intf_L[self.node_1_intf].out_wakeup = callback
+        self.node_2.intf_L[self.node_2_intf].out_wakeup = callback
+
+    ## event handler: transmit everything queued on the link in both directions
+    def step(self):
+        while not (self.node_1.intf_L[self.node_1_intf].out_queue.empty() and
+                   self.node_2.intf_L[self.node_2_intf].out_queue.empty()):
+            self.tx_pkt()
+
 
 ## An abstraction of the link layer
 class LinkLayer:
@@ -65,11 +81,17 @@ class LinkLayer:
 
     ## thread target for the network to keep transmitting data across links
     def run(self):
-        print(threading.currentThread().getName() + ': Starting')
+        link_log.info('%s: Starting', threading.currentThread().getName())
+        ready = Readiness()
+        for link in self.link_L:
+            link.attach_wakeup(ready.notify)
         while True:
-            # transfer one packet on all the links
-            self.transfer()
+            # transfer all queued packets on all the links
+            for link in self.link_L:
+                link.step()
             # terminate
             if self.stop:
-                print(threading.currentThread().getName() + ': Ending')
-                return
\ No newline at end of file
+                link_log.info('%s: Ending', threading.currentThread().getName())
+                return
+            # sleep until a packet is queued on any link
+            ready.wait()
\ No newline at end of file
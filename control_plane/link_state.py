@@ -0,0 +1,127 @@
+import heapq
+from registry import nodes
+from route_advert import newer
+
+
+## Link-state routing state of one router
+# Every router floods a link-state advertisement (LSA) listing its neighbors
+# and link costs, numbered with a sequence number that grows with every
+# change. The newest LSA of every router is kept in the link-state database,
+# and the shortest paths from this router are computed over it with
+# Dijkstra's algorithm on a heap. A new LSA only triggers a new computation
+# when it can change the shortest path tree: a link that got cheaper or
+# appeared must offer a shorter path to its far end, and a link that got
+# more expensive or disappeared must be on the tree.
+# Nodes are identified by their ids in the node registry.
+class LinkState:
+    ## cost of an unreachable destination
+    infinity = float('inf')
+
+    ##@param name: name of the router
+    # @param cost_D: cost table to neighbors {neighbor: {interface: cost}}
+    def __init__(self, name, cost_D):
+        self.name = name
+        self.id = nodes.intern(name)
+        self.link_D = {}  # {neighbor: (cost, interface)} over the cheapest interface
+        for neighbor, intf_D in cost_D.items():
+            intf = min(intf_D, key=intf_D.get)
+            self.link_D[nodes.intern(neighbor)] = (intf_D[intf], intf)
+        self.lsdb_D = {}  # {origin: (sequence number, {neighbor: cost})}, the link-state database
+        self.dist_D = {self.id: 0}  # {destination: cost of the shortest path}
+        self.via_D = {self.id: None}  # {destination: neighbor of the first hop}
+        self.parent_D = {self.id: None}  # {destination: previous node on the shortest path}
+        self.dirty = False  # whether the database changed the shortest path tree since the last spf()
+        self.originate()
+        self.spf()
+
+    ## called when printing the object
+    def __str__(self):
+        return 'LinkState_%s' % self.name
+
+    ## outgoing interface and cost of the best route to a destination
+    # @return (interface, cost), or None if the destination is unreachable or this router
+    def route(self, dest):
+        via = self.via_D.get(dest)
+        if via is None:
+            return None
+        return self.link_D[via][1], self.dist_D[dest]
+
+    ## the LSA of this router
+    # @return (sequence number, {neighbor: cost})
+    def lsa(self):
+        return self.lsdb_D[self.id]
+
+    ## renew the LSA of this router from its current link costs
+    # @return the new LSA (sequence number, {neighbor: cost})
+    def originate(self):
+        seq = self.lsdb_D[self.id][0] + 1 if self.id in self.lsdb_D else 1
+        adj_D = {neighbor: cost for neighbor, (cost, _) in self.link_D.items() if cost < self.infinity}
+        self.install(self.id, seq, adj_D)
+        return self.lsdb_D[self.id]
+
+    ## store an LSA in the database if it is newer than the one held
+    # @param origin: id of the router that originated the LSA
+    # @param seq: its sequence number
+    # @param adj_D: its link costs {neighbor: cost}
+    # @return True if the LSA was new, and is to be flooded further
+    def install(self, origin, seq, adj_D):
+        old = self.lsdb_D.get(origin)
+        if old is not None and not newer(seq, old[0]):
+            return False
+        self.lsdb_D[origin] = (seq, adj_D)
+        if not self.dirty:
+            self.dirty = self.affects(origin, {} if old is None else old[1], adj_D)
+        return True
+
+    ## whether replacing the links of a router can change the shortest path tree
+    # @param origin: id of the router
+    # @param old_D: its previous link costs {neighbor: cost}
+    # @param new_D: its new link costs {neighbor: cost}
+    def affects(self, origin, old_D, new_D):
+        base = self.dist_D.get(origin, self.infinity)
+        for neighbor, cost in new_D.items():
+            old = old_D.get(neighbor)
+            if (old is None or cost < old) and base + cost < self.dist_D.get(neighbor, self.infinity):
+                return True
+        for neighbor, cost in old_D.items():
+            if new_D.get(neighbor, self.infinity) > cost and self.parent_D.get(neighbor) == origin:
+                return True
+        return False
+
+    ## compute the shortest paths from this router over the database (Dijkstra)
+    # @return the destinations whose cost or first hop changed
+    def spf(self):
+        dist_D = {self.id: 0}
+        via_D = {self.id: None}
+        parent_D = {self.id: None}
+        done_S = set()
+        heap = [(0, self.id)]
+        while heap:
+            dist, node = heapq.heappop(heap)
+            if node in done_S:
+                continue
+            done_S.add(node)
+            lsa = self.lsdb_D.get(node)
+            if lsa is None:
+                continue  # hosts, and routers not heard from yet, are leaves
+            for neighbor, cost in lsa[1].items():
+                new_dist = dist + cost
+                if new_dist < dist_D.get(neighbor, self.infinity):
+                    dist_D[neighbor] = new_dist
+                    via_D[neighbor] = neighbor if node == self.id else via_D[node]
+                    parent_D[neighbor] = node
+                    heapq.heappush(heap, (new_dist, neighbor))
+        changed_S = {dest for dest in dist_D.keys() | self.dist_D.keys()
+                     if dist_D.get(dest) != self.dist_D.get(dest) or via_D.get(dest) != self.via_D.get(dest)}
+        self.dist_D, self.via_D, self.parent_D = dist_D, via_D, parent_D
+        self.dirty = False
+        return changed_S
+
+    ## change the cost of the link to a neighbor and renew the LSA of this router
+    # @param neighbor: id of the neighbor
+    # @param cost: new link cost, infinity for a failed link
+    # @return the new LSA (sequence number, {neighbor: cost})
+    def set_link_cost(self, neighbor, cost):
+        intf = self.link_D[neighbor][1]
+        self.link_D[neighbor] = (cost, intf)
+        return self.originate()
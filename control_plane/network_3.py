@@ -1,6 +1,18 @@
-from collections import defaultdict, OrderedDict
 import queue
 import threading
+import time
+from array import array
+from distance_vector import DistanceVector
+from event_sim import Readiness
+from link_state import LinkState
+from registry import HOST, ROUTER, nodes
+import dv_matrix
+import eventlog
+import route_advert
+
+host_log = eventlog.get_log('host')
+router_log = eventlog.get_log('router')
+routing_log = eventlog.get_log('routing')
 
 
 ## wrapper class for a queue of packets
@@ -9,6 +21,8 @@ class Interface:
     def __init__(self, maxsize=0):
         self.in_queue = queue.Queue(maxsize)
         self.out_queue = queue.Queue(maxsize)
+        self.in_wakeup = None  # callback notifying the node of a new incoming packet
+        self.out_wakeup = None  # callback notifying the link of a new outgoing packet
 
     ##get packet from the queue interface
     # @param in_or_out - use 'in' or 'out' interface
@@ -35,9 +49,45 @@ class Interface:
         if in_or_out == 'out':
             # print('putting packet in the OUT queue')
             self.out_queue.put(pkt, block)
+            if self.out_wakeup is not None:
+                self.out_wakeup()
         else:
             # print('putting packet in the IN queue')
             self.in_queue.put(pkt, block)
+            if self.in_wakeup is not None:
+                self.in_wakeup()
+
+    ##get up to max_count packets from the queue interface at once
+    # Holds the queue.Queue lock once for the batch and pops from its deque, as queue.Queue.get() does per packet.
+    # @param in_or_out - use 'in' or 'out' interface
+    # @param max_count - the maximum number of packets to return
+    def get_batch(self, in_or_out, max_count):
+        q = self.in_queue if in_or_out == 'in' else self.out_queue
+        with q.mutex:
+            pkt_L = [q.queue.popleft() for _ in range(min(max_count, len(q.queue)))]
+            if pkt_L:
+                q.not_full.notify(len(pkt_L))
+        return pkt_L
+
+    ##put several packets into the interface queue, notifying the consumer once
+    # Without a bound, appends to the deque of the queue.Queue under its lock and keeps its task count and
+    # condition as queue.Queue.put() does.
+    # @param pkt_L - Packets to be inserted into the queue in order
+    # @param in_or_out - use 'in' or 'out' interface
+    # @param block - if True, block until room in queue, if False may throw queue.Full exception
+    def put_batch(self, pkt_L, in_or_out, block=False):
+        q = self.in_queue if in_or_out == 'in' else self.out_queue
+        if q.maxsize > 0:
+            for pkt in pkt_L:  # respect the queue bound packet by packet
+                q.put(pkt, block)
+        else:
+            with q.mutex:
+                q.queue.extend(pkt_L)
+                q.unfinished_tasks += len(pkt_L)
+                q.not_empty.notify(len(pkt_L))
+        wakeup = self.out_wakeup if in_or_out == 'out' else self.in_wakeup
+        if wakeup is not None:
+            wakeup()
 
 
 ## Implements a network layer packet.
@@ -48,7 +98,7 @@ class NetworkPacket:
 
     ##@param dst: address of the destination host
     # @param data_S: packet payload
-    # @param prot_S: upper layer protocol for the packet (data, or control)
+    # @param prot_S: upper layer protocol for the packet (data, control, or lsa for link-state advertisements)
     def __init__(self, dst, prot_S, data_S):
         self.dst = dst
         self.data_S = data_S
@@ -65,6 +115,8 @@ class NetworkPacket:
             byte_S += '1'
         elif self.prot_S == 'control':
             byte_S += '2'
+        elif self.prot_S == 'lsa':
+            byte_S += '3'
         else:
             raise ('%s: unknown prot_S option: %s' % (self, self.prot_S))
         byte_S += self.data_S
@@ -74,12 +126,14 @@ class NetworkPacket:
     # @param byte_S: byte string representation of the packet
     @classmethod
     def from_byte_S(self, byte_S):
-        dst = byte_S[0: NetworkPacket.dst_S_length].strip('0')
+        dst = byte_S[0: NetworkPacket.dst_S_length].lstrip('0')
         prot_S = byte_S[NetworkPacket.dst_S_length: NetworkPacket.dst_S_length + NetworkPacket.prot_S_length]
         if prot_S == '1':
             prot_S = 'data'
         elif prot_S == '2':
             prot_S = 'control'
+        elif prot_S == '3':
+            prot_S = 'lsa'
         else:
             raise ('%s: unknown prot_S field: %s' % (self, prot_S))
         data_S = byte_S[NetworkPacket.dst_S_length + NetworkPacket.prot_S_length:]
@@ -92,8 +146,10 @@ class Host:
     ##@param addr: address of this node represented as an integer
     def __init__(self, addr):
         self.addr = addr
+        nodes.intern(addr, HOST)
         self.intf_L = [Interface()]
         self.stop = False  # for thread termination
+        self.receive_callback = None  # called with the data of every received packet, e.g. by a benchmark
 
     ## called when printing the object
     def __str__(self):
@@ -104,27 +160,43 @@ class Host:
     # @param data_S: data being transmitted to the network layer
     def udt_send(self, dst, data_S):
         p = NetworkPacket(dst, 'data', data_S)
-        print('%s: sending packet "%s"' % (self, p))
+        host_log.info('%s: sending packet "%s"', self, p)
         self.intf_L[0].put(p.to_byte_S(), 'out')  # send packets always enqueued successfully
 
     ## receive packet from the network layer
     def udt_receive(self):
         pkt_S = self.intf_L[0].get('in')
         if pkt_S is not None:
-            print('%s: received packet "%s"' % (self, pkt_S))
+            host_log.info('%s: received packet "%s"', self, pkt_S)
+            if self.receive_callback is not None:
+                self.receive_callback(NetworkPacket.from_byte_S(pkt_S).data_S)
             if self.addr == 'H2':
                 self.udt_send('H1', 'This is a response')
 
+    ## register a callback to be notified when a packet arrives
+    # @param callback: function without arguments, e.g. an event scheduler wakeup
+    def attach_wakeup(self, callback):
+        self.intf_L[0].in_wakeup = callback
+
+    ## event handler: receive everything that has arrived
+    def step(self):
+        while not self.intf_L[0].in_queue.empty():
+            self.udt_receive()
+
     ## thread target for the host to keep receiving data
     def run(self):
-        print(threading.currentThread().getName() + ': Starting')
+        host_log.info('%s: Starting', threading.currentThread().getName())
+        ready = Readiness()
+        self.attach_wakeup(ready.notify)
         while True:
             # receive data arriving to the in interface
-            self.udt_receive()
+            self.step()
             # terminate
             if (self.stop):
-                print(threading.currentThread().getName() + ': Ending')
+                host_log.info('%s: Ending', threading.currentThread().getName())
                 return
+            # sleep until a packet arrives
+            ready.wait()
 
 
 ## Implements a multi-interface router
@@ -133,47 +205,101 @@ class Router:
     ##@param name: friendly router name for debugging
     # @param cost_D: cost table to neighbors {neighbor: {interface: cost}}
     # @param max_queue_size: max queue length (passed to Interface)
-    def __init__(self, name, cost_D, max_queue_size):
+    # @param batch_size: max packets drained from each interface per pass
+    # @param fairness_cap: max packets processed per pass over all interfaces, None for no cap
+    # @param wire_format: 'string' for the original routing updates or 'binary' for the compact ones of route_advert
+    # @param hold_down: seconds during which route changes are collected before they are acted upon, 0 acts at once
+    # @param routing: 'dv' for distance vector or 'ls' for link-state routing
+    # @param horizon: distance vector routes through a neighbor are advertised to it as they are ('none'),
+    #     left out ('split') or at infinity ('poison')
+    # @param infinity: distance vector cost from which a destination is unreachable
+    # @param dv_backend: distance vector routes kept in dicts ('dict') or in a NumPy cost matrix ('numpy'),
+    #     which falls back to 'dict' if numpy is not installed
+    def __init__(self, name, cost_D, max_queue_size, batch_size=1, fairness_cap=None, wire_format='string',
+                 hold_down=0, routing='dv', horizon='none', infinity=DistanceVector.infinity, dv_backend='dict'):
         self.stop = False  # for thread termination
         self.name = name
+        self.clock = time.monotonic  # source of the current time, replaced by a virtual clock when event driven
+        self.binary = wire_format == 'binary'
+        self.hold_down = hold_down
+        self.update_due = None  # time at which the pending route changes are acted upon, None if there are none
+        self.wakeup = None  # callback from attach_wakeup(), run when an update is scheduled
+        self.sent_D = {}  # {interface: vector last sent on it}, the view the neighbor has of this router
+        self.updates_sent = 0  # routing updates sent
+        self.updates_suppressed = 0  # routing updates not sent because the neighbor already had the vector
+        self.update_bytes = 0  # bytes of the routing updates sent
+        self.table_version = 0  # incremented whenever the routing table changes
+        self.table_changed = None  # time of the last routing table change
+        self.seq = 0  # sequence number of the last binary routing update sent
+        self.seq_D = {}  # {neighbor id: sequence number of its last binary routing update}
+        self.batch_size = batch_size
+        self.fairness_cap = fairness_cap
+        self.first_intf = 0  # interface served first in the next pass, rotated for fairness
         # create a list of interfaces
         self.intf_L = [Interface(max_queue_size) for _ in range(len(cost_D))]
         # save neighbors and interfaces on which we connect to them
         self.cost_D = cost_D  # {neighbor: {interface: cost}}
-        self.total_rt = defaultdict(dict)
-
-        self.rt_tbl_D = cost_D.copy()
-
-        print("routing table in constructor: ", self.rt_tbl_D)
-        print('%s: Initialized routing table' % self)
+        self.id = nodes.intern(name, ROUTER)
+        # routing state, either neighbor vectors and best routes or the link-state database and shortest paths
+        self.dv = None
+        if routing == 'dv':
+            if dv_backend == 'numpy' and dv_matrix.numpy is None:
+                routing_log.info('%s: numpy is not installed, keeping the distance vector routes in dicts', name)
+                dv_backend = 'dict'
+            dv_class = dv_matrix.MatrixDistanceVector if dv_backend == 'numpy' else DistanceVector
+            self.dv = dv_class(name, cost_D, horizon, infinity)
+        self.ls = LinkState(name, cost_D) if routing == 'ls' else None
+        self.lsa_flooded = False  # whether the LSA of this router was sent to all neighbors
+        # routing and forwarding table, flat arrays indexed by destination id, filled on first use by fill_routes()
+        self.route_intf_L = array('i')  # outgoing interface, -1 without a route
+        self.route_cost_L = []  # cost, None without a route
+        self.routes_filled = False  # whether the flat tables hold the routes
+        self.sync_routes((self.dv or self.ls).dist_D)
+
+        if routing_log.enabled(eventlog.DEBUG):
+            routing_log.debug('routing table in constructor: %s', repr(self.rt_tbl_D))
+        routing_log.info('%s: Initialized routing table', self)
         self.print_routes()
 
+    ## routing table {destination: {interface: cost}}, built from the flat tables
+    @property
+    def rt_tbl_D(self):
+        if not self.routes_filled:
+            self.fill_routes()
+        name_L = nodes.name_L
+        cost_L = self.route_cost_L
+        return {name_L[dest]: {intf: cost_L[dest]} for dest, intf in enumerate(self.route_intf_L) if intf >= 0}
+
     ## Print routing table
+    # The table is logged as one event, formatted now as the routes may change.
     def print_routes(self):
-
-        print('\n%s: sending packet' % (self))
+        if not routing_log.enabled(eventlog.INFO):
+            return
+        rt_tbl_D = self.rt_tbl_D
+        line_L = ['\n%s: sending packet' % (self)]
 
         # for horizontal edges
         horizontal_edge = '+==='
-        for i in range(len(self.rt_tbl_D.keys())):
+        for i in range(len(rt_tbl_D.keys())):
             horizontal_edge += '+==='
         horizontal_edge += '+'
-        print(horizontal_edge)
+        line_L.append(horizontal_edge)
 
         # for header (destinations)
         header = '|' + self.name + ' |'
-        for dest in self.rt_tbl_D.keys():
+        for dest in rt_tbl_D.keys():
             header += dest + ' |'
-        print(header)
-        print(horizontal_edge)
+        line_L.append(header)
+        line_L.append(horizontal_edge)
 
         # for routers costs at destinations
         interior = '|' + self.name + ' | '
-        for value in self.rt_tbl_D.values():
+        for value in rt_tbl_D.values():
             for y in value.values():
                 interior += str(y) + ' | '
-        print(interior)
-        print(horizontal_edge, '\n')
+        line_L.append(interior)
+        line_L.append(horizontal_edge + ' \n')
+        routing_log.info('\n'.join(line_L))
 
     ## called when printing the object
     def __str__(self):
@@ -181,133 +307,374 @@ class Router:
 
     ## look through the content of incoming interfaces and
     # process data and control packets
+    # Up to batch_size packets are drained from each interface per pass, and
+    # the data packets of a batch are forwarded together without being parsed.
     def process_queues(self):
-        for i in range(len(self.intf_L)):
-            pkt_S = None
-            # get packet from interface i
-            pkt_S = self.intf_L[i].get('in')
-            # if packet exists make a forwarding decision
-            if pkt_S is not None:
+        intf_count = len(self.intf_L)
+        budget = self.fairness_cap
+        first = self.first_intf
+        self.first_intf = (first + 1) % intf_count
+        for i in [(first + n) % intf_count for n in range(intf_count)]:
+            batch_size = self.batch_size if budget is None else min(self.batch_size, budget)
+            if batch_size <= 0:
+                break
+            # get packets from interface i
+            pkt_L = self.intf_L[i].get_batch('in', batch_size)
+            if budget is not None:
+                budget -= len(pkt_L)
+            data_L = []
+            for pkt_S in pkt_L:
+                if data_L and (isinstance(pkt_S, bytes) or pkt_S[NetworkPacket.dst_S_length] != '1'):
+                    # forward the data packets that arrived before a routing update on the routes they found
+                    self.forward_packets(data_L, i)
+                    data_L = []
+                if isinstance(pkt_S, bytes):  # binary routing update or LSA
+                    if self.ls is not None:
+                        self.update_lsa_binary(pkt_S, i)
+                    else:
+                        self.update_routes_binary(pkt_S, i)
+                    continue
+                if pkt_S[NetworkPacket.dst_S_length] == '1':  # data packet
+                    data_L.append(pkt_S)
+                    continue
                 p = NetworkPacket.from_byte_S(pkt_S)  # parse a packet out
-                if p.prot_S == 'data':
-                    self.forward_packet(p, i)
-                elif p.prot_S == 'control':
+                if p.prot_S == 'control':
                     self.update_routes(p, i)
+                elif p.prot_S == 'lsa':
+                    self.update_lsa(p, pkt_S, i)
                 else:
                     raise Exception('%s: Unknown packet type in packet %s' % (self, p))
+            if data_L:
+                self.forward_packets(data_L, i)
 
-    ## forward the packet according to the routing table
+    ## forward the packet according to the forwarding table
     #  @param p Packet to forward
     #  @param i Incoming interface number for packet p
     def forward_packet(self, p, i):
-        try:
-            # looks up the destination using the routing table
-            route = self.rt_tbl_D.get(str(p.dst))
-
-            # looks up which interface to forward to
-            for interface, cost, in route.items():
-                print("interface,", interface, "cost,", cost, "Route:", route)
-                to_forward = int(interface)
-                break
-            self.intf_L[to_forward].put(p.to_byte_S(), 'out', True)
-            print('%s: forwarding packet "%s" from interface %d to %d' % \
-                  (self, p, i, 1))
-        except queue.Full:
-            print('%s: packet "%s" lost on interface %d' % (self, p, i))
-            pass
-
-    ## send out route update
-    # @param i Interface number on which to send out a routing update
-    def send_routes(self, i):  # encoding, name///Node/Link/cost//node/link/cost//....
+        self.forward_packets([p.to_byte_S()], i)
+
+    ## forward encoded packets according to the forwarding table, enqueuing
+    # the packets for an interface together
+    # Only the destination is read from a packet, and the packet is passed on
+    # as it arrived.
+    #  @param pkt_L Encoded packets to forward
+    #  @param i Incoming interface number for the packets
+    def forward_packets(self, pkt_L, i):
+        if not self.routes_filled:
+            self.fill_routes()
+        id_D = nodes.id_D
+        route_intf_L = self.route_intf_L
+        dst_S_length = NetworkPacket.dst_S_length
+        log = router_log.enabled(eventlog.INFO)
+        out_D = {}  # {outgoing interface: [packets]}
+        for pkt_S in pkt_L:
+            dest = id_D.get(pkt_S[:dst_S_length].lstrip('0'))
+            to_forward = route_intf_L[dest] if dest is not None and dest < len(route_intf_L) else -1
+            if to_forward < 0:
+                router_log.error('%s: no route for packet "%s" from interface %d', self, pkt_S, i)
+                continue
+            out_D.setdefault(to_forward, []).append(pkt_S)
+            if log:
+                router_log.info('%s: forwarding packet "%s" from interface %d to %d', self, pkt_S, i, to_forward)
+        for to_forward, pkt_L in out_D.items():
+            try:
+                self.intf_L[to_forward].put_batch(pkt_L, 'out', True)
+            except queue.Full:
+                router_log.error('%s: packets lost on interface %d', self, to_forward)
+                pass
+
+    ## encode a routing update, or the LSA of this router in link-state mode, in the wire format of this router
+    # @param vector_D: distance vector {destination: cost} to advertise, the best costs if None
+    # @return str of a control packet, or bytes of a binary routing update
+    def encode_routes(self, vector_D=None):
+        if self.ls is not None:
+            seq, adj_D = self.ls.lsa()
+            if self.binary:
+                return route_advert.encode(self.id, seq, adj_D)
+            # encoding, origin///seq///neighbor/cost//neighbor/cost//....
+            name_L = nodes.name_L
+            lsa_S = self.name + "///" + str(seq) + "///" + ''.join(
+                name_L[neighbor] + "/" + str(cost) + "//" for neighbor, cost in adj_D.items())
+            return NetworkPacket(0, 'lsa', lsa_S).to_byte_S()
+        if vector_D is None:
+            vector_D = self.dv.vector()
+        if self.binary:
+            self.seq += 1
+            return route_advert.encode(self.id, self.seq, vector_D)
+        # encoding, name///Node/Link/cost//node/link/cost//....
         # string more message in packet
         routing_table = self.name + "///"
-        # iterate through dictionary for router, neighbor and cost
-        for k, v in self.rt_tbl_D.items():
-            for neighbor, cost in v.items():
-                # Encodes the string so we can separate route
-                # from neighbor and cost, and distinguish routes with a slash
-                routing_table += str(k) + "/" + str(neighbor) + "/" + str(cost) + "//"
-                print(k, neighbor, cost)
+        # iterate through the vector for router, neighbor and cost
+        if not self.routes_filled:
+            self.fill_routes()
+        name_L = nodes.name_L
+        for k, cost in vector_D.items():
+            if k == self.id:
+                continue
+            neighbor = self.route_intf_L[k]
+            # Encodes the string so we can separate route
+            # from neighbor and cost, and distinguish routes with a slash
+            routing_table += name_L[k] + "/" + str(neighbor) + "/" + str(cost) + "//"
+            routing_log.debug('%s %s %s', name_L[k], neighbor, cost)
         # create a routing table update packet
-        p = NetworkPacket(0, 'control', routing_table)
+        return NetworkPacket(0, 'control', routing_table).to_byte_S()
+
+    ## send out route update
+    # @param i Interface number on which to send out a routing update
+    # @param pkt_S: encoded update from encode_routes(), encoded now if None
+    # @return True if the update was enqueued
+    def send_routes(self, i, pkt_S=None):
+        if pkt_S is None:
+            pkt_S = self.encode_routes()
         try:
-            print('%s: sending routing update "%s" from interface %d' % (self, p, i))
-            self.intf_L[i].put(p.to_byte_S(), 'out', True)
+            routing_log.info('%s: sending routing update "%s" from interface %d', self, pkt_S, i)
+            self.intf_L[i].put(pkt_S, 'out', True)
+            self.updates_sent += 1
+            self.update_bytes += len(pkt_S)
+            return True
         except queue.Full:
-            print('%s: packet "%s" lost on interface %d' % (self, p, i))
-            pass
-
-        ## forward the packet according to the routing table
-        #  @param p Packet containing routing information
+            router_log.error('%s: packet "%s" lost on interface %d', self, pkt_S, i)
+            return False
+
+    ## send the routing table to all neighboring routers
+    # The vector of every neighbor leaves out or poisons the routes through
+    # it as set by the horizon. Neighbors that get the full vector share one
+    # copy and one encoded packet, and neighbors that were last sent the same
+    # vector are skipped.
+    def send_routes_to_neighbors(self):
+        full_D = None  # copy of the best costs, as they change with later updates
+        full_pkt_S = None
+        for neighbor, interface in self.router_links():
+            vector_D = self.dv.vector(neighbor)
+            full = vector_D is self.dv.dist_D
+            if full:
+                if full_D is None:
+                    full_D = dict(vector_D)
+                vector_D = full_D
+            if self.sent_D.get(interface) == vector_D:
+                self.updates_suppressed += 1
+                continue
+            if not full:
+                pkt_S = self.encode_routes(vector_D)
+            else:
+                if full_pkt_S is None:
+                    full_pkt_S = self.encode_routes(vector_D)
+                pkt_S = full_pkt_S
+            if self.send_routes(interface, pkt_S):
+                self.sent_D[interface] = vector_D
+
+    ## interfaces to the neighboring routers, as recorded in the node registry
+    # @return list of (neighbor id, interface)
+    def router_links(self):
+        id_D = nodes.id_D
+        return [(id_D[neighbor], interface) for neighbor, intf_D in self.cost_D.items()
+                if not nodes.is_host(id_D[neighbor]) for interface in intf_D]
+
+    ## send a routing update to the neighboring routers, or in link-state mode
+    # recompute the shortest paths, once route changes are due
+    def flush_routes(self):
+        self.update_due = None
+        if self.ls is not None:
+            self.sync_routes(self.ls.spf())
+        else:
+            self.send_routes_to_neighbors()
+
+    ## act on changed routes: notify the neighboring routers, or in link-state mode recompute the shortest paths
+    # With a hold down, the first change opens a window during which further
+    # changes are collected, and they are all acted upon at once when the
+    # window closes.
+    def schedule_routes(self):
+        if self.hold_down <= 0:
+            self.flush_routes()
+        elif self.update_due is None:
+            self.update_due = self.clock() + self.hold_down
+            if self.wakeup is not None:
+                self.wakeup()  # let the event loop or the thread pick up the deadline
+
+    ## copy the best routes to some destinations into the routing and forwarding tables
+    # @param dest_L: ids of the destinations whose routes changed
+    def sync_routes(self, dest_L):
+        if not dest_L:
+            return
+        self.table_version += 1
+        self.table_changed = self.clock()
+        if self.routes_filled:
+            self.copy_routes(dest_L)
+
+    ## fill the routing and forwarding tables with every best route, on their first use
+    # A router is built with empty tables, as sizing them for the ids of its
+    # neighbors would give every router of a large topology a table for every
+    # node before any route is looked up.
+    def fill_routes(self):
+        self.routes_filled = True
+        self.copy_routes((self.dv or self.ls).dist_D)
+
+    ## write the best routes to some destinations into the flat tables
+    # @param dest_L: ids of the destinations
+    def copy_routes(self, dest_L):
+        if not dest_L:
+            return
+        routing = self.dv or self.ls
+        intf_L = self.route_intf_L
+        cost_L = self.route_cost_L
+        missing = max(dest_L) + 1 - len(intf_L)
+        if missing > 0:  # make room up to the highest destination written
+            intf_L.extend([-1] * missing)
+            cost_L.extend([None] * missing)
+        for dest in dest_L:
+            route = routing.route(dest)
+            if route is None:
+                intf_L[dest] = -1
+                cost_L[dest] = None
+            else:
+                intf_L[dest], cost_L[dest] = route
 
+    ## process a routing update from a neighbor
+    # Only the destinations whose advertised cost changed since the last
+    # update of this neighbor are reconsidered, and the neighbors are only
+    # notified if a best route changed.
+    #  @param p Packet containing routing information
+    #  @param i Incoming interface number for packet p
     def update_routes(self, p, i):
-        # Initialize to false, as we haven't updated yet
-        updated = False
         # we decode the packet
+        intern = nodes.intern
         table = p.data_S.split("///")
-        name_table = table[0]
-        routes = table[1].split("//")
-        # Splits up the info of a route
-        for route in routes:
+        neighbor = intern(table[0])
+        vector_D = {}  # {destination id: cost}
+        for route in table[1].split("//"):
             if route != '':
                 node = route.split("/")
-
-            # Adds to global table
-            self.total_rt[name_table][node[0]] = [int(node[2])]
-
-            # Check if node is current router, if so, set distance & skip
-            if node[0] == self.name:
-                # Grabs the interface of the neighbor
-                inf = list(self.cost_D[name_table].keys())
-                # Distance of the new node to neighbor and distance from neighbor to node
-                self.rt_tbl_D[node[0]] = {int(inf[0]): 0}
-                # Adds to global table
-                self.total_rt[self.name][node[0]] = [0]
-
-                continue
-
-            # Checks if the node is not already in the table or not a neighbor
-            if node[0] not in self.cost_D and node[0] not in self.rt_tbl_D:
-
-                # Grabs the distance of the neighbor
-                n = list(self.cost_D[name_table].values())
-                # Grabs the interface of the neighbor
-                inf = list(self.cost_D[name_table].keys())
-                # Distance to new node
-                self.rt_tbl_D[node[0]] = {int(inf[0]): int(node[2]) + n[0]}
-                # Adds to global table
-                self.total_rt[self.name][node[0]] = [int(node[2]) + n[0]]
-                # We have now updated the list
-                updated = True
-
-            elif node[0] not in self.cost_D and node[0] in self.rt_tbl_D:
-                # Grabs the distance of the neighbor
-                n = list(self.cost_D[name_table].values())
-                # Gets the interface of that neighbor
-                inf = list(self.cost_D[name_table].keys())
-                # Gets the current distance
-                curr = list(self.rt_tbl_D[node[0]].values())
-                # Checks if the current distance is greater than the new distance
-                if curr[0] > int(n[0]) + int(node[2]):
-                    self.rt_tbl_D[node[0]] = {int(inf[0]): int(node[2]) + n[0]}
-                    # Adds to global table
-                    self.total_rt[self.name][node[0]] = [int(node[2]) + n[0]]
-                    # List has been updated
-                    updated = True
-
+                vector_D[intern(node[0])] = int(node[2])
+        self.apply_routes(neighbor, vector_D, i)
+
+    ## process a binary routing update from a neighbor
+    # Updates that are not newer than the last one received from the same
+    # neighbor are dropped, comparing sequence numbers that wrap with route_advert.newer().
+    #  @param pkt_B bytes of the update, see route_advert
+    #  @param i Incoming interface number of the update
+    def update_routes_binary(self, pkt_B, i):
+        neighbor, seq, vector_D = route_advert.decode(pkt_B)
+        if neighbor in self.seq_D and not route_advert.newer(seq, self.seq_D[neighbor]):
+            routing_log.info('%s: dropping stale routing update %d from %s on interface %d', self, seq,
+                             nodes.name_L[neighbor], i)
+            return
+        self.seq_D[neighbor] = seq
+        self.apply_routes(neighbor, vector_D, i)
+
+    ## apply the vector advertised by a neighbor, notifying the neighbors if a best route changed
+    #  @param neighbor id of the advertising neighbor
+    #  @param vector_D its costs {destination id: cost}
+    #  @param i Incoming interface number of the update
+    def apply_routes(self, neighbor, vector_D, i):
+        if neighbor not in self.dv.link_D:
+            routing_log.error('%s: routing update from unknown neighbor %s on interface %d', self,
+                              nodes.name_L[neighbor], i)
+            return
+        changed_S = self.dv.update(neighbor, vector_D)
         # Notifies neighbor's if we have updated
-        if updated:
-            for neighbor_name, neighbor_info in self.cost_D.items():
-                for interface, cost in neighbor_info.items():
-                    # Checks if the neighbor is a host
-                    if 'H' not in neighbor_name:
-                        self.send_routes(interface)
+        if changed_S:
+            self.sync_routes(changed_S)
+            self.schedule_routes()
+
+    ## send the routes of this router, or its LSA in link-state mode, to all neighboring routers, e.g. to start the routing
+    def advertise(self):
+        if self.ls is not None:
+            self.lsa_flooded = True
+            self.flood_lsa(self.encode_routes())
+        else:
+            self.send_routes_to_neighbors()
+
+    ## send an LSA to all neighboring routers
+    # @param pkt_S: the encoded LSA
+    # @param in_intf: interface the LSA arrived on, which it is not sent back to
+    def flood_lsa(self, pkt_S, in_intf=None):
+        for neighbor, interface in self.router_links():
+            if interface != in_intf:
+                self.send_routes(interface, pkt_S)
+
+    ## process a link-state advertisement
+    # @param p Packet containing the LSA
+    # @param pkt_S the packet as received, flooded on unchanged
+    # @param i Incoming interface number for packet p
+    def update_lsa(self, p, pkt_S, i):
+        intern = nodes.intern
+        origin, seq_S, adj_S = p.data_S.split("///")
+        adj_D = {}  # {neighbor id: cost}
+        for link in adj_S.split("//"):
+            if link != '':
+                neighbor, cost_S = link.split("/")
+                adj_D[intern(neighbor)] = int(cost_S)
+        self.apply_lsa(intern(origin), int(seq_S), adj_D, pkt_S, i)
+
+    ## process a binary link-state advertisement, see route_advert
+    # @param pkt_B bytes of the LSA, flooded on unchanged
+    # @param i Incoming interface number of the LSA
+    def update_lsa_binary(self, pkt_B, i):
+        origin, seq, adj_D = route_advert.decode(pkt_B)
+        self.apply_lsa(origin, seq, adj_D, pkt_B, i)
+
+    ## store a new LSA, flood it on and schedule the shortest path computation if it matters
+    # The first LSA received also makes this router flood its own.
+    # @param origin id of the router that originated the LSA
+    # @param seq its sequence number
+    # @param adj_D its link costs {neighbor id: cost}
+    # @param pkt_S the LSA as received
+    # @param i Incoming interface number of the LSA
+    def apply_lsa(self, origin, seq, adj_D, pkt_S, i):
+        if not self.ls.install(origin, seq, adj_D):
+            routing_log.debug('%s: dropping old LSA %d of %s on interface %d', self, seq, nodes.name_L[origin], i)
+            return
+        self.flood_lsa(pkt_S, i)
+        if not self.lsa_flooded:
+            self.lsa_flooded = True
+            self.flood_lsa(self.encode_routes())
+        if self.ls.dirty:
+            self.schedule_routes()
+
+    ## change the cost of the link to a neighbor and notify the neighbors if routes changed
+    # @param neighbor: name of the neighbor
+    # @param cost: new link cost, DistanceVector.infinity for a failed link
+    def set_link_cost(self, neighbor, cost):
+        for interface in self.cost_D[neighbor]:
+            self.cost_D[neighbor][interface] = cost
+        neighbor_id = nodes.id_D[neighbor]
+        if self.ls is not None:
+            self.ls.set_link_cost(neighbor_id, cost)
+            self.lsa_flooded = True
+            self.flood_lsa(self.encode_routes())
+            if self.ls.dirty:
+                self.schedule_routes()
+            return
+        changed_S = self.dv.set_link_cost(neighbor_id, cost)
+        if changed_S:
+            self.sync_routes(changed_S)
+            self.schedule_routes()
+
+    ## register a callback to be notified when a packet arrives on any interface
+    # @param callback: function without arguments, e.g. an event scheduler wakeup
+    def attach_wakeup(self, callback):
+        self.wakeup = callback
+        for intf in self.intf_L:
+            intf.in_wakeup = callback
+
+    ## event handler: process everything that has arrived and send the routing update once it is due
+    # @return the time at which the pending routing update is due, or None
+    def step(self):
+        while any(not intf.in_queue.empty() for intf in self.intf_L):
+            self.process_queues()
+        if self.update_due is not None and self.update_due <= self.clock():
+            self.flush_routes()
+        return self.update_due
 
     ## thread target for the host to keep forwarding data
     def run(self):
-        print(threading.currentThread().getName() + ': Starting')
+        router_log.info('%s: Starting', threading.currentThread().getName())
+        ready = Readiness()
+        self.attach_wakeup(ready.notify)
         while True:
-            self.process_queues()
+            update_due = self.step()
             if self.stop:
-                print(threading.currentThread().getName() + ': Ending')
-                return
\ No newline at end of file
+                router_log.info('%s: Ending', threading.currentThread().getName())
+                return
+            # sleep until a packet arrives on any interface or the routing update is due
+            ready.wait(None if update_due is None else update_due - self.clock())
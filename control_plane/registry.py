@@ -0,0 +1,56 @@
+import threading
+
+## kinds of nodes
+HOST = 0
+ROUTER = 1
+
+
+## Interns node names as small integers
+# Ids are handed out in the order names are first seen, so encodings that
+# refer to nodes by id (e.g. binary routing updates) are only meaningful
+# between nodes sharing the registry, which is the case within a simulation.
+# The kind of a node (HOST or ROUTER) is recorded by the node itself, or by
+# whoever knows it first, and is None until then.
+class NodeRegistry:
+
+    def __init__(self):
+        self.id_D = {}  # {name: id}
+        self.name_L = []  # names indexed by id
+        self.kind_L = []  # kinds indexed by id
+        self.lock = threading.Lock()  # guards new ids, lookups do not lock
+
+    ## called when printing the object
+    def __str__(self):
+        return 'NodeRegistry with %d nodes' % len(self.name_L)
+
+    ## number of interned names
+    def __len__(self):
+        return len(self.name_L)
+
+    ## the id of a name, assigning the next free id to a new name
+    # @param kind: HOST or ROUTER to record the kind of the node, None if not known
+    def intern(self, name, kind=None):
+        node_id = self.id_D.get(name)
+        if node_id is None:
+            with self.lock:
+                node_id = self.id_D.get(name)
+                if node_id is None:
+                    node_id = len(self.name_L)
+                    self.name_L.append(name)
+                    self.kind_L.append(kind)
+                    self.id_D[name] = node_id
+        if kind is not None:
+            self.kind_L[node_id] = kind
+        return node_id
+
+    ## the name of an id
+    def name(self, node_id):
+        return self.name_L[node_id]
+
+    ## whether an id is that of a host, nodes of unknown kind are taken for routers
+    def is_host(self, node_id):
+        return self.kind_L[node_id] == HOST
+
+
+## registry shared by the nodes of this process
+nodes = NodeRegistry()
@@ -0,0 +1,81 @@
+import struct
+import sys
+from array import array
+
+
+## Binary distance vector advertisements
+# Layout: a header with the sequence number, the id of the sender, the
+# number of entries and the sizes in bytes (1, 2 or 4) of the destination ids
+# and of the costs, then the destination ids and then the costs, each as an
+# array of unsigned integers in network byte order. Nodes are identified by
+# their ids in the node registry and costs must be integers. Both arrays are
+# converted with one array or bytes operation each, so no per entry encoding
+# or parsing is done in Python.
+header = struct.Struct('!IIIBB')
+## array type codes of unsigned integers of 1, 2 and 4 bytes
+typecode_D = {1: 'B', 2: 'H', 4: 'I' if array('I').itemsize == 4 else 'L'}
+## sequence numbers are sent modulo 2**32
+seq_modulus = 1 << 32
+
+
+## the network byte order array of the narrowest unsigned integers, of 1, 2 or 4 bytes, holding a list
+# The narrower conversions stop at the first value that does not fit, which
+# is cheaper than looking for the largest value first.
+# @return (size in bytes of the integers, bytes of the array)
+def pack_array(value_L):
+    try:
+        return 1, bytes(value_L)
+    except ValueError:
+        pass
+    for size in (2, 4):
+        try:
+            values = array(typecode_D[size], value_L)
+        except OverflowError:
+            continue
+        if sys.byteorder == 'little':
+            values.byteswap()
+        return size, values.tobytes()
+    raise OverflowError('values must be unsigned integers below 2**32')
+
+
+## the values of a network byte order array of unsigned integers of a size
+# @return bytes for single byte values, else an array
+def unpack_array(data, size):
+    if size == 1:
+        return data
+    values = array(typecode_D[size])
+    values.frombytes(data)
+    if sys.byteorder == 'little':
+        values.byteswap()
+    return values
+
+
+## whether a sequence number is newer than another, in serial number arithmetic (RFC 1982)
+# Sequence numbers wrap at seq_modulus, so a number is newer when it is
+# ahead of the other by less than half the space.
+# @param seq: sequence number received
+# @param old: last sequence number accepted
+def newer(seq, old):
+    return 0 < (seq - old) % seq_modulus < seq_modulus >> 1
+
+
+## encode a distance vector as an advertisement
+# @param sender: id of the advertising router
+# @param seq: sequence number, increasing with every advertisement of the sender
+# @param vector_D: costs to the destinations {destination id: cost}, below 2**32
+# @return bytes of the advertisement
+def encode(sender, seq, vector_D):
+    id_size, ids = pack_array(list(vector_D))
+    cost_size, costs = pack_array(list(vector_D.values()))
+    return b''.join((header.pack(seq % seq_modulus, sender, len(vector_D), id_size, cost_size), ids, costs))
+
+
+## decode an advertisement
+# @param data: bytes of the advertisement
+# @return (sender id, sequence number, {destination id: cost})
+def decode(data):
+    seq, sender, count, id_size, cost_size = header.unpack_from(data)
+    cost_start = header.size + count * id_size
+    ids = unpack_array(data[header.size:cost_start], id_size)
+    costs = unpack_array(data[cost_start:cost_start + count * cost_size], cost_size)
+    return sender, seq, dict(zip(ids, costs))
@@ -0,0 +1,318 @@
+'''
+Sharded simulation of a part 3 topology over several processes.
+
+The routers of a topology are split into shards of neighboring routers,
+every host going with the router it is attached to, and every shard runs
+its nodes on its own discrete-event simulator in a worker process. A link
+between two shards is simulated by a ShardLink at each end, which passes the
+packets through a shared memory ring buffer to the other shard, where they
+arrive link_delay virtual seconds after they were sent.
+
+The shards are synchronized conservatively in time windows: all shards
+process their events up to the end of the window, exchange the packets sent
+over links between shards, and agree on the earliest pending event. As a
+packet takes link_delay to cross shards, a window ending less than
+link_delay after that event cannot miss any packet, and every shard processes
+its events in time order as a single simulator would. The simulation
+ends once no shard has events left.
+
+usage: python shard.py FILE [SHARDS] [--ls] [--binary] [--numpy]  (compare 1 and SHARDS shards on FILE)
+       --numpy keeps the distance vector routes in a NumPy cost matrix, after pip install numpy
+'''
+
+import multiprocessing
+import queue
+import struct
+import sys
+import threading
+import time
+import traceback
+import eventlog
+import topology
+from event_sim import Simulator
+from registry import HOST, ROUTER, nodes
+from shm_ring import ShmRing
+
+link_log = eventlog.get_log('link')
+
+##configuration parameters
+link_delay = 0.01  # virtual seconds a packet takes over a link between shards, the lookahead of the synchronization
+ring_capacity = 1 << 20  # bytes of the ring buffer from one shard to another
+route_hold_down = 0.1  # seconds a router collects route changes before acting on them, when run as a script
+poll_time = 0.5  # seconds between checks of the worker processes while waiting for their results
+
+## header of a packet crossing shards: arrival time, index of the link, 1 if the packet is bytes or 0 if str
+frame = struct.Struct('=dIB')
+
+
+## split the nodes of a topology description into shards
+# The routers are taken in breadth-first order over the links between them,
+# so that most neighbors end up in the same shard, and cut in shards of equal
+# size. Hosts go to the shard of a router they are linked to.
+# @param spec: topology description, see topology.py
+# @param shard_count: number of shards
+# @return {node name: shard}
+def partition(spec, shard_count):
+    router_L = [r['name'] for r in spec.get('routers', [])]
+    neighbor_D = {name: [] for name in router_L}
+    for l in spec.get('links', []):
+        name_1, name_2 = l['from'][0], l['to'][0]
+        if name_1 in neighbor_D and name_2 in neighbor_D:
+            neighbor_D[name_1].append(name_2)
+            neighbor_D[name_2].append(name_1)
+    order_L = []
+    seen_S = set()
+    for root in router_L:
+        if root in seen_S:
+            continue
+        seen_S.add(root)
+        order_L.append(root)
+        i = len(order_L) - 1
+        while i < len(order_L):
+            for neighbor in neighbor_D[order_L[i]]:
+                if neighbor not in seen_S:
+                    seen_S.add(neighbor)
+                    order_L.append(neighbor)
+            i += 1
+    part_D = {name: i * shard_count // len(order_L) for i, name in enumerate(order_L)}
+    for l in spec.get('links', []):
+        name_1, name_2 = l['from'][0], l['to'][0]
+        if name_1 in part_D and name_2 not in part_D:
+            part_D[name_2] = part_D[name_1]
+        elif name_2 in part_D and name_1 not in part_D:
+            part_D[name_1] = part_D[name_2]
+    for h in spec.get('hosts', []):
+        part_D.setdefault(h['addr'], 0)
+    return part_D
+
+
+## The end of a link to a node in another shard
+class ShardLink:
+
+    ##@param index: index of the link in the topology description
+    # @param node: local node
+    # @param intf: number of the interface on the local node
+    # @param remote: name of the node at the other end
+    # @param outbox_L: list collecting (arrival time, index, packet) for the shard of the remote node
+    def __init__(self, index, node, intf, remote, outbox_L):
+        self.index = index
+        self.node = node
+        self.intf = intf
+        self.remote = remote
+        self.outbox_L = outbox_L
+        self.clock = time.monotonic  # replaced by the virtual clock of the simulator
+
+    ## called when printing the object
+    def __str__(self):
+        return 'ShardLink %s-%d - %s' % (self.node, self.intf, self.remote)
+
+    ## register a callback to be notified when a packet is queued for this link
+    def attach_wakeup(self, callback):
+        self.node.intf_L[self.intf].out_wakeup = callback
+
+    ## event handler: pass everything queued on the link to the other shard
+    def step(self):
+        intf = self.node.intf_L[self.intf]
+        arrival = self.clock() + link_delay
+        while True:
+            pkt_S = intf.get('out')
+            if pkt_S is None:
+                return None
+            self.outbox_L.append((arrival, self.index, pkt_S))
+
+    ## event handler: a packet from the other shard arrives
+    def deliver(self, pkt_S):
+        try:
+            self.node.intf_L[self.intf].put(pkt_S, 'in')
+        except queue.Full:
+            link_log.error('%s: packet lost', self)
+
+
+## run one shard, the target of a worker process
+# @param shard: number of this shard
+# @param spec: topology description of the whole network
+# @param part_D: {node name: shard} from partition()
+# @param ring_D: {(from shard, to shard): name of the ring buffer}
+# @param barrier: multiprocessing.Barrier of all shards
+# @param next_A: shared array of the earliest pending event time of every shard
+# @param left_A: shared array of flags, set by the shards with packets left over from a full ring
+# @param option_D: options of topology.build()
+# @param kick: (router, interface) sending the first routing update, None for all routers to advertise
+# @param result_q: queue receiving the routing tables and counts of this shard, or its error
+def run_shard(shard, spec, part_D, ring_D, barrier, next_A, left_A, option_D, kick, result_q):
+    try:
+        simulate_shard(shard, spec, part_D, ring_D, barrier, next_A, left_A, option_D, kick, result_q)
+    except Exception as e:
+        # report the error, then break the barrier so that the other shards stop waiting for this one
+        result_q.put({'shard': shard, 'error': traceback.format_exc(),
+                      'broken': isinstance(e, threading.BrokenBarrierError)})
+        barrier.abort()
+        raise
+
+
+## simulate one shard and put its results on result_q, see run_shard()
+def simulate_shard(shard, spec, part_D, ring_D, barrier, next_A, left_A, option_D, kick, result_q):
+    start = time.perf_counter()
+    # intern the names in the same order in every shard, binary updates carry their ids, and record
+    # the kinds of the nodes simulated by other shards
+    host_S = {h['addr'] for h in spec.get('hosts', [])}
+    for name in sorted(part_D):
+        nodes.intern(name, HOST if name in host_S else ROUTER)
+    local_spec = dict(spec, hosts=[h for h in spec.get('hosts', []) if part_D[h['addr']] == shard],
+                      routers=[r for r in spec.get('routers', []) if part_D[r['name']] == shard])
+    topo = topology.build(local_spec, **option_D)
+    shard_count = len(next_A)
+    out_ring_D = {to: ShmRing(ring_D[shard, to]) for to in range(shard_count) if to != shard}
+    in_ring_L = [ShmRing(ring_D[other, shard]) for other in range(shard_count) if other != shard]
+    outbox_D = {to: [] for to in out_ring_D}  # {shard: [(arrival time, link index, packet)]}
+    shard_link_D = {}  # {link index: ShardLink}
+    sim = Simulator()
+    for o in topo.object_L:
+        if o is topo.link_layer:
+            sim.add_link_layer(o)
+        else:
+            sim.add_node(o)
+    for index, node, intf, remote in topo.external_L:
+        shard_link_D[index] = link = ShardLink(index, node, intf, remote, outbox_D[part_D[remote]])
+        sim.add_node(link)
+    if kick is None:
+        for router in topo.router_D.values():
+            router.advertise()
+    elif kick[0] in topo.router_D:
+        topo.router_D[kick[0]].send_routes(kick[1])
+
+    window_count = 0
+    end = 0.0  # the first window runs the events at time 0
+    while True:
+        sim.run(until=end)
+        window_count += 1
+        # exchange the packets sent to other shards, in rounds if rings are full
+        while True:
+            for to, outbox_L in outbox_D.items():
+                msg_L = [frame.pack(t, index, isinstance(pkt_S, bytes)) +
+                         (pkt_S if isinstance(pkt_S, bytes) else pkt_S.encode())
+                         for t, index, pkt_S in outbox_L]
+                del outbox_L[:out_ring_D[to].put(msg_L)]
+            left_A[shard] = any(outbox_D.values())
+            barrier.wait()
+            for ring in in_ring_L:
+                for msg in ring.get():
+                    t, index, binary = frame.unpack_from(msg)
+                    pkt_S = msg[frame.size:] if binary else msg[frame.size:].decode()
+                    sim.schedule_at(t, shard_link_D[index].deliver, pkt_S)
+            left = any(left_A)
+            barrier.wait()
+            if not left:
+                break
+        # the next window ends less than link_delay after the earliest event of all shards
+        next_A[shard] = sim.event_q[0][0] if sim.event_q else float('inf')
+        barrier.wait()
+        earliest = min(next_A)
+        barrier.wait()
+        if earliest == float('inf'):
+            break
+        end = earliest + link_delay / 2
+
+    for ring in list(out_ring_D.values()) + in_ring_L:
+        ring.close()
+    router_L = topo.router_D.values()
+    result_q.put({'tables': {r.name: {dest: next(iter(route.items())) for dest, route in r.rt_tbl_D.items()}
+                             for r in router_L},
+                  'messages': sum(r.updates_sent for r in router_L),
+                  'bytes': sum(r.update_bytes for r in router_L),
+                  'events': sim.events_processed, 'windows': window_count, 'time': sim.now,
+                  'wall_time': time.perf_counter() - start})
+
+
+## wait for the results of the worker processes
+# Raises RuntimeError as soon as a worker reports an error or dies without
+# a result, instead of waiting for the others, which the failed worker
+# would keep waiting at the barrier otherwise.
+# @param process_L: worker processes
+# @param result_q: queue receiving the result or the error of every worker
+# @return the results, one per worker
+def collect(process_L, result_q):
+    result_L = []
+    while len(result_L) < len(process_L):
+        try:
+            result = result_q.get(timeout=poll_time)
+        except queue.Empty:
+            dead_L = [p for p in process_L if p.exitcode not in (None, 0)]
+            if not dead_L:
+                continue
+            try:
+                result = result_q.get(timeout=poll_time)  # the report of a failed worker may still be in flight
+            except queue.Empty:
+                raise RuntimeError('%s exited with code %d' % (dead_L[0].name, dead_L[0].exitcode))
+        if 'error' in result:
+            # a worker that only found the barrier broken by another one reports that, look for the cause
+            while result['broken']:
+                try:
+                    other = result_q.get(timeout=poll_time)
+                except queue.Empty:
+                    break
+                if 'error' in other:
+                    result = other
+            raise RuntimeError('shard %d failed:\n%s' % (result['shard'], result['error']))
+        result_L.append(result)
+    return result_L
+
+
+## simulate the routing of a topology over several processes until no packet is left
+# @param spec: topology description, see topology.py
+# @param shard_count: number of worker processes
+# @param kick: (router, interface) sending the first routing update, None for all routers to advertise
+# @param option_D: options of topology.build()
+# @return {'tables': {router: {destination: (interface, cost)}}, 'messages', 'bytes', 'events', 'windows',
+#     'time' (virtual), 'wall_time'}
+def run(spec, shard_count, kick=None, **option_D):
+    start = time.perf_counter()
+    part_D = partition(spec, shard_count)
+    ring_D = {(a, b): ShmRing(capacity=ring_capacity) for a in range(shard_count) for b in range(shard_count) if a != b}
+    barrier = multiprocessing.Barrier(shard_count)
+    next_A = multiprocessing.Array('d', shard_count, lock=False)
+    left_A = multiprocessing.Array('b', shard_count, lock=False)
+    result_q = multiprocessing.Queue()
+    process_L = [multiprocessing.Process(target=run_shard, name='shard %d' % shard,
+                                         args=(shard, spec, part_D, {k: ring.name for k, ring in ring_D.items()},
+                                               barrier, next_A, left_A, option_D, kick, result_q))
+                 for shard in range(shard_count)]
+    try:
+        for p in process_L:
+            p.start()
+        result_L = collect(process_L, result_q)
+        for p in process_L:
+            p.join()
+    finally:
+        for p in process_L:
+            if p.is_alive():
+                p.terminate()
+                p.join()
+        for ring in ring_D.values():
+            ring.close(unlink=True)
+    result_D = {'tables': {}, 'messages': 0, 'bytes': 0, 'events': 0}
+    for r in result_L:
+        result_D['tables'].update(r['tables'])
+        for key in ('messages', 'bytes', 'events'):
+            result_D[key] += r[key]
+    result_D['windows'] = result_L[0]['windows']
+    result_D['time'] = max(r['time'] for r in result_L)
+    result_D['wall_time'] = time.perf_counter() - start
+    return result_D
+
+
+if __name__ == '__main__':
+    eventlog.set_level(eventlog.OFF)
+    spec = topology.read(sys.argv[1])
+    shard_count = int(sys.argv[2]) if len(sys.argv) > 2 and not sys.argv[2].startswith('--') else 2
+    option_D = {'routing': 'ls' if '--ls' in sys.argv else 'dv', 'hold_down': route_hold_down,
+                'wire_format': 'binary' if '--binary' in sys.argv else 'string',
+                'dv_backend': 'numpy' if '--numpy' in sys.argv else 'dict'}
+    cost_L = []
+    for count in sorted({1, shard_count}):
+        result_D = run(spec, count, **option_D)
+        print('%d shards: %.2f s, %d messages, %d bytes, %d events, %d windows, converged at %.3f virtual s' % (
+            count, result_D['wall_time'], result_D['messages'], result_D['bytes'], result_D['events'],
+            result_D['windows'], result_D['time']))
+        cost_L.append({r: {d: cost for d, (_, cost) in t.items()} for r, t in result_D['tables'].items()})
+    print('same routing costs' if all(c == cost_L[0] for c in cost_L) else 'ROUTING COSTS DIFFER')
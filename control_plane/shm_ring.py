@@ -0,0 +1,89 @@
+import struct
+from multiprocessing import shared_memory
+
+
+## Single producer, single consumer ring buffer of messages in shared memory
+# The first 16 bytes hold the total numbers of bytes written and read, which
+# only grow; every message is stored as its length followed by its bytes and
+# may wrap around the end of the buffer. The producer only moves the write
+# count and the consumer only the read count, each after copying the bytes,
+# so one process can write while another reads without a lock.
+class ShmRing:
+    ## written and read byte counts
+    counts = struct.Struct('=QQ')
+    ## length prefix of a message
+    length = struct.Struct('=I')
+
+    ##@param name: name of the shared memory block to attach to, None to create one
+    # @param capacity: size of the buffer in bytes when creating it
+    def __init__(self, name=None, capacity=1 << 20):
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.counts.size + capacity)
+            self.counts.pack_into(self.shm.buf, 0, 0, 0)
+        else:
+            self.shm = shared_memory.SharedMemory(name)
+        self.name = self.shm.name
+        self.capacity = self.shm.size - self.counts.size
+        self.data = self.shm.buf[self.counts.size:]
+
+    ## called when printing the object
+    def __str__(self):
+        written, read = self.counts.unpack_from(self.shm.buf, 0)
+        return 'ShmRing %s with %d of %d bytes used' % (self.name, written - read, self.capacity)
+
+    ## copy bytes into the buffer at a byte count, wrapping around its end
+    def copy_in(self, count, data):
+        pos = count % self.capacity
+        first = min(len(data), self.capacity - pos)
+        self.data[pos:pos + first] = data[:first]
+        if first < len(data):
+            self.data[:len(data) - first] = data[first:]
+
+    ## copy n bytes out of the buffer from a byte count, wrapping around its end
+    def copy_out(self, count, n):
+        pos = count % self.capacity
+        first = min(n, self.capacity - pos)
+        data = bytes(self.data[pos:pos + first])
+        if first < n:
+            data += bytes(self.data[:n - first])
+        return data
+
+    ## append messages while they fit
+    # @param msg_L: list of bytes
+    # @return the number of messages written, from the start of msg_L
+    def put(self, msg_L):
+        written, read = self.counts.unpack_from(self.shm.buf, 0)
+        free = self.capacity - (written - read)
+        done = 0
+        for msg in msg_L:
+            size = self.length.size + len(msg)
+            if size > free:
+                if size > self.capacity:
+                    raise ValueError('%s: message of %d bytes does not fit' % (self, len(msg)))
+                break
+            self.copy_in(written, self.length.pack(len(msg)))
+            self.copy_in(written + self.length.size, msg)
+            written += size
+            free -= size
+            done += 1
+        struct.pack_into('=Q', self.shm.buf, 0, written)  # publish the messages
+        return done
+
+    ## remove all messages written so far
+    # @return list of bytes
+    def get(self):
+        written, read = self.counts.unpack_from(self.shm.buf, 0)
+        msg_L = []
+        while read < written:
+            n = self.length.unpack(self.copy_out(read, self.length.size))[0]
+            msg_L.append(self.copy_out(read + self.length.size, n))
+            read += self.length.size + n
+        struct.pack_into('=Q', self.shm.buf, 8, read)  # free the space
+        return msg_L
+
+    ## detach from the shared memory, and free it if unlink is True (the creator should)
+    def close(self, unlink=False):
+        self.data.release()
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
@@ -1,14 +1,26 @@
+import eventlog
 import network_3
 import link_3
 import threading
-from time import sleep
 import sys
+from convergence import ConvergenceDetector
+from event_sim import Simulator
 
 ##configuration parameters
 router_queue_size = 0 #0 means unlimited
-simulation_time = 10   #give the network sufficient time to execute transfers
+router_batch_size = 8 #max packets a router drains from each interface per pass
+simulation_time = 10   #longest time given to the network to converge, or to execute transfers
+event_driven = '--des' in sys.argv #run on the discrete-event engine instead of threads
+wire_format = 'binary' if '--binary' in sys.argv else 'string' #encoding of the routing updates
+routing = 'ls' if '--ls' in sys.argv else 'dv' #link-state or distance vector routing
+route_horizon = 'poison' #distance vector routes through a neighbor are advertised to it as they are ('none'), left out ('split') or at infinity ('poison')
+route_infinity = 16 #distance vector cost from which a destination is unreachable
+dv_backend = 'numpy' if '--numpy' in sys.argv else 'dict' #distance vector routes in dicts or in a NumPy cost matrix (pip install numpy, optional)
+route_hold_down = 0.1 #seconds a router collects route changes before sending one update, 0 sends at once
+log_level = eventlog.OFF if '--quiet' in sys.argv else eventlog.DEBUG if '--verbose' in sys.argv else eventlog.INFO #OFF, ERROR, INFO or DEBUG
 
 if __name__ == '__main__':
+    eventlog.set_level(log_level)
     object_L = [] #keeps track of objects, so we can kill their threads at the end
 
     #create network hosts
@@ -23,25 +35,53 @@ if __name__ == '__main__':
     cost_D = {'H1': {0: 1}, 'H2': {1: 1}, 'RB': {2: 5}, 'RC': {3: 4}} # {neighbor: {interface: cost}}
     router_a = network_3.Router(name='RA',
                               cost_D = cost_D,
-                              max_queue_size=router_queue_size)
+                              max_queue_size=router_queue_size,
+                              batch_size=router_batch_size,
+                              wire_format=wire_format,
+                              hold_down=route_hold_down,
+                              routing=routing,
+                              horizon=route_horizon,
+                              infinity=route_infinity,
+                              dv_backend=dv_backend)
     object_L.append(router_a)
 
     cost_D = {'RA': {0: 5}, 'RD': {1: 3}} # {neighbor: {interface: cost}}
     router_b = network_3.Router(name='RB',
                               cost_D = cost_D,
-                              max_queue_size=router_queue_size)
+                              max_queue_size=router_queue_size,
+                              batch_size=router_batch_size,
+                              wire_format=wire_format,
+                              hold_down=route_hold_down,
+                              routing=routing,
+                              horizon=route_horizon,
+                              infinity=route_infinity,
+                              dv_backend=dv_backend)
     object_L.append(router_b)
 
     cost_D = {'RA': {0: 4}, 'RD': {1: 4}} # {neighbor: {interface: cost}}
     router_c = network_3.Router(name='RC',
                               cost_D = cost_D,
-                              max_queue_size=router_queue_size)
+                              max_queue_size=router_queue_size,
+                              batch_size=router_batch_size,
+                              wire_format=wire_format,
+                              hold_down=route_hold_down,
+                              routing=routing,
+                              horizon=route_horizon,
+                              infinity=route_infinity,
+                              dv_backend=dv_backend)
     object_L.append(router_c)
 
     cost_D = {'RB': {0: 3}, 'RC': {1: 4}, 'H3': {2:3}} # {neighbor: {interface: cost}}
     router_d = network_3.Router(name='RD',
                               cost_D = cost_D,
-                              max_queue_size=router_queue_size)
+                              max_queue_size=router_queue_size,
+                              batch_size=router_batch_size,
+                              wire_format=wire_format,
+                              hold_down=route_hold_down,
+                              routing=routing,
+                              horizon=route_horizon,
+                              infinity=route_infinity,
+                              dv_backend=dv_backend)
     object_L.append(router_d)
 
 
@@ -58,6 +98,32 @@ if __name__ == '__main__':
     link_layer.add_link(link_3.Link(router_c, 1, router_d, 1))
     link_layer.add_link(link_3.Link(router_d, 2,host_3, 0))
 
+    if event_driven:
+        #nodes and links only run when a packet arrives, on a virtual clock
+        sim = Simulator()
+        for obj in object_L:
+            if obj is link_layer:
+                sim.add_link_layer(link_layer)
+            else:
+                sim.add_node(obj)
+
+        ## compute routing tables
+        detector = ConvergenceDetector(object_L, sim.clock)
+        router_a.send_routes(2) #one update starts the routing process
+        sim.run() #runs until no routing updates are left in flight
+        eventlog.flush()
+        print("Converged routing tables: %(messages)d messages, %(bytes)d bytes, %(time).3f seconds" % detector.report())
+        for obj in object_L:
+            if str(type(obj)) == "<class 'network_3.Router'>":
+                obj.print_routes()
+
+        #send packet from host 1 to host 2
+        host_1.udt_send('H3', 'Put your hands to the constellations')
+        sim.run()
+        eventlog.flush()
+        print("Simulation finished after %d events" % sim.events_processed)
+        sys.exit(0)
+
     #start all the objects
     thread_L = []
     for obj in object_L:
@@ -67,16 +133,19 @@ if __name__ == '__main__':
         t.start()
 
     ## compute routing tables
+    detector = ConvergenceDetector(object_L)
     router_a.send_routes(2) #one update starts the routing process
-    sleep(simulation_time)  #let the tables converge
-    print("Converged routing tables")
+    report_D = detector.wait(simulation_time)  #let the tables converge
+    eventlog.flush()
+    print("%s routing tables: %d messages, %d bytes, %.3f seconds" % (
+        'Converged' if report_D['converged'] else 'Unconverged', report_D['messages'], report_D['bytes'], report_D['time']))
     for obj in object_L:
         if str(type(obj)) == "<class 'network_3.Router'>":
             obj.print_routes()
 
     #send packet from host 1 to host 2
     host_1.udt_send('H3', 'Put your hands to the constellations')
-    sleep(simulation_time)
+    detector.wait(simulation_time)  #until the packet is delivered
 
 
     #join all threads
@@ -85,4 +154,5 @@ if __name__ == '__main__':
     for t in thread_L:
         t.join()
 
+    eventlog.flush()
     print("All simulation threads joined")
\ No newline at end of file
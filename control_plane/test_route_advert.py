@@ -0,0 +1,65 @@
+import unittest
+import eventlog
+import route_advert
+from network_3 import Router
+from registry import nodes
+
+
+class CodecTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        for vector_D in ({}, {1: 0, 2: 3}, {300: 1, 2: 70000}, {70000: 4000000000, 5: 255, 6: 256}):
+            data = route_advert.encode(7, 42, vector_D)
+            self.assertEqual(route_advert.decode(data), (7, 42, vector_D))
+
+    def test_fixed_width_fields(self):
+        for cost, cost_size in ((127, 1), (128, 1), (255, 1), (256, 2), (70000, 4)):
+            vector_D = {k: cost for k in range(300)}  # ids need 2 bytes
+            data = route_advert.encode(1, 1, vector_D)
+            self.assertEqual(len(data), route_advert.header.size + 300 * 2 + 300 * cost_size)
+            self.assertEqual(route_advert.decode(data)[2], vector_D)
+
+    def test_values_out_of_range(self):
+        with self.assertRaises(OverflowError):
+            route_advert.encode(1, 1, {1: -1})
+        with self.assertRaises(OverflowError):
+            route_advert.encode(1, 1, {1: 1 << 32})
+
+    def test_sequence_numbers_wrap(self):
+        top = route_advert.seq_modulus - 1
+        data = route_advert.encode(1, route_advert.seq_modulus + 5, {})
+        self.assertEqual(route_advert.decode(data)[1], 5)
+        self.assertTrue(route_advert.newer(0, top))
+        self.assertTrue(route_advert.newer(5, top - 5))
+        self.assertFalse(route_advert.newer(top, 0))
+        self.assertFalse(route_advert.newer(3, 3))
+        self.assertTrue(route_advert.newer(2, 1))
+        self.assertFalse(route_advert.newer(1, 2))
+
+
+class BinaryUpdateTest(unittest.TestCase):
+
+    def setUp(self):
+        eventlog.set_level(eventlog.OFF)
+        self.addCleanup(eventlog.set_level, eventlog.INFO)
+        self.router = Router('AdvA', {'AdvB': {0: 1}}, 0, wire_format='binary')
+        self.neighbor = nodes.intern('AdvB')
+        self.dest = nodes.intern('AdvD')
+
+    ## cost of the route of the router to the destination after an update from its neighbor
+    def receive(self, seq, cost):
+        self.router.update_routes_binary(route_advert.encode(self.neighbor, seq, {self.dest: cost}), 0)
+        return self.router.rt_tbl_D.get('AdvD', {}).get(0)
+
+    def test_stale_updates_are_dropped_across_the_wrap(self):
+        top = route_advert.seq_modulus - 1
+        self.assertEqual(self.receive(top - 1, 3), 4)
+        self.assertEqual(self.receive(top, 5), 6)
+        self.assertEqual(self.receive(top - 1, 1), 6)  # stale
+        self.assertEqual(self.receive(route_advert.seq_modulus, 7), 8)  # wrapped to 0, newer
+        self.assertEqual(self.receive(top, 1), 8)  # stale after the wrap
+        self.assertEqual(self.receive(1, 2), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,208 @@
+import heapq
+import os
+import random
+import unittest
+import bench
+import dv_matrix
+import eventlog
+import topology
+from convergence import ConvergenceDetector
+from distance_vector import DistanceVector
+from network_3 import Host, NetworkPacket, Router
+from registry import nodes
+
+## routing configurations of the routers, as options of topology.build()
+config_L = [{'routing': 'dv'},
+            {'routing': 'dv', 'wire_format': 'binary'},
+            {'routing': 'dv', 'horizon': 'split'},
+            {'routing': 'dv', 'horizon': 'poison', 'infinity': 16, 'hold_down': 0.1},
+            {'routing': 'ls'},
+            {'routing': 'ls', 'wire_format': 'binary'}]
+if dv_matrix.numpy is not None:
+    config_L.append({'routing': 'dv', 'dv_backend': 'numpy', 'horizon': 'poison', 'infinity': 16})
+
+
+## the cost of the shortest path from every router to every other node, hosts not forwarding
+# @param spec: topology description
+# @param failed_S: links {(node, node)} left out
+# @return {router: {destination: cost}}
+def shortest_costs(spec, failed_S=frozenset()):
+    host_S = {h['addr'] for h in spec['hosts']}
+    adj_D = {}
+    for l in spec['links']:
+        a, b = l['from'][0], l['to'][0]
+        if (a, b) not in failed_S and (b, a) not in failed_S:
+            adj_D.setdefault(a, []).append((b, l.get('cost', 1)))
+            adj_D.setdefault(b, []).append((a, l.get('cost', 1)))
+    cost_D = {}
+    for r in spec['routers']:
+        src = r['name']
+        dist_D = {src: 0}
+        heap_L = [(0, src)]
+        while heap_L:
+            cost, node = heapq.heappop(heap_L)
+            if cost > dist_D[node] or node in host_S:
+                continue
+            for neighbor, link_cost in adj_D.get(node, []):
+                if cost + link_cost < dist_D.get(neighbor, float('inf')):
+                    dist_D[neighbor] = cost + link_cost
+                    heapq.heappush(heap_L, (cost + link_cost, neighbor))
+        del dist_D[src]
+        cost_D[src] = dist_D
+    return cost_D
+
+
+class ConvergenceTest(unittest.TestCase):
+
+    def setUp(self):
+        eventlog.set_level(eventlog.OFF)
+        self.addCleanup(eventlog.set_level, eventlog.INFO)
+
+    ## the routing costs of every router, checking that each route goes through a neighbor that has one
+    def costs(self, topo):
+        cost_D = {}
+        for name, router in topo.router_D.items():
+            cost_D[name] = {}
+            for dest, route in router.rt_tbl_D.items():
+                (intf, cost), = route.items()
+                neighbor, = [n for n, intf_D in router.cost_D.items() if intf in intf_D]
+                if neighbor != dest:
+                    self.assertEqual(topo.router_D[neighbor].rt_tbl_D[dest][next(iter(
+                        topo.router_D[neighbor].rt_tbl_D[dest]))], cost - router.cost_D[neighbor][intf])
+                cost_D[name][dest] = cost
+        return cost_D
+
+    def test_routes_are_the_shortest_paths(self):
+        spec_L = [topology.read(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'topology_3.json')),
+                  topology.ring(7, cost=2)]
+        for spec in spec_L:
+            expected_D = shortest_costs(spec)
+            for config_D in config_L:
+                topo = topology.build(spec, **config_D)
+                sim = bench.simulator(topo.object_L)
+                detector = ConvergenceDetector(topo.object_L, sim.clock)
+                for router in topo.router_D.values():
+                    router.advertise()
+                sim.run()
+                self.assertEqual(self.costs(topo), expected_D, config_D)
+                report_D = detector.report()
+                self.assertEqual(report_D['messages'], sum(r.updates_sent for r in topo.router_D.values()))
+                self.assertTrue(detector.idle())
+
+    def test_link_failure(self):
+        spec = topology.ring(6)
+        expected_D = shortest_costs(spec, {('R0', 'R1')})
+        for config_D in config_L:
+            if config_D.get('horizon', 'none') == 'none' and config_D['routing'] == 'dv':
+                continue  # counts to infinity
+            topo = topology.build(spec, **config_D)
+            sim = bench.simulator(topo.object_L)
+            for router in topo.router_D.values():
+                router.advertise()
+            sim.run()
+            topo.router_D['R0'].set_link_cost('R1', DistanceVector.infinity)
+            topo.router_D['R1'].set_link_cost('R0', DistanceVector.infinity)
+            sim.run()
+            self.assertEqual(self.costs(topo), expected_D, config_D)
+
+    def test_data_is_delivered_before_the_tables_are_read(self):
+        topo = topology.build(topology.ring(5))
+        self.assertFalse(any(r.routes_filled or len(r.route_intf_L) for r in topo.router_D.values()))
+        sim = bench.simulator(topo.object_L)
+        for router in topo.router_D.values():
+            router.advertise()
+        sim.run()
+        received_L = []
+        topo.host_D['H3'].receive_callback = received_L.append
+        topo.host_D['H0'].udt_send('H3', 'hello')
+        sim.run()
+        self.assertEqual(received_L, ['hello'])
+
+
+class RouterQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        eventlog.set_level(eventlog.OFF)
+        self.addCleanup(eventlog.set_level, eventlog.INFO)
+
+    ## the data packets enqueued for sending on an interface of a router
+    @staticmethod
+    def sent_data(router, intf):
+        pkt_L = router.intf_L[intf].get_batch('out', 100)
+        return [p.data_S for p in map(NetworkPacket.from_byte_S, pkt_L) if p.prot_S == 'data']
+
+    def test_data_before_a_routing_update_takes_the_old_route(self):
+        Host('QueS')
+        Host('QueH')
+        router = Router('QueA', {'QueB': {0: 1}, 'QueC': {1: 1}, 'QueS': {2: 1}}, 0, batch_size=8)
+        router.update_routes(NetworkPacket.from_byte_S(NetworkPacket(0, 'control', 'QueB///QueH/0/1//').to_byte_S()), 0)
+        self.assertEqual(router.rt_tbl_D['QueH'], {0: 2})
+        for p in (NetworkPacket('QueH', 'data', 'before'), NetworkPacket(0, 'control', 'QueC///QueH/0/0//'),
+                  NetworkPacket('QueH', 'data', 'after')):
+            router.intf_L[2].put(p.to_byte_S(), 'in')
+        router.process_queues()
+        self.assertEqual(router.rt_tbl_D['QueH'], {1: 1})
+        self.assertEqual(self.sent_data(router, 0), ['before'])
+        self.assertEqual(self.sent_data(router, 1), ['after'])
+
+
+class MatrixDistanceVectorTest(unittest.TestCase):
+
+    ## distance vector routing states of a graph, exchanging vectors until none changes
+    # @param dv_class: DistanceVector or MatrixDistanceVector
+    # @param graph_D: {node: [(neighbor, cost)]}
+    # @param prefix: prefix of the node names, unique per call
+    # @return {node: ({destination name: cost}, {destination name: next hop name})}
+    def converge(self, dv_class, graph_D, prefix, horizon, infinity):
+        name = lambda n: '%s%d' % (prefix, n)
+        dv_D = {n: dv_class(name(n), {name(m): {k: cost} for k, (m, cost) in enumerate(graph_D[n])}, horizon, infinity)
+                for n in graph_D}
+        id_D = {n: nodes.intern(name(n)) for n in graph_D}
+        changed = True
+        while changed:
+            changed = False
+            for n in graph_D:
+                for m, _ in graph_D[n]:
+                    vector_D = dict(dv_D[n].vector(id_D[m]))
+                    if vector_D != dv_D[m].vector_D[id_D[n]]:
+                        dv_D[m].update(id_D[n], vector_D)
+                        changed = True
+        strip = lambda node_id: None if node_id is None else nodes.name(node_id)[len(prefix):]
+        return {n: ({strip(d): c for d, c in dv.dist_D.items()}, {strip(d): strip(v) for d, v in dv.via_D.items()})
+                for n, dv in dv_D.items()}
+
+    @unittest.skipIf(dv_matrix.numpy is None, 'numpy is not installed')
+    def test_same_routes_as_the_dicts(self):
+        rnd = random.Random(1)
+        for trial in range(10):
+            count = rnd.randint(3, 25)
+            graph_D = {n: [] for n in range(count)}
+            for n in range(1, count):
+                m, cost = rnd.randrange(n), rnd.randint(1, 5)
+                graph_D[n].append((m, cost))
+                graph_D[m].append((n, cost))
+            for _ in range(count):
+                a, b = rnd.sample(range(count), 2)
+                if all(m != b for m, _ in graph_D[a]):
+                    cost = rnd.randint(1, 5)
+                    graph_D[a].append((b, cost))
+                    graph_D[b].append((a, cost))
+            for horizon, infinity in (('none', float('inf')), ('split', float('inf')), ('poison', 64)):
+                prefix = 'Mat%d%s' % (trial, horizon)
+                self.assertEqual(self.converge(dv_matrix.MatrixDistanceVector, graph_D, prefix + 'M', horizon, infinity),
+                                 self.converge(DistanceVector, graph_D, prefix + 'D', horizon, infinity))
+
+    @unittest.skipIf(dv_matrix.numpy is None, 'numpy is not installed')
+    def test_columns_grow_with_the_destinations_known(self):
+        for k in range(2000):
+            nodes.intern('ColN%d' % k)
+        dv = dv_matrix.MatrixDistanceVector('ColA', {'ColB': {0: 1}, 'ColC': {1: 1}})
+        self.assertLessEqual(dv.adv_M.shape[1], 4)
+        far = nodes.intern('ColN1999')
+        dv.update(nodes.intern('ColB'), {far: 2})
+        self.assertLessEqual(dv.adv_M.shape[1], 8)
+        self.assertEqual(dv.route(far), (0, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
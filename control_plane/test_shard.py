@@ -0,0 +1,36 @@
+import copy
+import time
+import unittest
+import eventlog
+import shard
+import topology
+
+
+class ShardTest(unittest.TestCase):
+
+    def setUp(self):
+        eventlog.set_level(eventlog.OFF)
+        self.addCleanup(eventlog.set_level, eventlog.INFO)
+
+    def test_same_tables_as_one_shard(self):
+        spec = topology.ring(8)
+        for option_D in ({}, {'wire_format': 'binary'}, {'routing': 'ls'}):
+            result_L = [shard.run(spec, count, **option_D) for count in (1, 2)]
+            cost_L = [{r: {d: cost for d, (_, cost) in t.items()} for r, t in result['tables'].items()}
+                      for result in result_L]
+            self.assertEqual(len(cost_L[0]), 8)
+            self.assertEqual(cost_L[0], cost_L[1], option_D)
+            self.assertGreater(result_L[0]['messages'], 0)
+
+    def test_failed_worker_stops_the_run(self):
+        spec = copy.deepcopy(topology.ring(8))
+        spec['routers'][-1]['horizon'] = 'poison'  # without a finite infinity, the router cannot be built
+        start = time.perf_counter()
+        with self.assertRaises(RuntimeError) as raised:
+            shard.run(spec, 2)
+        self.assertIn('poisoned reverse needs a finite infinity', str(raised.exception))
+        self.assertLess(time.perf_counter() - start, 10 * shard.poll_time + 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+'''
+Declarative topologies for the part 3 network.
+
+A topology file (JSON, or YAML when PyYAML is installed) lists the hosts,
+the routers and the links between their interfaces with the link costs:
+
+    {"hosts": [{"addr": "H1"}, ...],
+     "routers": [{"name": "RA"}, ...],
+     "links": [{"from": ["H1", 0], "to": ["RA", 0], "cost": 1}, ...]}
+
+The cost table ({neighbor: {interface: cost}}) of every router is derived
+from its links, the cost defaults to 1. Routers may override the queue size,
+the batch size, the wire format, the hold down and the horizon of the
+routing updates given to load(). A link to a node that is not described
+gets no Link object and is listed in external_L instead, so that a part of
+a larger topology can be built (see shard.py).
+
+usage: python topology.py FILE  (build FILE and report the time taken)
+       python topology.py --ring N FILE  (write a ring of N routers with a host each)
+'''
+
+import gc
+import json
+import sys
+import time
+import eventlog
+import link_3
+import network_3
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+## A network built from a topology file
+class Topology:
+
+    def __init__(self):
+        self.host_D = {}  # {name: Host}
+        self.router_D = {}  # {name: Router}
+        self.link_layer = link_3.LinkLayer()
+        self.external_L = []  # (index in the links of the description, local node, interface, remote node name)
+
+    ## called when printing the object
+    def __str__(self):
+        return 'Topology with %d hosts, %d routers and %d links' % (len(self.host_D), len(self.router_D), len(self.link_layer.link_L))
+
+    ## hosts, routers and the link layer, e.g. to start their threads
+    @property
+    def object_L(self):
+        return list(self.host_D.values()) + list(self.router_D.values()) + [self.link_layer]
+
+    ## look up a host or router by name
+    def node(self, name):
+        node = self.host_D.get(name)
+        return node if node is not None else self.router_D[name]
+
+
+## read a topology description
+# @param path: .json file, or .yaml/.yml file if PyYAML is installed
+# @return the description as a dict
+def read(path):
+    with open(path) as f:
+        if path.endswith(('.yaml', '.yml')):
+            if yaml is None:
+                raise ImportError('PyYAML is required to read %s' % path)
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+## instantiate the network of a topology description
+# The routers and links are created with their construction messages turned
+# off and the links are collected in one list. The garbage collector is
+# paused meanwhile, as the many interface queues would trigger repeated
+# collections.
+# @param spec: topology description, see the module documentation
+# @param max_queue_size: default queue length of router interfaces, 0 means unlimited
+# @param batch_size: default number of packets a router drains from each interface per pass
+# @param wire_format: encoding of the routing updates, 'string' or 'binary'
+# @param hold_down: seconds during which route changes are collected into one update, 0 sends at once
+# @param routing: 'dv' for distance vector or 'ls' for link-state routing, the same for all routers
+# @param horizon: 'none', 'split' (split horizon) or 'poison' (poisoned reverse) for distance vector routing
+# @param infinity: distance vector cost from which a destination is unreachable, the same for all routers
+# @param dv_backend: 'dict' or 'numpy' (a cost matrix, if numpy is installed) for the distance vector routes
+def build(spec, max_queue_size=0, batch_size=1, wire_format='string', hold_down=0, routing='dv', horizon='none',
+          infinity=float('inf'), dv_backend='dict'):
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with eventlog.quiet('routing', 'link'):
+            return build_objects(spec, max_queue_size, batch_size, wire_format, hold_down, routing, horizon, infinity,
+                                 dv_backend)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+## instantiate the objects of a topology description, called by build()
+def build_objects(spec, max_queue_size, batch_size, wire_format, hold_down, routing, horizon, infinity, dv_backend):
+    link_spec_L = spec.get('links', [])
+    # derive the cost tables of the routers from their links
+    cost_D = {r['name']: {} for r in spec.get('routers', [])}  # {router: {neighbor: {interface: cost}}}
+    for l in link_spec_L:
+        (name_1, intf_1), (name_2, intf_2) = l['from'], l['to']
+        cost = l.get('cost', 1)
+        if name_1 in cost_D:
+            cost_D[name_1].setdefault(name_2, {})[intf_1] = cost
+        if name_2 in cost_D:
+            cost_D[name_2].setdefault(name_1, {})[intf_2] = cost
+
+    topo = Topology()
+    for h in spec.get('hosts', []):
+        topo.host_D[h['addr']] = network_3.Host(h['addr'])
+    for r in spec.get('routers', []):
+        topo.router_D[r['name']] = network_3.Router(r['name'], cost_D[r['name']],
+                                                    r.get('max_queue_size', max_queue_size),
+                                                    r.get('batch_size', batch_size), r.get('fairness_cap'),
+                                                    r.get('wire_format', wire_format), r.get('hold_down', hold_down),
+                                                    routing, r.get('horizon', horizon), infinity, dv_backend)
+    node = topo.node
+    local_S = topo.host_D.keys() | topo.router_D.keys()
+    link_L = topo.link_layer.link_L
+    for index, l in enumerate(link_spec_L):
+        (name_1, intf_1), (name_2, intf_2) = l['from'], l['to']
+        if name_1 in local_S and name_2 in local_S:
+            link_L.append(link_3.Link(node(name_1), intf_1, node(name_2), intf_2))
+        elif name_1 in local_S:
+            topo.external_L.append((index, node(name_1), intf_1, name_2))
+        elif name_2 in local_S:
+            topo.external_L.append((index, node(name_2), intf_2, name_1))
+    return topo
+
+
+## read and instantiate a topology file, see build() for the options
+def load(path, **option_D):
+    return build(read(path), **option_D)
+
+
+## describe a ring of routers, each with one host attached
+# @param router_count: number of routers, and of hosts
+# @param cost: cost of every link
+def ring(router_count, cost=1):
+    host_L = [{'addr': 'H%d' % i} for i in range(router_count)]
+    router_L = [{'name': 'R%d' % i} for i in range(router_count)]
+    link_L = []
+    for i in range(router_count):
+        link_L.append({'from': ['H%d' % i, 0], 'to': ['R%d' % i, 0], 'cost': cost})
+        link_L.append({'from': ['R%d' % i, 1], 'to': ['R%d' % ((i + 1) % router_count), 2], 'cost': cost})
+    return {'hosts': host_L, 'routers': router_L, 'links': link_L}
+
+
+if __name__ == '__main__':
+    if sys.argv[1] == '--ring':
+        with open(sys.argv[3], 'w') as f:
+            json.dump(ring(int(sys.argv[2])), f)
+    else:
+        spec = read(sys.argv[1])
+        start = time.perf_counter()
+        topo = build(spec)
+        print('%s built in %.3f seconds' % (topo, time.perf_counter() - start))